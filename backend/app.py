@@ -8,9 +8,12 @@ from src.modules.alerts.routes import router as alerts_router
 from src.modules.alerts.utils.startup import lifespan
 from src.modules.auth.routes import router as auth_router
 from src.modules.control_panel.routes import router as control_panel_router
+from src.modules.jobs.routes import router as jobs_router
 from src.modules.queries.routes import router as queries_router
 from src.modules.reports.routes import router as reports_router
 from src.modules.text_to_sql.routes import router as text_to_sql_router
+from src.utils.AdmissionControl import AdmissionControlMiddleware, too_many_requests
+from src.utils.Bulkhead import BulkheadFullError
 
 app = FastAPI(
     title="LangSQL",
@@ -25,6 +28,13 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     return JSONResponse(status_code=422, content={"detail": exc.errors()})
 
 
+@app.exception_handler(BulkheadFullError)
+async def bulkhead_full_exception_handler(request: Request, exc: BulkheadFullError):
+    return too_many_requests(exc)
+
+
+# Added before CORS so that 429 responses still carry the CORS headers.
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -41,6 +51,7 @@ app.include_router(control_panel_router,
                    prefix="/api/control-panel", tags=["Control Panel"])
 app.include_router(queries_router, prefix="/api/queries", tags=["Queries"])
 app.include_router(reports_router, prefix="/api/reports", tags=["Reports"])
+app.include_router(jobs_router, prefix="/api/jobs", tags=["Jobs"])
 
 if __name__ == "__main__":
     uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True)
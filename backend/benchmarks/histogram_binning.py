@@ -0,0 +1,58 @@
+"""
+Compares the previous pandas histogram path (pd.cut + value_counts + Python label formatting)
+with the NumPy binning used by the Histogram chart.
+
+Usage (from backend/): python -m benchmarks.histogram_binning [--size 10000000] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.modules.reports.utils.binning import compute_histogram
+
+
+def pandas_histogram(values: pd.Series, bins: int):
+    binned = pd.cut(values, bins=bins)
+    counts = binned.value_counts(sort=False)
+    labels = [f"{round(interval.left, 2)} - {round(interval.right, 2)}" for interval in counts.index]
+    return labels, counts.tolist()
+
+
+def numpy_histogram(values: np.ndarray, strategy: str, bins: int):
+    counts, edges = compute_histogram(values, strategy=strategy, bins=bins)
+    rounded = np.round(edges, 2)
+    labels = [f"{low} - {high}" for low, high in zip(rounded[:-1].tolist(), rounded[1:].tolist())]
+    return labels, counts.tolist()
+
+
+def best_of(repeat: int, function, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--bins", type=int, default=10)
+    args = parser.parse_args()
+
+    values = np.random.default_rng(0).lognormal(size=args.size)
+    values[::1000] = np.nan
+    series = pd.Series(values)
+
+    baseline = best_of(args.repeat, pandas_histogram, series, args.bins)
+    print(f"pandas pd.cut + value_counts: {baseline:.3f}s")
+    for strategy in ("fixed", "sturges", "fd"):
+        elapsed = best_of(args.repeat, numpy_histogram, values, strategy, args.bins)
+        print(f"numpy {strategy:<8}: {elapsed:.3f}s ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
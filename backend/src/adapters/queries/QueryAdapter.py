@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
 from src.modules.queries.service import QueryService
@@ -12,7 +12,31 @@ class QueryAdapter:
     def get_db_structure(self, connection: DatabaseConnection) -> Dict[str, Any]:
         return self.query_service.get_db_structure(connection.schema_name)
 
-    def execute_query(self, query: str, connection: DatabaseConnection) -> List[Dict[str, Any]]:
+    def execute_query(self, query: str, connection: DatabaseConnection, use_cache: bool = True) -> List[Dict[str, Any]]:
         db_manager = DatabaseManagerFactory.create_manager(connection)
         query_service = QueryService(db_manager)
-        return query_service.execute_query(query, connection.schema_name)
+        return query_service.execute_query(query, connection.schema_name, use_cache)
+
+    def stream_query(
+        self, query: str, connection: DatabaseConnection, chunk_size: int = 500, timeout: Optional[float] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        db_manager = DatabaseManagerFactory.create_manager(connection)
+        query_service = QueryService(db_manager)
+        return query_service.stream_query(query, connection.schema_name, chunk_size, timeout)
+
+    def bulk_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        connection: DatabaseConnection,
+        ignore_conflicts: bool = False,
+    ) -> int:
+        db_manager = DatabaseManagerFactory.create_manager(connection)
+        query_service = QueryService(db_manager)
+        return query_service.bulk_insert(table_name, columns, rows, connection.schema_name, ignore_conflicts)
+
+    def explain(self, query: str, connection: DatabaseConnection) -> Dict[str, float]:
+        db_manager = DatabaseManagerFactory.create_manager(connection)
+        query_service = QueryService(db_manager)
+        return query_service.explain(query, connection.schema_name)
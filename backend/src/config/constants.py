@@ -22,8 +22,68 @@ class Settings:
     ALGORITHM: str = os.getenv('ALGORITHM')
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS'))
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES'))
+    AUTH_PASSWORD_WORKERS: int = int(os.getenv('AUTH_PASSWORD_WORKERS', 4))
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv('AUTH_TOKEN_CACHE_TTL_SECONDS', 300))
     GMAIL_USERNAME: str = os.getenv('GMAIL_USERNAME')
     GMAIL_APP_PASSWORD: str = os.getenv('GMAIL_APP_PASSWORD')
     API_URL: str = os.getenv('API_URL')
     TEST_USER: str = os.getenv('TEST_USER')
     TEST_ALERT: str = os.getenv('TEST_ALERT')
+    REPORTS_MAX_CONCURRENCY: int = int(os.getenv('REPORTS_MAX_CONCURRENCY', 4))
+    REPORTS_SAMPLE_SIZE: int = int(os.getenv('REPORTS_SAMPLE_SIZE', 10000))
+    REPORTS_PROFILE_TTL_SECONDS: int = int(os.getenv('REPORTS_PROFILE_TTL_SECONDS', 3600))
+    REPORTS_NARRATIVE_TTL_SECONDS: int = int(os.getenv('REPORTS_NARRATIVE_TTL_SECONDS', 86400))
+    REPORTS_NARRATIVE_MAX_TOKENS: int = int(os.getenv('REPORTS_NARRATIVE_MAX_TOKENS', 4096))
+    REPORTS_TOP_N: int = int(os.getenv('REPORTS_TOP_N', 20))
+    REPORTS_MAX_POINTS: int = int(os.getenv('REPORTS_MAX_POINTS', 500))
+    REPORTS_VALUE_COUNTS_LIMIT: int = int(os.getenv('REPORTS_VALUE_COUNTS_LIMIT', 5000))
+    REPORTS_HISTOGRAM_STRATEGY: str = os.getenv('REPORTS_HISTOGRAM_STRATEGY', 'fd')
+    REPORTS_CHART_WORKERS: int = int(os.getenv('REPORTS_CHART_WORKERS', os.cpu_count() or 1))
+    REPORTS_CHART_PROCESS_MIN_CELLS: int = int(os.getenv('REPORTS_CHART_PROCESS_MIN_CELLS', 200000))
+    QUERY_CACHE_TTL_SECONDS: int = int(os.getenv('QUERY_CACHE_TTL_SECONDS', 300))
+    QUERY_CACHE_MAX_BYTES: int = int(os.getenv('QUERY_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    QUERY_CACHE_MAX_ENTRY_BYTES: int = int(os.getenv('QUERY_CACHE_MAX_ENTRY_BYTES', 1024 * 1024))
+    QUERY_GUARD_MAX_COST: float = float(os.getenv('QUERY_GUARD_MAX_COST', 1000000))
+    QUERY_GUARD_MAX_ROWS: int = int(os.getenv('QUERY_GUARD_MAX_ROWS', 100000))
+    QUERY_GUARD_ROW_LIMIT: int = int(os.getenv('QUERY_GUARD_ROW_LIMIT', 1000))
+    CHAT_STREAM_CHUNK_ROWS: int = int(os.getenv('CHAT_STREAM_CHUNK_ROWS', 500))
+    SYNTHETIC_KEY_SAMPLE_SIZE: int = int(os.getenv('SYNTHETIC_KEY_SAMPLE_SIZE', 100000))
+    SYNTHETIC_VOCABULARY_SIZE: int = int(os.getenv('SYNTHETIC_VOCABULARY_SIZE', 50))
+    JOBS_MAX_WORKERS: int = int(os.getenv('JOBS_MAX_WORKERS', 2))
+    JOBS_PROGRESS_INTERVAL_SECONDS: float = float(os.getenv('JOBS_PROGRESS_INTERVAL_SECONDS', 1))
+    JOBS_HEARTBEAT_INTERVAL_SECONDS: float = float(os.getenv('JOBS_HEARTBEAT_INTERVAL_SECONDS', 30))
+    JOBS_HEARTBEAT_TIMEOUT_SECONDS: float = float(os.getenv('JOBS_HEARTBEAT_TIMEOUT_SECONDS', 120))
+    CHAT_WORKING_SET_TTL_SECONDS: float = float(os.getenv('CHAT_WORKING_SET_TTL_SECONDS', 1800))
+    CHAT_WORKING_SET_MAX_BYTES: int = int(os.getenv('CHAT_WORKING_SET_MAX_BYTES', 256 * 1024 * 1024))
+    CHAT_WORKING_SET_MAX_ENTRY_BYTES: int = int(os.getenv('CHAT_WORKING_SET_MAX_ENTRY_BYTES', 32 * 1024 * 1024))
+    FILE_DATABASE_DIR: str = os.getenv('FILE_DATABASE_DIR', 'data')
+    FANOUT_TIMEOUT_SECONDS: float = float(os.getenv('FANOUT_TIMEOUT_SECONDS', 30))
+    FANOUT_MAX_CONCURRENCY: int = int(os.getenv('FANOUT_MAX_CONCURRENCY', 8))
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 30))
+    REPLICA_HEALTH_CHECK_SECONDS: float = float(os.getenv('REPLICA_HEALTH_CHECK_SECONDS', 10))
+    LLM_FALLBACK_MODELS: str = os.getenv('LLM_FALLBACK_MODELS', '')
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv('LLM_REQUESTS_PER_MINUTE', 60))
+    LLM_BURST: float = float(os.getenv('LLM_BURST', 10))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv('LLM_MAX_CONCURRENCY', 8))
+    LLM_MAX_RETRIES: int = int(os.getenv('LLM_MAX_RETRIES', 2))
+    LLM_BACKOFF_BASE_SECONDS: float = float(os.getenv('LLM_BACKOFF_BASE_SECONDS', 0.5))
+    LLM_BACKOFF_MAX_SECONDS: float = float(os.getenv('LLM_BACKOFF_MAX_SECONDS', 8))
+    LLM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv('LLM_QUEUE_TIMEOUT_SECONDS', 30))
+    OPENAI_API_KEY: str = os.getenv('OPENAI_API_KEY')
+    OPENAI_BASE_URL: str = os.getenv('OPENAI_BASE_URL')
+    PROMPT_MAX_TOKENS: int = int(os.getenv('PROMPT_MAX_TOKENS', 8000))
+    PROMPT_HISTORY_MIN_TOKENS: int = int(os.getenv('PROMPT_HISTORY_MIN_TOKENS', 1000))
+    PROMPT_MAX_MESSAGE_TOKENS: int = int(os.getenv('PROMPT_MAX_MESSAGE_TOKENS', 500))
+    PROMPT_TOKENIZER: str = os.getenv('PROMPT_TOKENIZER', 'cl100k_base')
+    BULKHEAD_TENANT_SHARE: float = float(os.getenv('BULKHEAD_TENANT_SHARE', 0.5))
+    BULKHEAD_CHAT_CONCURRENCY: int = int(os.getenv('BULKHEAD_CHAT_CONCURRENCY', 16))
+    BULKHEAD_CHAT_QUEUE: int = int(os.getenv('BULKHEAD_CHAT_QUEUE', 64))
+    BULKHEAD_QUERIES_CONCURRENCY: int = int(os.getenv('BULKHEAD_QUERIES_CONCURRENCY', 8))
+    BULKHEAD_QUERIES_QUEUE: int = int(os.getenv('BULKHEAD_QUERIES_QUEUE', 32))
+    BULKHEAD_REPORTS_CONCURRENCY: int = int(os.getenv('BULKHEAD_REPORTS_CONCURRENCY', 4))
+    BULKHEAD_REPORTS_QUEUE: int = int(os.getenv('BULKHEAD_REPORTS_QUEUE', 16))
+    BULKHEAD_ALERTS_CONCURRENCY: int = int(os.getenv('BULKHEAD_ALERTS_CONCURRENCY', 4))
+    BULKHEAD_ALERTS_QUEUE: int = int(os.getenv('BULKHEAD_ALERTS_QUEUE', 16))
+    BULKHEAD_BULK_CONCURRENCY: int = int(os.getenv('BULKHEAD_BULK_CONCURRENCY', 2))
+    BULKHEAD_BULK_QUEUE: int = int(os.getenv('BULKHEAD_BULK_QUEUE', 16))
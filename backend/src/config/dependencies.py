@@ -2,10 +2,16 @@ from fastapi import Depends
 
 from src.adapters.queries.QueryAdapter import QueryAdapter
 from src.adapters.text_to_sql.adapter import TextToSQLAdapter
+from src.modules.jobs.repositories.repository import JobRepository
+from src.modules.jobs.service import JobService
+from src.modules.jobs.utils.runners import register_runners
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.queries.schemas.FanOutRequest import FanOutRequest
 from src.modules.queries.service import QueryService
 from src.modules.queries.utils.DatabaseManagerFactory import DatabaseManagerFactory
+from src.modules.queries.utils.FanOutExecutor import FanOutExecutor
 from src.modules.queries.utils.IDatabaseManager import IDatabaseManager
+from src.modules.queries.utils.QueryGuard import QueryGuard
 from src.modules.reports.repositories.repository import ReportRepository
 from src.modules.reports.service import ReportService
 from src.modules.text_to_sql.repositories.repository import TextToSqlRepository
@@ -27,6 +33,15 @@ def get_query_adapter(query_service: QueryService = Depends(get_query_service))
     return QueryAdapter(query_service)
 
 
+def get_fan_out_query_adapter(request: FanOutRequest) -> QueryAdapter:
+    # The schema is read from the first target; the others are expected to share it.
+    return QueryAdapter(QueryService(get_db_manager(request.connections[0])))
+
+
+def get_fan_out_executor(request: FanOutRequest, query_adapter: QueryAdapter = Depends(get_fan_out_query_adapter)) -> FanOutExecutor:
+    return FanOutExecutor(query_adapter, timeout=request.timeout_seconds)
+
+
 def get_langchain_llm_client() -> ILLMClient:
     return LangChainLLMClient()
 
@@ -40,7 +55,11 @@ def get_text_to_sql_repository() -> TextToSqlRepository:
 
 
 def get_lang_to_sql_service(query_adapter: QueryAdapter = Depends(get_query_adapter), llm_client: ILLMClient = Depends(get_langchain_llm_client), repository: TextToSqlRepository = Depends(get_text_to_sql_repository)) -> LangToSqlService:
-    return LangToSqlService(query_adapter, llm_client, repository)
+    return LangToSqlService(query_adapter, llm_client, repository, QueryGuard(query_adapter))
+
+
+def get_fan_out_lang_to_sql_service(query_adapter: QueryAdapter = Depends(get_fan_out_query_adapter), llm_client: ILLMClient = Depends(get_langchain_llm_client), repository: TextToSqlRepository = Depends(get_text_to_sql_repository)) -> LangToSqlService:
+    return LangToSqlService(query_adapter, llm_client, repository, QueryGuard(query_adapter))
 
 
 def get_synthetic_data_model_service(query_adapter: QueryAdapter = Depends(get_query_adapter), llm_client: ILLMClient = Depends(get_apiclient_llm_client)) -> SyntheticDataModelService:
@@ -58,3 +77,18 @@ def get_report_repository() -> ReportRepository:
 def get_report_service(query_adapter: QueryAdapter = Depends(get_query_adapter)) -> ReportService:
     report_repository = get_report_repository()
     return ReportService(report_repository, query_adapter)
+
+
+def get_stored_report_service() -> ReportService:
+    # Stored reports carry their own credentials, so no connection is taken from the request.
+    query_adapter = QueryAdapter(QueryService(db_manager=None))
+    return ReportService(get_report_repository(), query_adapter)
+
+
+# Jobs outlive the request that submitted them, so every request shares one service and worker pool.
+job_service = JobService(JobRepository())
+register_runners(job_service)
+
+
+def get_job_service() -> JobService:
+    return job_service
@@ -13,6 +13,7 @@ from src.modules.alerts.models.models import Alert, AlertCreate, AlertPatch
 from src.modules.alerts.repositories.repository import AlertRepository
 from src.modules.alerts.utils.email_sender import EmailSender
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.utils.Bulkhead import Bulkhead, run_blocking
 
 api_url = Settings().API_URL
 
@@ -90,7 +91,11 @@ class AlertService:
                         schema_name=alert.credentials[0]["schema_name"],
                     )
 
-                    query_result = self.query_adapter.execute_query(alert.sql_query, db_connection)
+                    # Alerts must see current data, so they bypass the query result cache. The sweep shares
+                    # the alerts bulkhead with the API, waiting for a slot instead of being rejected.
+                    async with Bulkhead.get("alerts").hold(f"user:{alert.user}", bounded=False):
+                        query_result = await run_blocking(
+                            self.query_adapter.execute_query, alert.sql_query, db_connection, use_cache=False)
 
                     if query_result:
                         await self.email_sender.send_email(alert.notification_emails, alert.prompt)
@@ -1,8 +1,12 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from src.config.dependencies import get_job_service
 from src.modules.alerts.utils.cron_job import CronJob
+from src.modules.reports.utils.chart_pool import ChartPool
+from src.modules.reports.utils.refresh_job import ReportRefreshJob
 
 
 @asynccontextmanager
@@ -11,6 +15,19 @@ async def lifespan(app: FastAPI):
     app.state.cron_job = cron_job
     cron_job.start()
 
+    report_refresh_job = ReportRefreshJob()
+    app.state.report_refresh_job = report_refresh_job
+    report_refresh_job.start()
+
+    try:
+        await get_job_service().recover()
+    except Exception as e:
+        print(f"Error recovering jobs: {str(e)}")
+    job_watch = asyncio.create_task(get_job_service().watch())
+
     yield
 
+    job_watch.cancel()
     cron_job.scheduler.shutdown()
+    report_refresh_job.scheduler.shutdown()
+    ChartPool.shutdown()
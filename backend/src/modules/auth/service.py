@@ -4,7 +4,7 @@ from bson import ObjectId
 
 from src.modules.auth.models.models import User, UserCreate, UserPatch
 from src.modules.auth.repositories.repository import UserRepository
-from src.modules.auth.utils.util import create_tokens, hash_password, verify_password
+from src.modules.auth.utils.util import create_tokens, hash_password, run_in_password_pool, verify_password
 
 
 class UserService:
@@ -12,7 +12,7 @@ class UserService:
         self.repository = UserRepository()
 
     async def create_user(self, user_data: UserCreate) -> User:
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await run_in_password_pool(hash_password, user_data.password)
         user_data.password = hashed_password
         return await self.repository.create_user(user_data)
 
@@ -28,7 +28,7 @@ class UserService:
     async def login(self, email: str, password: str) -> Optional[User]:
         user = await self.repository.collection.find_one({"email": email})
 
-        if user and verify_password(password, user["password"]):
+        if user and await run_in_password_pool(verify_password, password, user["password"]):
             access_token, refresh_token = create_tokens(
                 data={
                     "sub": user["email"]
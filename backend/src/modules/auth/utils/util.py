@@ -1,5 +1,9 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import Any, Callable, Optional, Tuple, TypeVar
 
 import jwt
 from fastapi import HTTPException, Security
@@ -8,10 +12,19 @@ from jwt import PyJWTError
 from passlib.context import CryptContext
 
 from src.config.constants import Settings
+from src.utils.TTLCache import TTLCache
+
+T = TypeVar("T")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# bcrypt releases the GIL while hashing, so its own few threads keep a burst of logins from
+# pinning the event loop or taking the threads of other requests.
+_password_pool = ThreadPoolExecutor(max_workers=Settings.AUTH_PASSWORD_WORKERS, thread_name_prefix="password")
+# Verified claims by token hash, so a token is not decoded again on every request.
+_token_cache = TTLCache(max_entries=Settings.AUTH_TOKEN_CACHE_SIZE, ttl_seconds=Settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -21,6 +34,11 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def run_in_password_pool(func: Callable[..., T], *args: Any) -> T:
+    """Runs `hash_password` or `verify_password` on the bounded password threads."""
+    return await asyncio.get_running_loop().run_in_executor(_password_pool, func, *args)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=Settings.ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -28,12 +46,29 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return jwt.encode(to_encode, Settings.SECRET_KEY, algorithm=Settings.ALGORITHM)
 
 
+def _decode(token: str) -> dict:
+    """
+    Verified claims of `token`. They are cached by the token's hash for at most
+    AUTH_TOKEN_CACHE_TTL_SECONDS and never past the token's expiry; invalid tokens are not cached.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = _token_cache.get(key)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, Settings.SECRET_KEY, algorithms=[Settings.ALGORITHM])
+        except PyJWTError:
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+        ttl = _token_cache.ttl_seconds
+        if isinstance(payload.get("exp"), (int, float)):
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            _token_cache.set(key, payload, ttl)
+    # A copy, so no caller can change the claims another one sees.
+    return dict(payload)
+
+
 def decode_access_token(token: str):
-    try:
-        payload = jwt.decode(token, Settings.SECRET_KEY, algorithms=[Settings.ALGORITHM])
-        return payload
-    except PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return _decode(token)
 
 
 def get_current_user(token: str = Security(oauth2_scheme)):
@@ -56,13 +91,10 @@ def create_tokens(data: dict) -> Tuple[str, str]:
 
 
 def decode_token(token: str, token_type: str = "access"):
-    try:
-        payload = jwt.decode(token, Settings.SECRET_KEY, algorithms=[Settings.ALGORITHM])
-        if payload.get("type") != token_type:
-            raise HTTPException(status_code=401, detail=f"Invalid token type, expected {token_type}")
-        return payload
-    except PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    payload = _decode(token)
+    if payload.get("type") != token_type:
+        raise HTTPException(status_code=401, detail=f"Invalid token type, expected {token_type}")
+    return payload
 
 
 def refresh_access_token(refresh_token: str) -> str:
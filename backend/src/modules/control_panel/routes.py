@@ -1,3 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, status
+
+from src.utils.LLMGateway import LLMGateway
+from src.utils.ResponseManager import ResponseManager
 
 router = APIRouter()
+
+
+@router.get("/llm_metrics/")
+async def get_llm_metrics():
+    """
+    Per `provider:model` counters of the LLM gateway in this worker: requests, failures, retries,
+    rate-limited responses and failovers, queue time, output tokens per second and the current
+    concurrency limit.
+    """
+    return ResponseManager.success_response(
+        data={"models": LLMGateway.metrics()},
+        message="Success",
+        status_code=status.HTTP_200_OK,
+    )
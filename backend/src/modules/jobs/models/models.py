@@ -0,0 +1,61 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    INTERRUPTED = "interrupted"
+
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.INTERRUPTED}
+
+
+class JobCreate(BaseModel):
+    """
+    Data model for submitting a new job.
+
+    `params` holds everything the job's runner needs, so a queued job can be started again after a
+    restart without the original request. `owner` is the worker process running the job, which
+    refreshes `heartbeat_at` while it is alive.
+    """
+    model_config = ConfigDict(use_enum_values=True)
+
+    job_type: str
+    params: Dict[str, Any]
+    user_id: Optional[str] = None
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    message: str = ""
+    owner: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Job(JobCreate):
+    """
+    Data model for an existing job, including its outcome once it has finished.
+    """
+    id: str
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+
+class JobPatch(BaseModel):
+    """
+    Data model for partially updating a job's status, progress or outcome.
+    """
+    model_config = ConfigDict(use_enum_values=True)
+
+    status: Optional[JobStatus] = None
+    progress: Optional[float] = None
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
@@ -0,0 +1,104 @@
+from datetime import datetime
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from src.config.database import database
+from src.modules.jobs.models.models import Job, JobCreate, JobPatch, JobStatus
+
+
+class JobRepository:
+    def __init__(self):
+        self.collection = database["Jobs"]
+
+    async def create_job(self, job_data: JobCreate) -> Job:
+        job_dict = job_data.model_dump()
+        result = await self.collection.insert_one(job_dict)
+        job_dict["id"] = str(result.inserted_id)
+        return Job(**job_dict)
+
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        try:
+            job = await self.collection.find_one({"_id": ObjectId(job_id)})
+            if job:
+                job["id"] = str(job["_id"])
+                del job["_id"]
+                return Job(**job)
+            return None
+        except Exception:
+            return None
+
+    async def update_job(self, job_id: str, job_data: JobPatch) -> None:
+        update_data = {k: v for k, v in job_data.model_dump().items() if v is not None}
+        update_data["updated_at"] = datetime.utcnow()
+        try:
+            await self.collection.update_one({"_id": ObjectId(job_id)}, {"$set": update_data})
+        except Exception as e:
+            print(f"Error updating job {job_id}: {e}")
+
+    async def update_job_unless_cancelled(self, job_id: str, job_data: JobPatch) -> None:
+        """Like update_job, but leaves a job that was cancelled meanwhile, possibly by another process, as it is."""
+        update_data = {k: v for k, v in job_data.model_dump().items() if v is not None}
+        update_data["updated_at"] = datetime.utcnow()
+        try:
+            await self.collection.update_one(
+                {"_id": ObjectId(job_id), "status": {"$ne": JobStatus.CANCELLED.value}}, {"$set": update_data})
+        except Exception as e:
+            print(f"Error updating job {job_id}: {e}")
+
+    async def cancelled_job_ids(self, job_ids: List[str]) -> List[str]:
+        """The jobs among `job_ids` whose stored status is cancelled."""
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(job_id) for job_id in job_ids]}, "status": JobStatus.CANCELLED.value}, {"_id": 1})
+        return [str(job["_id"]) async for job in cursor]
+
+    async def claim_job(self, owner: str, job_types: List[str], stale_before: datetime) -> Optional[Job]:
+        """
+        Atomically takes the oldest queued job whose owner stopped sending heartbeats, marking it
+        running for `owner`. Two workers recovering at once can never both get the same job.
+        """
+        now = datetime.utcnow()
+        job = await self.collection.find_one_and_update(
+            {
+                "status": JobStatus.QUEUED.value,
+                "job_type": {"$in": job_types},
+                "$or": [{"heartbeat_at": None}, {"heartbeat_at": {"$lt": stale_before}}],
+            },
+            {"$set": {"status": JobStatus.RUNNING.value, "owner": owner, "heartbeat_at": now, "updated_at": now}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            return None
+        job["id"] = str(job["_id"])
+        del job["_id"]
+        return Job(**job)
+
+    async def touch_jobs(self, owner: str) -> None:
+        """Refreshes the heartbeat of the unfinished jobs of `owner`."""
+        try:
+            await self.collection.update_many(
+                {"owner": owner, "status": {"$in": [JobStatus.QUEUED.value, JobStatus.RUNNING.value]}},
+                {"$set": {"heartbeat_at": datetime.utcnow()}}
+            )
+        except Exception as e:
+            print(f"Error refreshing jobs of {owner}: {e}")
+
+    async def mark_interrupted(self, stale_before: datetime) -> int:
+        """
+        Jobs left running by a worker that stopped sending heartbeats cannot be resumed safely, so
+        they are closed as interrupted. Jobs of live workers are left alone.
+        """
+        result = await self.collection.update_many(
+            {
+                "status": JobStatus.RUNNING.value,
+                "$or": [{"heartbeat_at": None}, {"heartbeat_at": {"$lt": stale_before}}],
+            },
+            {"$set": {
+                "status": JobStatus.INTERRUPTED.value,
+                "error": "The worker running the job stopped",
+                "updated_at": datetime.utcnow(),
+            }}
+        )
+        return result.modified_count
@@ -0,0 +1,153 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Body, Depends, Header, status
+
+from src.config.dependencies import get_job_service
+from src.modules.jobs.models.models import FINISHED_STATUSES, Job, JobStatus
+from src.modules.jobs.service import JobService
+from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.reports.schemas.GraphRequest import GraphRequest
+from src.utils.Bulkhead import BulkheadFullError
+from src.utils.ResponseErrorModel import ResponseError
+from src.utils.ResponseManager import ResponseManager
+
+router = APIRouter()
+
+
+def job_status(job: Job) -> dict:
+    # Parameters carry credentials and results can be large, so status responses leave both out,
+    # along with the internal ownership fields.
+    return job.model_dump(exclude={"params", "result", "owner", "heartbeat_at"})
+
+
+@router.post("/synthetic-data", tags=["jobs"], responses={202: {"model": Job, "description": "Job queued"}, 429: {"model": ResponseError, "description": "Too many unfinished jobs"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def submit_synthetic_data_job(
+    connection: DatabaseConnection,
+    iterations: int = Body(..., embed=True),
+    strategy: Literal["llm", "local"] = Body("llm", embed=True),
+    use_llm_vocabulary: bool = Body(False, embed=True),
+    user_id: Optional[str] = Body(None, embed=True),
+    service: JobService = Depends(get_job_service)
+):
+    """
+    Queues synthetic data generation as a background job.
+
+    Args:
+        connection (DatabaseConnection): The database to fill.
+        iterations (int): Rows per table with the "local" strategy; with "llm", `iterations // 40` model batches.
+        strategy (str): "llm" or "local", as in `/api/text-to-sql/generate_synthetic_data`.
+        use_llm_vocabulary (bool): With the "local" strategy, ask the model once for realistic text values.
+        user_id (Optional[str]): The user submitting the job.
+
+    Returns:
+        Job: The queued job, whose status can be polled at `/api/jobs/{job_id}`.
+    """
+    try:
+        params = {
+            "connection": connection.model_dump(),
+            "iterations": iterations,
+            "strategy": strategy,
+            "use_llm_vocabulary": use_llm_vocabulary,
+        }
+        job = await service.submit("synthetic_data", params, user_id)
+        return ResponseManager.success_response(job_status(job), status_code=status.HTTP_202_ACCEPTED)
+    except BulkheadFullError:
+        raise
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.post("/reports", tags=["jobs"], responses={202: {"model": Job, "description": "Job queued"}, 429: {"model": ResponseError, "description": "Too many unfinished jobs"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def submit_report_job(
+    connection: DatabaseConnection,
+    graph_requests: List[GraphRequest] = Body(..., embed=True),
+    user_id: Optional[str] = Body(None, embed=True),
+    lang: str = Header(None),
+    service: JobService = Depends(get_job_service)
+):
+    """
+    Queues the charts of `/api/reports/generate-charts` as a background job.
+
+    Args:
+        connection (DatabaseConnection): The database to chart.
+        graph_requests (List[GraphRequest]): The tables and columns to chart.
+        user_id (Optional[str]): The user submitting the job.
+
+    Returns:
+        Job: The queued job, whose charts are served by `/api/jobs/{job_id}/result` once it succeeds.
+    """
+    try:
+        params = {
+            "connection": connection.model_dump(),
+            "graph_requests": [request.model_dump() for request in graph_requests],
+            "lang": lang,
+        }
+        job = await service.submit("report", params, user_id)
+        return ResponseManager.success_response(job_status(job), status_code=status.HTTP_202_ACCEPTED)
+    except BulkheadFullError:
+        raise
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.get("/{job_id}", tags=["jobs"], responses={200: {"model": Job, "description": "Job retrieved successfully"}, 404: {"model": ResponseError, "description": "Job not found"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def get_job(job_id: str, service: JobService = Depends(get_job_service)):
+    """
+    Retrieves the status and progress of a job.
+
+    Args:
+        job_id (str): The ID of the job.
+
+    Returns:
+        Job: The job without its parameters and result.
+    """
+    try:
+        job = await service.get_job(job_id)
+        if job:
+            return ResponseManager.success_response(job_status(job), status_code=status.HTTP_200_OK)
+        return ResponseManager.error_response("Job not found", status_code=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.get("/{job_id}/result", tags=["jobs"], responses={404: {"model": ResponseError, "description": "Job not found"}, 409: {"model": ResponseError, "description": "Job has no result"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def get_job_result(job_id: str, service: JobService = Depends(get_job_service)):
+    """
+    Retrieves the result of a job that succeeded.
+
+    Args:
+        job_id (str): The ID of the job.
+
+    Returns:
+        dict: The job's result.
+    """
+    try:
+        job = await service.get_job(job_id)
+        if not job:
+            return ResponseManager.error_response("Job not found", status_code=status.HTTP_404_NOT_FOUND)
+        if job.status != JobStatus.SUCCEEDED:
+            message = (job.error or f"Job is {job.status}") if job.status in FINISHED_STATUSES else f"Job is still {job.status}"
+            return ResponseManager.error_response(message, status_code=status.HTTP_409_CONFLICT)
+        return ResponseManager.success_response({"result": job.result}, status_code=status.HTTP_200_OK)
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.post("/{job_id}/cancel", tags=["jobs"], responses={200: {"model": Job, "description": "Job cancelled"}, 404: {"model": ResponseError, "description": "Job not found"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def cancel_job(job_id: str, service: JobService = Depends(get_job_service)):
+    """
+    Cancels a queued or running job. Finished jobs are returned unchanged.
+
+    Args:
+        job_id (str): The ID of the job.
+
+    Returns:
+        Job: The job after cancellation.
+    """
+    try:
+        job = await service.cancel(job_id)
+        if job:
+            return ResponseManager.success_response(job_status(job), status_code=status.HTTP_200_OK)
+        return ResponseManager.error_response("Job not found", status_code=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from src.config.constants import Settings
+from src.modules.jobs.models.models import FINISHED_STATUSES, Job, JobCreate, JobPatch, JobStatus
+from src.modules.jobs.repositories.repository import JobRepository
+from src.utils.Bulkhead import Bulkhead, BulkheadFullError
+
+ProgressCallback = Callable[[float, str], None]
+JobRunner = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Any]]
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class ProgressReporter:
+    """
+    The `on_progress(fraction, message)` callback handed to a job's runner.
+
+    It can be called from the event loop or from a worker thread. Writes are throttled to one per
+    `interval` seconds and always run on the event loop, in call order. Once the job is cancelled
+    the next call raises JobCancelledError, which is how work running in a thread is stopped.
+    """
+
+    def __init__(self, job_id: str, job_repository: JobRepository, loop: asyncio.AbstractEventLoop, interval: float):
+        self.job_id = job_id
+        self.job_repository = job_repository
+        self.loop = loop
+        self.interval = interval
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.last_write = 0.0
+        self.pending: Set[asyncio.Task] = set()
+
+    def __call__(self, progress: float, message: str = "") -> None:
+        if self.cancelled.is_set():
+            raise JobCancelledError(f"Job {self.job_id} was cancelled")
+
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_write < self.interval:
+                return
+            self.last_write = now
+        patch = JobPatch(progress=round(min(max(progress, 0.0), 1.0), 4), message=message)
+        self.loop.call_soon_threadsafe(self._write, patch)
+
+    def _write(self, patch: JobPatch) -> None:
+        if self.closed:
+            return
+        task = self.loop.create_task(self.job_repository.update_job(self.job_id, patch))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def close(self) -> None:
+        """Waits for the progress writes already made, so they cannot land after the final status."""
+        await asyncio.sleep(0)
+        self.closed = True
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+
+class JobService:
+    """
+    Runs long operations in the background of the API process.
+
+    Every job is a document in the Jobs collection holding its type, parameters, status, progress
+    and outcome, so any process can report on it. Runners are registered per job type and are
+    awaited by an in-process pool of at most `max_workers` concurrent jobs, shared fairly between
+    users through a bulkhead; a user with too many unfinished jobs gets BulkheadFullError on
+    submit. Every job records the worker process that owns it, and `watch` keeps the heartbeat of
+    this worker's jobs fresh and stops the ones another process cancelled. Parameters are stored
+    in full, so `recover` can claim the queued jobs of workers that stopped; jobs they left running
+    are marked interrupted instead of being run twice. Jobs of live workers are never touched.
+    """
+
+    def __init__(self, job_repository: JobRepository, max_workers: Optional[int] = None, progress_interval: Optional[float] = None):
+        self.job_repository = job_repository
+        self.max_workers = max_workers or Settings.JOBS_MAX_WORKERS
+        self.progress_interval = Settings.JOBS_PROGRESS_INTERVAL_SECONDS if progress_interval is None else progress_interval
+        self.runners: Dict[str, JobRunner] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.reporters: Dict[str, ProgressReporter] = {}
+        self.bulkhead = Bulkhead("jobs", self.max_workers, Settings.BULKHEAD_BULK_QUEUE, Settings.BULKHEAD_TENANT_SHARE)
+        self.jobs_per_user: Dict[str, int] = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def register(self, job_type: str, runner: JobRunner) -> None:
+        self.runners[job_type] = runner
+
+    async def submit(self, job_type: str, params: Dict[str, Any], user_id: Optional[str] = None) -> Job:
+        if job_type not in self.runners:
+            raise ValueError(f"Unknown job type: {job_type}")
+        if self.jobs_per_user.get(self.tenant(user_id), 0) >= self.bulkhead.tenant_concurrency + self.bulkhead.tenant_queue:
+            raise BulkheadFullError(self.bulkhead.name, self.bulkhead.retry_after())
+
+        job = await self.job_repository.create_job(JobCreate(
+            job_type=job_type, params=jsonable_encoder(params), user_id=user_id, owner=self.owner, heartbeat_at=datetime.utcnow()))
+        self.start(job)
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        return await self.job_repository.get_job(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        job = await self.job_repository.get_job(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+
+        # A job owned by another process is stopped by that process's `watch`.
+        self.stop(job_id)
+        await self.job_repository.update_job(job_id, JobPatch(status=JobStatus.CANCELLED, message="Cancelled"))
+        return await self.job_repository.get_job(job_id)
+
+    def stop(self, job_id: str) -> None:
+        reporter = self.reporters.get(job_id)
+        if reporter:
+            reporter.cancelled.set()
+        task = self.tasks.get(job_id)
+        if task:
+            task.cancel()
+
+    async def stop_cancelled(self) -> None:
+        """Stops the jobs running here whose stored status was set to cancelled, e.g. through another process."""
+        if self.tasks:
+            for job_id in await self.job_repository.cancelled_job_ids(list(self.tasks)):
+                self.stop(job_id)
+
+    async def recover(self) -> int:
+        """Closes the jobs that stopped workers left running and claims the ones they left queued."""
+        stale_before = datetime.utcnow() - timedelta(seconds=Settings.JOBS_HEARTBEAT_TIMEOUT_SECONDS)
+        interrupted = await self.job_repository.mark_interrupted(stale_before)
+        while job := await self.job_repository.claim_job(self.owner, list(self.runners), stale_before):
+            self.start(job)
+        return interrupted
+
+    async def watch(self) -> None:
+        """
+        Sends this worker's heartbeat, stops its jobs cancelled elsewhere and recovers the jobs of
+        stopped workers, until cancelled.
+        """
+        while True:
+            await asyncio.sleep(Settings.JOBS_HEARTBEAT_INTERVAL_SECONDS)
+            try:
+                await self.job_repository.touch_jobs(self.owner)
+                await self.stop_cancelled()
+                await self.recover()
+            except Exception as e:
+                print(f"Error watching jobs: {str(e)}")
+
+    @staticmethod
+    def tenant(user_id: Optional[str]) -> str:
+        return f"user:{user_id}" if user_id else "anonymous"
+
+    def start(self, job: Job) -> None:
+        tenant = self.tenant(job.user_id)
+        self.jobs_per_user[tenant] = self.jobs_per_user.get(tenant, 0) + 1
+        task = asyncio.create_task(self.run(job))
+        self.tasks[job.id] = task
+        task.add_done_callback(lambda _: self.finish(job, tenant))
+
+    def finish(self, job: Job, tenant: str) -> None:
+        self.tasks.pop(job.id, None)
+        self.jobs_per_user[tenant] -= 1
+        if not self.jobs_per_user[tenant]:
+            del self.jobs_per_user[tenant]
+
+    async def run(self, job: Job) -> None:
+        reporter = ProgressReporter(job.id, self.job_repository, asyncio.get_running_loop(), self.progress_interval)
+        self.reporters[job.id] = reporter
+        try:
+            async with self.bulkhead.hold(self.tenant(job.user_id), bounded=False):
+                stored = await self.job_repository.get_job(job.id)
+                if stored and stored.status == JobStatus.CANCELLED:
+                    return
+                await self.job_repository.update_job_unless_cancelled(job.id, JobPatch(status=JobStatus.RUNNING, message="Running"))
+                result = await self.runners[job.job_type](job.params, reporter)
+            await reporter.close()
+            # A cancellation from another process may land after the work ends; it is not overwritten.
+            await self.job_repository.update_job_unless_cancelled(
+                job.id, JobPatch(status=JobStatus.SUCCEEDED, progress=1.0, message="Done", result=jsonable_encoder(result)))
+        except (JobCancelledError, asyncio.CancelledError):
+            if not reporter.cancelled.is_set():
+                # The worker is shutting down: the job is left running, and another worker marks it
+                # interrupted once its heartbeat is stale.
+                raise
+            await reporter.close()
+            await self.job_repository.update_job(job.id, JobPatch(status=JobStatus.CANCELLED, message="Cancelled"))
+        except Exception as e:
+            await reporter.close()
+            await self.job_repository.update_job_unless_cancelled(job.id, JobPatch(status=JobStatus.FAILED, message="Failed", error=str(e)))
+        finally:
+            self.reporters.pop(job.id, None)
@@ -0,0 +1,36 @@
+from typing import Any, Dict
+
+from src.adapters.queries.QueryAdapter import QueryAdapter
+from src.modules.jobs.service import JobService, ProgressCallback
+from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.queries.service import QueryService
+from src.modules.reports.repositories.repository import ReportRepository
+from src.modules.reports.schemas.GraphRequest import GraphRequest
+from src.modules.reports.service import ReportService
+from src.modules.text_to_sql.service import SyntheticDataModelService
+from src.modules.text_to_sql.utils.APIClientLLMClient import APIClientLLMClient
+
+
+async def run_synthetic_data(params: Dict[str, Any], on_progress: ProgressCallback) -> Any:
+    connection = DatabaseConnection(**params["connection"])
+    service = SyntheticDataModelService(QueryAdapter(QueryService(db_manager=None)), APIClientLLMClient())
+
+    if params.get("strategy") == "local":
+        return await service.generate_local_data(params["iterations"], connection, params.get("use_llm_vocabulary", False), on_progress)
+
+    result = await service.generate_synthetic_data(params["iterations"], connection, on_progress)
+    if isinstance(result, dict) and "error" in result:
+        raise RuntimeError(result["error"])
+    return result
+
+
+async def run_report(params: Dict[str, Any], on_progress: ProgressCallback) -> Any:
+    connection = DatabaseConnection(**params["connection"])
+    graph_requests = [GraphRequest(**request) for request in params["graph_requests"]]
+    service = ReportService(ReportRepository(), QueryAdapter(QueryService(db_manager=None)))
+    return await service.create_graph(connection, graph_requests, params.get("lang") or "en", on_progress)
+
+
+def register_runners(job_service: JobService) -> None:
+    job_service.register("synthetic_data", run_synthetic_data)
+    job_service.register("report", run_report)
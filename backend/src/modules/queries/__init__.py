@@ -1,7 +1,11 @@
 from src.modules.queries.utils.DatabaseManagerFactory import DatabaseManagerFactory
 from src.modules.queries.utils.DatabaseType import DatabaseType
+from src.modules.queries.utils.DuckDBManager import DuckDBManager
 from src.modules.queries.utils.MySQLManager import MySQLManager
 from src.modules.queries.utils.PostgreSQLManager import PostgreSQLManager
+from src.modules.queries.utils.SQLiteManager import SQLiteManager
 
 DatabaseManagerFactory.register(DatabaseType.POSTGRESQL, PostgreSQLManager)
 DatabaseManagerFactory.register(DatabaseType.MYSQL, MySQLManager)
+DatabaseManagerFactory.register(DatabaseType.SQLITE, SQLiteManager)
+DatabaseManagerFactory.register(DatabaseType.DUCKDB, DuckDBManager)
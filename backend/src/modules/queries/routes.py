@@ -1,12 +1,17 @@
 import urllib.parse
 
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import StreamingResponse
 
-from src.config.dependencies import get_query_service
+from src.config.dependencies import get_fan_out_executor, get_query_service
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
 from src.modules.queries.schemas.ExecutionQueryRequest import ExecutionQueryRequest
+from src.modules.queries.schemas.FanOutRequest import FanOutRequest
 from src.modules.queries.service import QueryService
+from src.modules.queries.utils.FanOutExecutor import FanOutExecutor
+from src.utils.Bulkhead import run_blocking
 from src.utils.ResponseManager import ResponseManager
+from src.utils.Streaming import to_sse
 
 router = APIRouter()
 
@@ -17,7 +22,7 @@ async def get_db_structure(
     query_service: QueryService = Depends(get_query_service)
 ):
     try:
-        db_structure = query_service.get_db_structure(connection.schema_name)
+        db_structure = await run_blocking(query_service.get_db_structure, connection.schema_name)
         return ResponseManager.success_response(
             data={"db_structure": db_structure},
             message="Success",
@@ -37,7 +42,7 @@ async def execute_query(
 ):
     try:
         query = urllib.parse.unquote(request.query)
-        results = query_service.execute_query(query, request.connection.schema_name)
+        results = await run_blocking(query_service.execute_query, query, request.connection.schema_name)
         return ResponseManager.success_response(
             data={"results": results},
             message="Success",
@@ -49,3 +54,28 @@ async def execute_query(
             status_code=status.HTTP_400_BAD_REQUEST,
             details={"error": str(e)},
         )
+
+
+@router.post("/fan_out_query/")
+async def fan_out_query(
+    request: FanOutRequest, executor: FanOutExecutor = Depends(get_fan_out_executor)
+):
+    """
+    Runs one read-only `query` on every connection of the request and streams the merged rows as
+    Server-Sent Events ("rows", "error" per failed target, then "done"); see FanOutExecutor.
+    """
+    async def events():
+        try:
+            if not request.query:
+                raise ValueError("query is required")
+            async for event, data in executor.stream(
+                    urllib.parse.unquote(request.query), request.connections, request.merge, request.group_by, request.aggregations):
+                yield to_sse(event, data)
+        except Exception as e:
+            yield to_sse("error", {"error": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,15 +1,19 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
+from src.modules.queries.schemas.DatabaseReplica import DatabaseReplica
 from src.modules.queries.utils.DatabaseType import DatabaseType
 
 
 class DatabaseConnection(BaseModel):
     db_type: DatabaseType
-    username: str
-    password: str
-    host: str
-    port: int
+    # Server credentials; file-backed databases (SQLite, DuckDB) only use database_name, the file path.
+    username: Optional[str] = None
+    password: Optional[str] = None
+    host: Optional[str] = None
+    port: Optional[int] = None
     database_name: str
     schema_name: Optional[str] = None
+    # Read-only statements are spread over these; writes always go to the primary above.
+    replicas: List[DatabaseReplica] = []
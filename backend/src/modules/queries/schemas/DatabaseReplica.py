@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class DatabaseReplica(BaseModel):
+    host: str
+    # Unset fields are taken from the primary connection.
+    port: Optional[int] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
@@ -0,0 +1,15 @@
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+
+
+class FanOutRequest(BaseModel):
+    query: Optional[str] = None
+    user_input: Optional[str] = None
+    connections: List[DatabaseConnection] = Field(..., min_length=1)
+    merge: Literal["union", "union_with_source", "aggregate"] = "union"
+    group_by: List[str] = []
+    aggregations: Dict[str, Literal["sum", "count", "min", "max"]] = {}
+    timeout_seconds: Optional[float] = None
@@ -1,17 +1,112 @@
-from typing import Any, Dict, List, Optional
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.engine import URL
 
 from src.modules.queries.utils.IDatabaseManager import IDatabaseManager
-from src.modules.queries.utils.SQLUtils import SQLUtils
+from src.modules.queries.utils.QueryResultCache import QueryResultCache
+from src.modules.queries.utils.SQLUtils import SQLGLOT_DIALECTS, SQLUtils
+from src.utils.SingleFlight import SingleFlight
 
 
 class QueryService:
+    # Concurrent identical schema fetches and reads of one database run once and share the result.
+    _schema_flights = SingleFlight()
+    _query_flights = SingleFlight()
+
     def __init__(self, db_manager: IDatabaseManager):
         self.db_manager = db_manager
 
     def get_db_structure(self, schema_name: Optional[str] = None) -> Dict[str, Any]:
         print("get_db_structure called")
-        return self.db_manager.get_db_structure(schema_name)
+        cache_target = self._cache_target()
+        if cache_target is None:
+            return self.db_manager.get_db_structure(schema_name)
+        return self._schema_flights.do((cache_target[0], schema_name), lambda: self.db_manager.get_db_structure(schema_name))
+
+    def execute_query(self, query: str, schema_name: Optional[str] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+        query = SQLUtils.clean_sql_query(query)
+
+        cache_target = self._cache_target()
+        if cache_target is None:
+            return self.db_manager.execute_query(query, schema_name)
+
+        fingerprint, dialect = cache_target
+        if not SQLUtils.is_read_only(query, dialect):
+            try:
+                return self.db_manager.execute_query(query, schema_name)
+            finally:
+                # Statements whose tables cannot be told apart invalidate the whole database.
+                tables = SQLUtils.extract_tables(query, dialect)
+                if QueryResultCache.enabled():
+                    QueryResultCache.invalidate(fingerprint, frozenset(tables) if tables else None)
+                # Reads already running may predate the write, so later ones do not join them.
+                self._query_flights.forget(lambda key: key[0] == fingerprint)
+
+        if not SQLUtils.is_cacheable(query, dialect):
+            return self.db_manager.execute_query(query, schema_name)
+
+        cache_key = (fingerprint, schema_name, SQLUtils.normalize_sql(query, dialect))
+        if not use_cache:
+            return self._fetch(cache_key, query, schema_name, dialect)
 
-    def execute_query(self, query: str, schema_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        results = QueryResultCache.get(cache_key) if QueryResultCache.enabled() else None
+        if results is not None:
+            return results
+        return self._query_flights.do(cache_key, lambda: self._fetch(cache_key, query, schema_name, dialect))
+
+    def _fetch(self, cache_key: Tuple, query: str, schema_name: Optional[str], dialect: str) -> List[Dict[str, Any]]:
+        results = self.db_manager.execute_query(query, schema_name)
+        if QueryResultCache.enabled():
+            QueryResultCache.set(cache_key, results, frozenset(SQLUtils.extract_tables(query, dialect) or ()))
+        return results
+
+    def stream_query(
+        self, query: str, schema_name: Optional[str] = None, chunk_size: int = 500, timeout: Optional[float] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields the rows of a read-only query in chunks, without buffering the whole result.
+
+        Streamed results bypass the result cache; anything else goes through execute_query so
+        writes still invalidate it.
+        """
         query = SQLUtils.clean_sql_query(query)
-        return self.db_manager.execute_query(query, schema_name)
+        cache_target = self._cache_target()
+        if not SQLUtils.is_read_only(query, cache_target[1] if cache_target else None):
+            yield self.execute_query(query, schema_name)
+            return
+        yield from self.db_manager.stream_query(query, schema_name, chunk_size, timeout)
+
+    def bulk_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        schema_name: Optional[str] = None,
+        ignore_conflicts: bool = False,
+    ) -> int:
+        try:
+            return self.db_manager.bulk_insert(table_name, columns, rows, schema_name, ignore_conflicts)
+        finally:
+            cache_target = self._cache_target()
+            if cache_target:
+                QueryResultCache.invalidate(cache_target[0], frozenset({table_name.lower()}))
+                self._query_flights.forget(lambda key: key[0] == cache_target[0])
+
+    def explain(self, query: str, schema_name: Optional[str] = None) -> Dict[str, float]:
+        return self.db_manager.explain(SQLUtils.clean_sql_query(query), schema_name)
+
+    def _cache_target(self) -> Optional[Tuple[str, str]]:
+        """Credential fingerprint and sqlglot dialect of the managed database, or None if it cannot be cached."""
+        get_engine = getattr(self.db_manager, "get_engine", None)
+        engine = get_engine() if get_engine else None
+        url = getattr(engine, "url", None)
+        if not isinstance(url, URL):
+            return None
+
+        dialect = SQLGLOT_DIALECTS.get(url.get_backend_name())
+        if dialect is None:
+            return None
+
+        fingerprint = hashlib.sha256(url.render_as_string(hide_password=False).encode()).hexdigest()
+        return fingerprint, dialect
@@ -1,12 +1,70 @@
 import hashlib
+import os
+import sqlite3
 from typing import Dict, Type
 from urllib.parse import quote_plus
 
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Engine, create_engine, event
 
+from src.config.constants import Settings
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
 from src.modules.queries.utils.DatabaseType import DatabaseType
 from src.modules.queries.utils.IDatabaseManager import IDatabaseManager
+from src.modules.queries.utils.ReplicaRouter import ReplicaRoutingManager
+from src.modules.queries.utils.SQLUtils import SQLGLOT_DIALECTS
+
+SERVER_ENGINE_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+    "pool_size": 5,
+    "max_overflow": 10,
+    "connect_args": {
+        "connect_timeout": 5
+    }
+}
+
+# File-backed databases need no pre-ping or recycling, and take their own connect arguments.
+ENGINE_OPTIONS = {
+    DatabaseType.POSTGRESQL: SERVER_ENGINE_OPTIONS,
+    DatabaseType.MYSQL: SERVER_ENGINE_OPTIONS,
+    DatabaseType.SQLITE: {"connect_args": {"timeout": 5, "check_same_thread": False}},
+    DatabaseType.DUCKDB: {},
+}
+
+
+def file_database_path(database_name: str) -> str:
+    """
+    The path of a SQLite or DuckDB file, which must lie inside FILE_DATABASE_DIR.
+
+    Relative names are resolved against that directory; anything that resolves outside it,
+    through `..` or symlinks, is rejected, since the name comes from the client.
+    """
+    directory = os.path.realpath(Settings.FILE_DATABASE_DIR)
+    path = os.path.realpath(os.path.join(directory, database_name))
+    if os.path.commonpath([directory, path]) != directory:
+        raise ValueError(f"Database files must be inside {Settings.FILE_DATABASE_DIR}")
+    return path
+
+
+def restrict_sqlite(dbapi_connection: sqlite3.Connection, _) -> None:
+    # No ATTACH, so a query cannot open or create files outside FILE_DATABASE_DIR.
+    dbapi_connection.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 0)
+
+
+def restrict_duckdb(dbapi_connection, _) -> None:
+    # read_csv, COPY, ATTACH and views over Parquet only reach files in FILE_DATABASE_DIR, and the
+    # configuration is locked so a query cannot SET it back. The settings belong to the database,
+    # which every connection to the same file shares, so they are applied once.
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT current_setting('lock_configuration')")
+        if not cursor.fetchone()[0]:
+            directory = os.path.realpath(Settings.FILE_DATABASE_DIR).replace("'", "''")
+            cursor.execute(f"SET allowed_directories = ['{directory}/']")
+            cursor.execute("SET enable_external_access = false")
+            cursor.execute("SET lock_configuration = true")
+    finally:
+        cursor.close()
 
 
 class DatabaseManagerFactory:
@@ -19,7 +77,12 @@ class DatabaseManagerFactory:
 
     @classmethod
     def _get_connection_string(cls, conn_info: DatabaseConnection) -> str:
-        password_encoded = quote_plus(conn_info.password)
+        if conn_info.db_type == DatabaseType.SQLITE:
+            return f"sqlite:///{file_database_path(conn_info.database_name)}"
+        elif conn_info.db_type == DatabaseType.DUCKDB:
+            return f"duckdb:///{file_database_path(conn_info.database_name)}"
+
+        password_encoded = quote_plus(conn_info.password or "")
 
         if conn_info.db_type == DatabaseType.POSTGRESQL:
             return f"postgresql://{conn_info.username}:{password_encoded}@{conn_info.host}:{conn_info.port}/{conn_info.database_name}"
@@ -30,28 +93,50 @@ class DatabaseManagerFactory:
 
     @classmethod
     def _get_cache_key(cls, conn_info: DatabaseConnection) -> str:
-        hash_input = f"{conn_info.db_type}:{conn_info.username}@{conn_info.host}:{conn_info.port}/{conn_info.database_name}"
+        database_name = conn_info.database_name
+        if conn_info.db_type in (DatabaseType.SQLITE, DatabaseType.DUCKDB):
+            # The same file can be named in several ways, and the same name can move with FILE_DATABASE_DIR.
+            database_name = file_database_path(database_name)
+        hash_input = f"{conn_info.db_type}:{conn_info.username}@{conn_info.host}:{conn_info.port}/{database_name}"
         return hashlib.sha256(hash_input.encode()).hexdigest()
 
+    @classmethod
+    def fingerprint(cls, conn_info: DatabaseConnection) -> str:
+        return cls._get_cache_key(conn_info)
+
     @classmethod
     def create_manager(cls, connection_info: DatabaseConnection) -> IDatabaseManager:
         if connection_info.db_type not in cls._managers:
             raise ValueError(f"Unsupported database type: {connection_info.db_type}")
 
+        manager = cls._create_single_manager(connection_info)
+        if not connection_info.replicas:
+            return manager
+
+        replicas = []
+        for replica in connection_info.replicas:
+            replica_info = connection_info.model_copy(update={
+                "host": replica.host,
+                "port": replica.port or connection_info.port,
+                "username": replica.username or connection_info.username,
+                "password": replica.password if replica.password is not None else connection_info.password,
+                "replicas": [],
+            })
+            replicas.append((cls._get_cache_key(replica_info), cls._create_single_manager(replica_info)))
+        return ReplicaRoutingManager(
+            manager, replicas, SQLGLOT_DIALECTS.get(connection_info.db_type.value), cls._get_cache_key(connection_info))
+
+    @classmethod
+    def _create_single_manager(cls, connection_info: DatabaseConnection) -> IDatabaseManager:
         conn_str = cls._get_connection_string(connection_info)
         cache_key = cls._get_cache_key(connection_info)
 
         if cache_key not in cls._engine_cache:
-            engine = create_engine(
-                conn_str,
-                pool_pre_ping=True,
-                pool_recycle=3600,
-                pool_size=5,
-                max_overflow=10,
-                connect_args={
-                    "connect_timeout": 5
-                }
-            )
+            engine = create_engine(conn_str, **ENGINE_OPTIONS.get(connection_info.db_type, SERVER_ENGINE_OPTIONS))
+            if connection_info.db_type == DatabaseType.SQLITE:
+                event.listen(engine, "connect", restrict_sqlite)
+            elif connection_info.db_type == DatabaseType.DUCKDB:
+                event.listen(engine, "connect", restrict_duckdb)
             cls._engine_cache[cache_key] = engine
 
         return cls._managers[connection_info.db_type](cls._engine_cache[cache_key])
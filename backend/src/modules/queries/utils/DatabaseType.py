@@ -5,5 +5,6 @@ class DatabaseType(str, Enum):
     POSTGRESQL = "postgresql"
     MYSQL = "mysql"
     SQLITE = "sqlite"
+    DUCKDB = "duckdb"
     ORACLE = "oracle"
     SQLSERVER = "sqlserver"
@@ -0,0 +1,193 @@
+import json
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from src.modules.queries.utils.IDatabaseManager import IDatabaseManager
+from src.modules.queries.utils.StatementTimeout import cancel_after
+from src.modules.queries.utils.SQLiteManager import sort_tables
+
+
+class DuckDBManager(IDatabaseManager):
+    """
+    Manager for DuckDB database files; `database_name` is the path of the file, within FILE_DATABASE_DIR.
+
+    The catalog comes from duckdb_columns() and duckdb_constraints() in two queries. Views are
+    listed like tables, so Parquet or CSV extracts in FILE_DATABASE_DIR can be exposed with
+    `CREATE VIEW sales AS SELECT * FROM '/srv/data/sales/*.parquet'` (with FILE_DATABASE_DIR
+    /srv/data) and queried like any other table; files outside that directory are not reachable.
+    """
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+
+    @contextmanager
+    def _get_connection(self) -> Iterator[Connection]:
+        conn = self._engine.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get_db_structure(self, schema_name: Optional[str] = None) -> Dict[str, Any]:
+        schema = schema_name or "main"
+        with self._get_connection() as conn:
+            columns = conn.execute(text(
+                "SELECT table_name, column_name, data_type, is_nullable FROM duckdb_columns() "
+                "WHERE database_name = current_database() AND schema_name = :schema "
+                "ORDER BY table_name, column_index"
+            ), {"schema": schema}).fetchall()
+            constraints = conn.execute(text(
+                "SELECT table_name, constraint_type, constraint_column_names, referenced_table, referenced_column_names "
+                "FROM duckdb_constraints() WHERE database_name = current_database() AND schema_name = :schema "
+                "AND constraint_type IN ('PRIMARY KEY', 'UNIQUE', 'FOREIGN KEY')"
+            ), {"schema": schema}).fetchall()
+
+        primary_keys = set()
+        unique = set()
+        foreign_keys: Dict[str, List[Dict[str, str]]] = {}
+        for table_name, constraint_type, column_names, referenced_table, referenced_columns in constraints:
+            if constraint_type == "PRIMARY KEY":
+                primary_keys.update((table_name, column) for column in column_names)
+            elif constraint_type == "UNIQUE":
+                if len(column_names) == 1:
+                    unique.add((table_name, column_names[0]))
+            else:
+                foreign_keys.setdefault(table_name, []).extend(
+                    {"column": column, "references": referenced_table, "referenced_column": referenced_column}
+                    for column, referenced_column in zip(column_names, referenced_columns)
+                )
+
+        db_structure = {}
+        for table_name, name, column_type, nullable in columns:
+            table = db_structure.setdefault(table_name, {"columns": [], "foreign_keys": foreign_keys.get(table_name, [])})
+            table["columns"].append({
+                "name": name,
+                "type": column_type,
+                "nullable": nullable,
+                "primary_key": (table_name, name) in primary_keys,
+                "unique": (table_name, name) in unique,
+            })
+        return sort_tables(db_structure)
+
+    def execute_query(self, query: str, schema_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._get_connection() as conn:
+            transaction = conn.begin()
+            try:
+                if schema_name:
+                    conn.execute(text(f"USE {schema_name}"))
+                result = conn.execute(text(query))
+                if result.returns_rows:
+                    columns = result.keys()
+                    rows = [dict(zip(columns, row)) for row in result.fetchall()]
+                    transaction.commit()
+                    return rows
+                transaction.commit()
+                return [{"message": "Query executed successfully"}]
+            except Exception as e:
+                transaction.rollback()
+                raise e
+
+    def stream_query(
+        self, query: str, schema_name: Optional[str] = None, chunk_size: int = 500, timeout: Optional[float] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the rows of a query in chunks of `chunk_size`, fetched from DuckDB's streaming result."""
+        with self._get_connection() as conn, cancel_after(conn, timeout):
+            transaction = conn.begin()
+            try:
+                if schema_name:
+                    conn.execute(text(f"USE {schema_name}"))
+                result = conn.execute(text(query))
+
+                if not result.returns_rows:
+                    transaction.commit()
+                    yield [{"message": "Query executed successfully"}]
+                    return
+
+                columns = list(result.keys())
+                for partition in result.partitions(chunk_size):
+                    yield [dict(zip(columns, row)) for row in partition]
+                transaction.commit()
+            except Exception as e:
+                transaction.rollback()
+                raise e
+
+    def bulk_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        schema_name: Optional[str] = None,
+        ignore_conflicts: bool = False,
+        batch_size: int = 100000,
+    ) -> int:
+        """
+        Loads rows a DataFrame at a time: each batch is registered with DuckDB and copied with one
+        INSERT ... SELECT, which DuckDB reads column by column instead of binding every value.
+        """
+        target = f"{schema_name}.{table_name}" if schema_name else table_name
+        column_list = ", ".join(columns)
+        statement = (
+            f"INSERT {'OR IGNORE ' if ignore_conflicts else ''}INTO {target} ({column_list}) "
+            f"SELECT {column_list} FROM bulk_stage"
+        )
+        rows = iter(rows)
+        inserted = 0
+
+        raw_connection = self._engine.raw_connection()
+        try:
+            connection = raw_connection.driver_connection
+            connection.begin()
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                connection.register("bulk_stage", pd.DataFrame.from_records(batch, columns=columns))
+                try:
+                    inserted += connection.execute(statement).fetchone()[0]
+                finally:
+                    connection.unregister("bulk_stage")
+            connection.commit()
+            return inserted
+        except Exception as e:
+            connection.rollback()
+            raise e
+        finally:
+            raw_connection.close()
+
+    def explain(self, query: str, schema_name: Optional[str] = None) -> Dict[str, float]:
+        """
+        Optimizer estimates of a query, from EXPLAIN without ANALYZE so nothing is executed.
+
+        DuckDB plans by cardinality alone, so the cost is the sum of the estimated rows of every
+        operator and the row estimate is that of the root.
+        """
+        with self._get_connection() as conn:
+            transaction = conn.begin()
+            try:
+                if schema_name:
+                    conn.execute(text(f"USE {schema_name}"))
+                plan = json.loads(conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).fetchone()[1])
+                cardinalities = list(self._cardinalities(plan))
+                return {"cost": float(sum(cardinalities)), "rows": float(cardinalities[0]) if cardinalities else 0.0}
+            finally:
+                transaction.rollback()
+
+    def _cardinalities(self, node: Any) -> Iterator[float]:
+        # Operators are visited root first, so the first estimate is the one of the query's output.
+        if isinstance(node, dict):
+            estimate = node.get("extra_info", {}).get("Estimated Cardinality")
+            if estimate is not None:
+                yield float(estimate)
+            for child in node.get("children", []):
+                yield from self._cardinalities(child)
+        elif isinstance(node, list):
+            for item in node:
+                yield from self._cardinalities(item)
+
+    def get_engine(self) -> Engine:
+        return self._engine
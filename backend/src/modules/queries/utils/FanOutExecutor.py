@@ -0,0 +1,173 @@
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from src.config.constants import Settings
+from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.queries.utils.SQLUtils import SQLGLOT_DIALECTS, SQLUtils
+from src.utils.Streaming import iterate_in_thread
+
+MERGE_MODES = ("union", "union_with_source", "aggregate")
+AGGREGATIONS = ("sum", "count", "min", "max")
+SOURCE_COLUMN = "_source"
+
+
+def source_name(connection: DatabaseConnection) -> str:
+    """A readable label for a target: host, database and schema."""
+    name = f"{connection.host}/{connection.database_name}" if connection.host else connection.database_name
+    return f"{name}.{connection.schema_name}" if connection.schema_name else name
+
+
+class RowAggregator:
+    """
+    Combines the partial results of every target into one row per `group_by` key.
+
+    Each entry of `aggregations` maps a result column to how its values across targets are
+    combined: sum, min and max of the values, or count of the rows. Shards should therefore return
+    partial aggregates that compose, e.g. COUNT(*) merged with sum. There is no avg, since an
+    average of averages is wrong whenever shards differ in size; merge SUM and COUNT instead and
+    divide them.
+    """
+
+    def __init__(self, group_by: List[str], aggregations: Dict[str, str]):
+        unsupported = set(aggregations.values()) - set(AGGREGATIONS)
+        if unsupported:
+            raise ValueError(f"Unsupported aggregations: {', '.join(sorted(unsupported))}")
+        self.group_by = group_by
+        self.aggregations = aggregations
+        self.groups: Dict[Tuple, Dict[str, Any]] = {}
+
+    def add(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            key = tuple(row.get(column) for column in self.group_by)
+            state = self.groups.get(key)
+            if state is None:
+                state = self.groups[key] = {column: [None, 0] for column in self.aggregations}
+            for column, function in self.aggregations.items():
+                value = row.get(column)
+                accumulated = state[column]
+                accumulated[1] += 1 if function == "count" or value is not None else 0
+                if value is None or function == "count":
+                    continue
+                if accumulated[0] is None:
+                    accumulated[0] = value
+                elif function == "sum":
+                    accumulated[0] += value
+                elif function == "min":
+                    accumulated[0] = min(accumulated[0], value)
+                elif function == "max":
+                    accumulated[0] = max(accumulated[0], value)
+
+    def result(self) -> List[Dict[str, Any]]:
+        rows = []
+        for key, state in self.groups.items():
+            row = dict(zip(self.group_by, key))
+            for column, function in self.aggregations.items():
+                value, count = state[column]
+                if function == "count":
+                    row[column] = count
+                else:
+                    row[column] = value
+            rows.append(row)
+        return rows
+
+
+class FanOutExecutor:
+    """
+    Runs one read-only query concurrently against several databases with the same schema, such as
+    per-region shards.
+
+    Every target streams its rows in chunks through a bounded queue, so chunks from different
+    targets are interleaved as they arrive and a slow target does not hold back the others. Each
+    target has its own timeout; a target that fails or times out is reported and the rest keep
+    going; a timed-out target's statement is cancelled on the database too, not just abandoned.
+    Events are `(event, data)` pairs:
+
+    - "rows": `{"source", "rows"}` per chunk ("union" and "union_with_source"), or the merged rows once at the end ("aggregate")
+    - "error": `{"source", "error"}` for every target that failed or timed out
+    - "done": `{"sources", "failed"}` once all targets finished
+    """
+
+    def __init__(self, query_adapter, timeout: Optional[float] = None, max_concurrency: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.query_adapter = query_adapter
+        self.timeout = timeout or Settings.FANOUT_TIMEOUT_SECONDS
+        self.max_concurrency = max_concurrency or Settings.FANOUT_MAX_CONCURRENCY
+        self.chunk_size = chunk_size or Settings.CHAT_STREAM_CHUNK_ROWS
+
+    async def stream(
+        self,
+        query: str,
+        connections: List[DatabaseConnection],
+        merge: str = "union",
+        group_by: Optional[List[str]] = None,
+        aggregations: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        if merge not in MERGE_MODES:
+            raise ValueError(f"Unsupported merge mode: {merge}")
+        if not connections:
+            raise ValueError("At least one connection is required")
+        query = SQLUtils.clean_sql_query(query)
+        if not SQLUtils.is_read_only(query, SQLGLOT_DIALECTS.get(connections[0].db_type.value)):
+            raise ValueError("Only read-only queries can run against several databases")
+        aggregator = RowAggregator(group_by or [], aggregations or {}) if merge == "aggregate" else None
+
+        sources = [source_name(connection) for connection in connections]
+        # Targets that share a label (e.g. the same database twice) are told apart by position.
+        sources = [source if sources.count(source) == 1 else f"{source}#{i}" for i, source in enumerate(sources)]
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * len(connections))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            asyncio.create_task(self.run_target(query, connection, source, queue, semaphore))
+            for connection, source in zip(connections, sources)
+        ]
+
+        failed = []
+        pending = len(tasks)
+        try:
+            while pending:
+                source, rows, error = await queue.get()
+                if rows is not None:
+                    if aggregator:
+                        aggregator.add(rows)
+                    else:
+                        if merge == "union_with_source":
+                            rows = [{**row, SOURCE_COLUMN: source} for row in rows]
+                        yield "rows", {"source": source, "rows": rows}
+                    continue
+
+                pending -= 1
+                if error is not None:
+                    failed.append(source)
+                    yield "error", {"source": source, "error": error}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if aggregator:
+            yield "rows", {"source": None, "rows": aggregator.result()}
+        yield "done", {"sources": sources, "failed": failed}
+
+    async def run_target(
+        self, query: str, connection: DatabaseConnection, source: str, queue: asyncio.Queue, semaphore: asyncio.Semaphore
+    ) -> None:
+        """Puts `(source, rows, None)` per chunk, then `(source, None, error)` once the target finished."""
+        error = None
+        try:
+            async with semaphore:
+                await asyncio.wait_for(self.produce(query, connection, source, queue), self.timeout)
+        except asyncio.TimeoutError:
+            error = f"Timed out after {self.timeout:g} seconds"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e)
+        await queue.put((source, None, error))
+
+    async def produce(self, query: str, connection: DatabaseConnection, source: str, queue: asyncio.Queue) -> None:
+        # The database cancels the statement at the same deadline, so the cursor step that wait_for
+        # abandons returns, and aclosing then releases the connection before the timeout is reported.
+        chunks = self.query_adapter.stream_query(query, connection, self.chunk_size, self.timeout)
+        async with aclosing(iterate_in_thread(iter(chunks))) as rows:
+            async for chunk in rows:
+                await queue.put((source, chunk, None))
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence
 
 from sqlalchemy.engine import Engine
 
@@ -14,5 +14,24 @@ class IDatabaseManager(Protocol):
     def execute_query(self, query: str, schema_name: Optional[str] = None) -> List[Dict[str, Any]]:
         ...
 
+    def stream_query(
+        self, query: str, schema_name: Optional[str] = None, chunk_size: int = 500, timeout: Optional[float] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Chunks of `chunk_size` rows; with `timeout`, the statement is cancelled that many seconds after it started."""
+        ...
+
+    def bulk_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        schema_name: Optional[str] = None,
+        ignore_conflicts: bool = False,
+    ) -> int:
+        ...
+
+    def explain(self, query: str, schema_name: Optional[str] = None) -> Dict[str, float]:
+        ...
+
     def get_engine(self) -> Engine:
         ...
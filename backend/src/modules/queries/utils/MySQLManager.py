@@ -1,10 +1,13 @@
+import json
 from contextlib import contextmanager
-from typing import Any, Dict, Iterator, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
-from sqlalchemy import MetaData, text
+from sqlalchemy import MetaData, UniqueConstraint, text
 from sqlalchemy.engine import Connection, Engine
 
 from src.modules.queries.utils.IDatabaseManager import IDatabaseManager
+from src.modules.queries.utils.StatementTimeout import cancel_after
 
 
 class MySQLManager(IDatabaseManager):
@@ -26,12 +29,19 @@ class MySQLManager(IDatabaseManager):
 
             db_structure = {}
             for table in metadata.sorted_tables:
+                # Single-column UNIQUE constraints, which may also be reflected as unique indexes.
+                unique_sets = [
+                    *(constraint.columns for constraint in table.constraints if isinstance(constraint, UniqueConstraint)),
+                    *(index.columns for index in table.indexes if index.unique),
+                ]
+                unique = {next(iter(columns)).name for columns in unique_sets if len(columns) == 1}
                 columns = [
                     {
                         "name": col.name,
                         "type": str(col.type),
                         "nullable": col.nullable,
                         "primary_key": col.primary_key,
+                        "unique": col.name in unique,
                     }
                     for col in table.columns
                 ]
@@ -66,5 +76,108 @@ class MySQLManager(IDatabaseManager):
                 transaction.rollback()
                 raise e
 
+    def stream_query(
+        self, query: str, schema_name: Optional[str] = None, chunk_size: int = 500, timeout: Optional[float] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the rows of a query in chunks of `chunk_size`, using a server-side cursor."""
+        with self._get_connection() as conn, cancel_after(conn, timeout):
+            transaction = conn.begin()
+            try:
+                if schema_name:
+                    conn.execute(text(f"USE {schema_name}"))
+                result = conn.execution_options(stream_results=True).execute(text(query))
+
+                if not result.returns_rows:
+                    transaction.commit()
+                    yield [{"message": "Query executed successfully"}]
+                    return
+
+                columns = list(result.keys())
+                for partition in result.partitions(chunk_size):
+                    yield [dict(zip(columns, row)) for row in partition]
+                transaction.commit()
+            except Exception as e:
+                transaction.rollback()
+                raise e
+
+    def bulk_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        schema_name: Optional[str] = None,
+        ignore_conflicts: bool = False,
+        batch_size: int = 5000,
+    ) -> int:
+        """
+        Loads rows with multi-row INSERTs, `batch_size` rows per statement.
+
+        PyMySQL's executemany folds an INSERT ... VALUES into a single multi-row statement. LOAD DATA
+        LOCAL INFILE would be faster but depends on local_infile being enabled on both ends.
+        """
+        target = f"{schema_name}.{table_name}" if schema_name else table_name
+        statement = (
+            f"INSERT {'IGNORE ' if ignore_conflicts else ''}INTO {target} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+        rows = iter(rows)
+        inserted = 0
+
+        raw_connection = self._engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                cursor.executemany(statement, batch)
+                inserted += cursor.rowcount
+            raw_connection.commit()
+            return inserted
+        except Exception as e:
+            raw_connection.rollback()
+            raise e
+        finally:
+            raw_connection.close()
+
+    def explain(self, query: str, schema_name: Optional[str] = None) -> Dict[str, float]:
+        """Optimizer estimates of a query, from EXPLAIN without ANALYZE so nothing is executed."""
+        with self._get_connection() as conn:
+            transaction = conn.begin()
+            try:
+                if schema_name:
+                    conn.execute(text(f"USE {schema_name}"))
+                plan = json.loads(conn.execute(text(f"EXPLAIN FORMAT=JSON {query}")).scalar())
+                query_block = plan.get("query_block", {})
+                cost = float(query_block.get("cost_info", {}).get("query_cost", 0))
+                return {"cost": cost, "rows": float(max(self._produced_rows(query_block), default=0))}
+            finally:
+                transaction.rollback()
+
+    def _produced_rows(self, node: Any) -> Iterator[float]:
+        # The last table of a join reports the rows the whole join produces, so the maximum is the estimate.
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "rows_produced_per_join":
+                    yield float(value)
+                else:
+                    yield from self._produced_rows(value)
+        elif isinstance(node, list):
+            for item in node:
+                yield from self._produced_rows(item)
+
+    def replication_lag(self) -> Optional[float]:
+        """Seconds_Behind_Source of this replica: 0 when it is not a replica, None when replication is stopped."""
+        with self._get_connection() as conn:
+            try:
+                status = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+            except Exception:
+                # Servers before 8.0.22 only know the older statement and column names.
+                status = conn.execute(text("SHOW SLAVE STATUS")).mappings().first()
+            if status is None:
+                return 0.0
+            lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+            return float(lag) if lag is not None else None
+
     def get_engine(self) -> Engine:
         return self._engine
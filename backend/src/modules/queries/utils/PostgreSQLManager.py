@@ -1,10 +1,15 @@
+import csv
+import io
+import json
 from contextlib import contextmanager
-from typing import Any, Dict, Iterator, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
-from sqlalchemy import MetaData, text
+from sqlalchemy import MetaData, UniqueConstraint, text
 from sqlalchemy.engine import Connection, Engine
 
 from src.modules.queries.utils.IDatabaseManager import IDatabaseManager
+from src.modules.queries.utils.StatementTimeout import cancel_after
 
 
 class PostgreSQLManager(IDatabaseManager):
@@ -26,12 +31,19 @@ class PostgreSQLManager(IDatabaseManager):
 
             db_structure = {}
             for table in metadata.sorted_tables:
+                # Single-column UNIQUE constraints, which may also be reflected as unique indexes.
+                unique_sets = [
+                    *(constraint.columns for constraint in table.constraints if isinstance(constraint, UniqueConstraint)),
+                    *(index.columns for index in table.indexes if index.unique),
+                ]
+                unique = {next(iter(columns)).name for columns in unique_sets if len(columns) == 1}
                 columns = [
                     {
                         "name": col.name,
                         "type": str(col.type),
                         "nullable": col.nullable,
                         "primary_key": col.primary_key,
+                        "unique": col.name in unique,
                     }
                     for col in table.columns
                 ]
@@ -67,5 +79,129 @@ class PostgreSQLManager(IDatabaseManager):
                 print(f"Error executing query: {e}")
                 raise e
 
+    def stream_query(
+        self, query: str, schema_name: Optional[str] = None, chunk_size: int = 500, timeout: Optional[float] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the rows of a query in chunks of `chunk_size`, using a server-side cursor."""
+        with self._get_connection() as conn, cancel_after(conn, timeout):
+            transaction = conn.begin()
+            try:
+                if schema_name:
+                    conn.execute(text(f"SET search_path TO {schema_name}"))
+                result = conn.execution_options(stream_results=True).execute(text(query))
+
+                if not result.returns_rows:
+                    transaction.commit()
+                    yield [{"message": "Query executed successfully"}]
+                    return
+
+                columns = list(result.keys())
+                for partition in result.partitions(chunk_size):
+                    yield [dict(zip(columns, row)) for row in partition]
+                transaction.commit()
+            except Exception as e:
+                transaction.rollback()
+                raise e
+
+    def bulk_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        schema_name: Optional[str] = None,
+        ignore_conflicts: bool = False,
+        batch_size: int = 100000,
+    ) -> int:
+        """
+        Loads rows with COPY ... FROM STDIN (CSV), one batch of `batch_size` rows at a time.
+
+        With `ignore_conflicts`, or when a column is GENERATED ALWAYS AS IDENTITY (which COPY
+        refuses to write), each batch is copied into a temporary table first and moved over with
+        INSERT ... OVERRIDING SYSTEM VALUE, adding ON CONFLICT DO NOTHING to skip duplicates.
+        Sequences behind the loaded columns (SERIAL, IDENTITY) are then advanced past the new
+        keys, so later inserts that rely on the default do not collide with them.
+        """
+        target = f"{schema_name}.{table_name}" if schema_name else table_name
+        column_list = ", ".join(columns)
+        rows = iter(rows)
+        inserted = 0
+
+        raw_connection = self._engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            cursor.execute(
+                "SELECT attname FROM pg_attribute WHERE attrelid = %s::regclass AND attidentity = 'a' "
+                "AND NOT attisdropped AND attname = ANY(%s)",
+                (target, list(columns)),
+            )
+            staged = ignore_conflicts or bool(cursor.fetchall())
+            if staged:
+                cursor.execute(f"CREATE TEMP TABLE bulk_stage AS SELECT {column_list} FROM {target} WITH NO DATA")
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+
+                if staged:
+                    cursor.copy_expert(f"COPY bulk_stage ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+                    cursor.execute(
+                        f"INSERT INTO {target} ({column_list}) OVERRIDING SYSTEM VALUE "
+                        f"SELECT {column_list} FROM bulk_stage{' ON CONFLICT DO NOTHING' if ignore_conflicts else ''}")
+                    inserted += cursor.rowcount
+                    cursor.execute("TRUNCATE bulk_stage")
+                else:
+                    cursor.copy_expert(f"COPY {target} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+                    inserted += len(batch)
+            if staged:
+                cursor.execute("DROP TABLE bulk_stage")
+            for column in columns:
+                cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (target, column))
+                sequence = cursor.fetchone()[0]
+                if sequence:
+                    cursor.execute(
+                        f"SELECT setval(%s, GREATEST(COALESCE(MAX({column}), 0), (SELECT last_value FROM {sequence}))) "
+                        f"FROM {target}",
+                        (sequence,),
+                    )
+            raw_connection.commit()
+            return inserted
+        except Exception as e:
+            raw_connection.rollback()
+            print(f"Error loading rows: {e}")
+            raise e
+        finally:
+            raw_connection.close()
+
+    def explain(self, query: str, schema_name: Optional[str] = None) -> Dict[str, float]:
+        """Planner estimates of a query, from EXPLAIN without ANALYZE so nothing is executed."""
+        with self._get_connection() as conn:
+            transaction = conn.begin()
+            try:
+                if schema_name:
+                    conn.execute(text(f"SET search_path TO {schema_name}"))
+                plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                root = plan[0]["Plan"]
+                return {"cost": float(root["Total Cost"]), "rows": float(root["Plan Rows"])}
+            finally:
+                transaction.rollback()
+
+    def replication_lag(self) -> Optional[float]:
+        """
+        Seconds this server's replay is behind its primary: 0 on a primary or a caught-up standby
+        (an idle primary writes nothing to replay), None when it cannot be told.
+        """
+        with self._get_connection() as conn:
+            lag = conn.execute(text(
+                "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+                "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            )).scalar()
+            return float(lag) if lag is not None else None
+
     def get_engine(self) -> Engine:
         return self._engine
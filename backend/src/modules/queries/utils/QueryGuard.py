@@ -0,0 +1,90 @@
+from typing import Optional
+
+from sqlglot import exp
+
+from src.config.constants import Settings
+from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.queries.utils.SQLUtils import SQLGLOT_DIALECTS, SQLUtils
+
+# Statements that every supported database can EXPLAIN; DDL and session statements cannot be.
+EXPLAINABLE_EXPRESSIONS = (exp.Query, exp.Insert, exp.Update, exp.Delete, exp.Merge)
+
+
+class QueryRejectedError(Exception):
+    pass
+
+
+class QueryGuard:
+    """
+    Pre-flight check for generated SQL.
+
+    The statement is parsed and classified, then EXPLAINed (never ANALYZEd) to read the planner's
+    cost and row estimates. Reads over the thresholds are retried with a LIMIT; anything still
+    over them, and any write over them, is rejected before it reaches the database. Statements
+    the planner does not cost, such as DDL, are passed through; CREATE ... AS is estimated by its query.
+    """
+
+    def __init__(
+        self,
+        query_adapter,
+        max_cost: Optional[float] = None,
+        max_rows: Optional[float] = None,
+        row_limit: Optional[int] = None,
+    ):
+        self.query_adapter = query_adapter
+        self.max_cost = max_cost or Settings.QUERY_GUARD_MAX_COST
+        self.max_rows = max_rows or Settings.QUERY_GUARD_MAX_ROWS
+        self.row_limit = row_limit or Settings.QUERY_GUARD_ROW_LIMIT
+
+    def check(self, query: str, connection: DatabaseConnection) -> str:
+        """Returns the query to execute, possibly rewritten with a LIMIT, or raises QueryRejectedError."""
+        query = SQLUtils.clean_sql_query(query)
+        dialect = SQLGLOT_DIALECTS.get(connection.db_type.value)
+
+        statements = SQLUtils.parse(query, dialect)
+        if statements is not None and len(statements) > 1:
+            raise QueryRejectedError("Only one SQL statement can be executed at a time")
+        if statements is not None and not isinstance(statements[0], EXPLAINABLE_EXPRESSIONS):
+            source = statements[0].expression if isinstance(statements[0], exp.Create) else None
+            if not isinstance(source, exp.Query):
+                return query
+            # CREATE ... AS SELECT costs as much as its query, which can be EXPLAINed.
+            estimate = self.query_adapter.explain(source.sql(dialect=dialect), connection)
+            if self.within_limits(estimate):
+                return query
+            raise QueryRejectedError(self.describe("Statement", estimate))
+
+        estimate = self.query_adapter.explain(query, connection)
+        if self.within_limits(estimate):
+            return query
+
+        if statements is None or not SQLUtils.is_read_only(query, dialect):
+            raise QueryRejectedError(self.describe("Statement", estimate))
+
+        limited = self.with_limit(statements[0], dialect)
+        if limited is not None:
+            limited_estimate = self.query_adapter.explain(limited, connection)
+            if self.within_limits(limited_estimate):
+                return limited
+
+        raise QueryRejectedError(self.describe("Query", estimate))
+
+    def within_limits(self, estimate: dict) -> bool:
+        return estimate["cost"] <= self.max_cost and estimate["rows"] <= self.max_rows
+
+    def with_limit(self, statement: exp.Expression, dialect: Optional[str]) -> Optional[str]:
+        if not isinstance(statement, exp.Query):
+            return None
+
+        limit = statement.args.get("limit")
+        if limit is not None:
+            current = limit.expression
+            if not isinstance(current, exp.Literal) or not current.is_int or int(current.name) <= self.row_limit:
+                return None
+        return statement.limit(self.row_limit).sql(dialect=dialect)
+
+    def describe(self, kind: str, estimate: dict) -> str:
+        return (
+            f"{kind} rejected: estimated cost {estimate['cost']:.0f} and {estimate['rows']:.0f} rows exceed "
+            f"the limits of {self.max_cost:.0f} cost and {self.max_rows:.0f} rows"
+        )
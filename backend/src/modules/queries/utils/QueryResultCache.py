@@ -0,0 +1,88 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from src.config.constants import Settings
+
+
+class QueryResultCache:
+    """
+    Process-wide cache of read-only query results.
+
+    Entries are keyed by (credential fingerprint, schema, normalized SQL), expire after a TTL and
+    are evicted least-recently-used once the total pickled size goes over the byte budget.
+    Each entry remembers the tables it read, so a write through QueryService can drop them.
+    """
+
+    max_bytes: int = Settings.QUERY_CACHE_MAX_BYTES
+    max_entry_bytes: int = Settings.QUERY_CACHE_MAX_ENTRY_BYTES
+    ttl_seconds: float = Settings.QUERY_CACHE_TTL_SECONDS
+
+    _entries: "OrderedDict[Hashable, Tuple[float, bytes, FrozenSet[str]]]" = OrderedDict()
+    _size: int = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls.ttl_seconds > 0 and cls.max_bytes > 0
+
+    @classmethod
+    def get(cls, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, payload, _ = entry
+            if expires_at < time.monotonic():
+                cls._remove(key)
+                return None
+
+            cls._entries.move_to_end(key)
+        # Results are stored pickled, so callers always get their own copy.
+        return pickle.loads(payload)
+
+    @classmethod
+    def set(cls, key: Hashable, rows: List[Dict[str, Any]], tables: FrozenSet[str]) -> bool:
+        try:
+            payload = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        if len(payload) > cls.max_entry_bytes:
+            return False
+
+        with cls._lock:
+            if key in cls._entries:
+                cls._remove(key)
+            cls._entries[key] = (time.monotonic() + cls.ttl_seconds, payload, tables)
+            cls._size += len(payload)
+            while cls._size > cls.max_bytes:
+                cls._remove(next(iter(cls._entries)))
+        return True
+
+    @classmethod
+    def invalidate(cls, fingerprint: str, tables: Optional[FrozenSet[str]] = None) -> None:
+        """Drops the entries of a database that read any of `tables`, or all of them when `tables` is None."""
+        with cls._lock:
+            for key in [
+                key for key, (_, _, entry_tables) in cls._entries.items()
+                if key[0] == fingerprint and (tables is None or entry_tables & tables)
+            ]:
+                cls._remove(key)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries.clear()
+            cls._size = 0
+
+    @classmethod
+    def size(cls) -> int:
+        return cls._size
+
+    @classmethod
+    def _remove(cls, key: Hashable) -> None:
+        _, payload, _ = cls._entries.pop(key)
+        cls._size -= len(payload)
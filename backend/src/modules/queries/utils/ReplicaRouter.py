@@ -0,0 +1,150 @@
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy.engine import Engine
+
+from src.config.constants import Settings
+from src.modules.queries.utils.IDatabaseManager import IDatabaseManager
+from src.modules.queries.utils.SQLUtils import SQLUtils
+
+T = TypeVar("T")
+
+
+class ReplicaHealth:
+    """
+    Process-wide health of the read replicas, keyed by engine cache key.
+
+    A replica is healthy when its replication lag can be read and is at most `max_lag_seconds`.
+    The verdict is reused for `check_interval` seconds, so at most one lag query per replica runs
+    per interval, and an ejected replica is only retried once it is due for a new check.
+    """
+
+    max_lag_seconds: float = Settings.REPLICA_MAX_LAG_SECONDS
+    check_interval: float = Settings.REPLICA_HEALTH_CHECK_SECONDS
+
+    _states: Dict[str, Tuple[bool, float]] = {}
+    _counters: Dict[str, Iterator[int]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def is_healthy(cls, key: str, manager: IDatabaseManager) -> bool:
+        now = time.monotonic()
+        with cls._lock:
+            state = cls._states.get(key)
+            if state is not None and now - state[1] < cls.check_interval:
+                return state[0]
+            if state is not None:
+                # Other threads keep the last verdict while this one checks.
+                cls._states[key] = (state[0], now)
+
+        healthy = cls.check(manager)
+        with cls._lock:
+            cls._states[key] = (healthy, time.monotonic())
+        return healthy
+
+    @classmethod
+    def check(cls, manager: IDatabaseManager) -> bool:
+        replication_lag = getattr(manager, "replication_lag", None)
+        try:
+            lag = replication_lag() if replication_lag else 0.0
+        except Exception as e:
+            print(f"Replica health check failed: {e}")
+            return False
+        return lag is not None and lag <= cls.max_lag_seconds
+
+    @classmethod
+    def eject(cls, key: str) -> None:
+        with cls._lock:
+            cls._states[key] = (False, time.monotonic())
+
+    @classmethod
+    def next_offset(cls, key: str) -> int:
+        with cls._lock:
+            return next(cls._counters.setdefault(key, itertools.count()))
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._states.clear()
+            cls._counters.clear()
+
+
+class ReplicaRoutingManager(IDatabaseManager):
+    """
+    Sends read-only statements to the replicas of a database and everything else to its primary.
+
+    Statements are classified by parsing (SQLUtils.is_replica_safe), so anything that cannot be
+    parsed, locks rows, writes or calls a function that may write (nextval, user-defined
+    functions) goes to the primary. Reads take the healthy replicas round-robin.
+    When a read fails, the replica is checked again: if it no longer answers it is ejected and the
+    read moves on to the next replica, then to the primary; if it does answer, the error came from
+    the statement and is raised as is. `get_engine` is the primary's, so result cache keys and
+    invalidations stay per database.
+    """
+
+    def __init__(self, primary: IDatabaseManager, replicas: List[Tuple[str, IDatabaseManager]], dialect: Optional[str], key: str):
+        self._primary = primary
+        self._replicas = replicas
+        self._dialect = dialect
+        self._key = key
+
+    def _replica_order(self) -> List[Tuple[str, IDatabaseManager]]:
+        offset = ReplicaHealth.next_offset(self._key) % len(self._replicas)
+        return self._replicas[offset:] + self._replicas[:offset]
+
+    def _read(self, operation: Callable[[IDatabaseManager], T]) -> T:
+        for key, replica in self._replica_order():
+            if not ReplicaHealth.is_healthy(key, replica):
+                continue
+            try:
+                return operation(replica)
+            except Exception:
+                if ReplicaHealth.check(replica):
+                    raise
+                ReplicaHealth.eject(key)
+        return operation(self._primary)
+
+    def get_db_structure(self, schema_name: Optional[str] = None) -> Dict[str, Any]:
+        return self._read(lambda manager: manager.get_db_structure(schema_name))
+
+    def execute_query(self, query: str, schema_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not SQLUtils.is_replica_safe(query, self._dialect):
+            return self._primary.execute_query(query, schema_name)
+        return self._read(lambda manager: manager.execute_query(query, schema_name))
+
+    def stream_query(
+        self, query: str, schema_name: Optional[str] = None, chunk_size: int = 500, timeout: Optional[float] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        if not SQLUtils.is_replica_safe(query, self._dialect):
+            yield from self._primary.stream_query(query, schema_name, chunk_size, timeout)
+            return
+
+        # Only a failure before the first chunk can move to another server without duplicating rows.
+        def first_chunk(manager: IDatabaseManager) -> Tuple[Iterator[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]]:
+            chunks = manager.stream_query(query, schema_name, chunk_size, timeout)
+            return chunks, next(chunks, None)
+
+        chunks, first = self._read(first_chunk)
+        if first is not None:
+            yield first
+            yield from chunks
+
+    def bulk_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        schema_name: Optional[str] = None,
+        ignore_conflicts: bool = False,
+    ) -> int:
+        return self._primary.bulk_insert(table_name, columns, rows, schema_name, ignore_conflicts)
+
+    def explain(self, query: str, schema_name: Optional[str] = None) -> Dict[str, float]:
+        if not SQLUtils.is_replica_safe(query, self._dialect):
+            return self._primary.explain(query, schema_name)
+        return self._read(lambda manager: manager.explain(query, schema_name))
+
+    def get_engine(self) -> Engine:
+        return self._primary.get_engine()
@@ -1,7 +1,102 @@
 import re
+from typing import Optional, Set, Tuple, Union
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+
+# SQLAlchemy dialect names to sqlglot dialects.
+SQLGLOT_DIALECTS = {
+    "postgresql": "postgres",
+    "mysql": "mysql",
+    "sqlite": "sqlite",
+    "duckdb": "duckdb",
+}
+
+WRITE_EXPRESSIONS = (exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Into, exp.Lock)
+
+# Functions sqlglot knows whose result changes between calls with the same arguments (time, randomness).
+VOLATILE_FUNCTIONS = (
+    exp.CurrentDate, exp.CurrentDatetime, exp.CurrentTime, exp.CurrentTimestamp, exp.CurrentTimestampLTZ,
+    exp.Localtime, exp.Localtimestamp, exp.Systimestamp, exp.UtcDate, exp.UtcTime, exp.UtcTimestamp,
+    exp.Rand, exp.Randn, exp.Randstr, exp.Uuid,
+)
 
 
 class SQLUtils:
     @staticmethod
     def clean_sql_query(query: str) -> str:
         return re.sub(r"```[a-zA-Z]*", "", query).strip()
+
+    @staticmethod
+    def parse(query: str, dialect: Optional[str] = None) -> Optional[list]:
+        try:
+            statements = [statement for statement in sqlglot.parse(query, read=dialect) if statement is not None]
+            return statements or None
+        except SqlglotError:
+            return None
+
+    @staticmethod
+    def normalize_sql(query: str, dialect: Optional[str] = None) -> str:
+        """Canonical text of a query, so formatting and keyword case do not change cache keys."""
+        statements = SQLUtils.parse(query, dialect)
+        if statements is None:
+            return " ".join(query.split())
+        return ";".join(statement.sql(dialect=dialect) for statement in statements)
+
+    @staticmethod
+    def is_read_only(query: str, dialect: Optional[str] = None) -> bool:
+        """True only for plain queries: no DML/DDL, SELECT ... INTO, locking reads or data-modifying CTEs."""
+        statements = SQLUtils.parse(query, dialect)
+        if statements is None:
+            return False
+        return all(
+            isinstance(statement, exp.Query) and statement.find(*WRITE_EXPRESSIONS) is None
+            for statement in statements
+        )
+
+    @staticmethod
+    def is_cacheable(query: str, dialect: Optional[str] = None) -> bool:
+        """
+        True for read-only queries that only call functions known to be immutable, so their result
+        only changes when their tables do.
+
+        Functions sqlglot does not know (nextval, user-defined functions...) parse as Anonymous and
+        count as volatile, like now() or random().
+        """
+        return SQLUtils.is_read_only(query, dialect) and not SQLUtils.calls(query, dialect, (exp.Anonymous, *VOLATILE_FUNCTIONS))
+
+    @staticmethod
+    def is_replica_safe(query: str, dialect: Optional[str] = None) -> bool:
+        """
+        True for read-only queries that only call functions sqlglot knows.
+
+        Unknown functions (nextval, setval, user-defined functions...) may write, which a read
+        replica refuses. Volatile functions such as now() or random() are fine there.
+        """
+        return SQLUtils.is_read_only(query, dialect) and not SQLUtils.calls(query, dialect, exp.Anonymous)
+
+    @staticmethod
+    def calls(query: str, dialect: Optional[str], functions: Union[type, Tuple[type, ...]]) -> bool:
+        """True if the query calls any function of the given sqlglot expression types."""
+        return any(
+            isinstance(function, functions)
+            for statement in SQLUtils.parse(query, dialect) or []
+            for function in statement.find_all(exp.Func)
+        )
+
+    @staticmethod
+    def extract_tables(query: str, dialect: Optional[str] = None) -> Optional[Set[str]]:
+        """Lower-cased names of the tables a query touches, without CTE names; None if it cannot be parsed."""
+        statements = SQLUtils.parse(query, dialect)
+        if statements is None:
+            return None
+
+        tables = set()
+        for statement in statements:
+            ctes = {cte.alias_or_name.lower() for cte in statement.find_all(exp.CTE)}
+            tables.update(
+                table.name.lower() for table in statement.find_all(exp.Table)
+                if table.name and table.name.lower() not in ctes
+            )
+        return tables
@@ -0,0 +1,187 @@
+from contextlib import contextmanager
+from graphlib import CycleError, TopologicalSorter
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from src.modules.queries.utils.IDatabaseManager import IDatabaseManager
+from src.modules.queries.utils.StatementTimeout import cancel_after
+
+
+def sort_tables(db_structure: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The structure with referenced tables before their referrers, as MetaData.sorted_tables orders them.
+
+    Tables that reference each other have no such order, so the structure is returned as read.
+    """
+    graph = {
+        table: {
+            fk["references"] for fk in info["foreign_keys"]
+            if fk["references"] != table and fk["references"] in db_structure
+        }
+        for table, info in db_structure.items()
+    }
+    try:
+        return {table: db_structure[table] for table in TopologicalSorter(graph).static_order()}
+    except CycleError:
+        return db_structure
+
+
+class SQLiteManager(IDatabaseManager):
+    """
+    Manager for SQLite database files; `database_name` is the path of the file, within FILE_DATABASE_DIR.
+
+    The catalog is read with the pragma table-valued functions in two queries, instead of the
+    per-table round-trips of MetaData.reflect. `schema_name` is the name of an attached database
+    ("main" for the file itself) and only qualifies the catalog queries, since SQLite has no
+    search path.
+    """
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+
+    @contextmanager
+    def _get_connection(self) -> Iterator[Connection]:
+        conn = self._engine.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get_db_structure(self, schema_name: Optional[str] = None) -> Dict[str, Any]:
+        schema = schema_name or "main"
+        tables = (
+            f"SELECT name FROM \"{schema}\".sqlite_master "
+            f"WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        )
+        with self._get_connection() as conn:
+            columns = conn.execute(text(
+                f"SELECT t.name AS table_name, c.name, c.type, c.\"notnull\", c.pk "
+                f"FROM ({tables}) AS t, pragma_table_info(t.name, '{schema}') AS c ORDER BY t.name, c.cid"
+            )).fetchall()
+            foreign_keys = conn.execute(text(
+                f"SELECT t.name AS table_name, f.\"from\", f.\"table\", f.\"to\" "
+                f"FROM ({tables}) AS t, pragma_foreign_key_list(t.name, '{schema}') AS f ORDER BY t.name, f.id, f.seq"
+            )).fetchall()
+            unique = set(conn.execute(text(
+                f"SELECT t.name AS table_name, MIN(c.name) AS column_name "
+                f"FROM ({tables}) AS t, pragma_index_list(t.name, '{schema}') AS i, pragma_index_info(i.name, '{schema}') AS c "
+                f"WHERE i.\"unique\" AND i.origin <> 'pk' GROUP BY t.name, i.name HAVING COUNT(*) = 1"
+            )).fetchall())
+
+        db_structure = {}
+        for table_name, name, column_type, not_null, primary_key in columns:
+            table = db_structure.setdefault(table_name, {"columns": [], "foreign_keys": []})
+            table["columns"].append({
+                "name": name,
+                "type": column_type or "TEXT",
+                "nullable": not not_null and not primary_key,
+                "primary_key": bool(primary_key),
+                "unique": (table_name, name) in unique,
+            })
+        for table_name, column, references, referenced_column in foreign_keys:
+            if table_name in db_structure:
+                db_structure[table_name]["foreign_keys"].append({
+                    "column": column,
+                    "references": references,
+                    # A foreign key without a column list references the primary key.
+                    "referenced_column": referenced_column or self._primary_key(db_structure.get(references)),
+                })
+        return sort_tables(db_structure)
+
+    def _primary_key(self, table: Optional[Dict[str, Any]]) -> Optional[str]:
+        if table is None:
+            return None
+        return next((column["name"] for column in table["columns"] if column["primary_key"]), None)
+
+    def execute_query(self, query: str, schema_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._get_connection() as conn:
+            transaction = conn.begin()
+            try:
+                result = conn.execute(text(query))
+                if result.returns_rows:
+                    columns = result.keys()
+                    rows = [dict(zip(columns, row)) for row in result.fetchall()]
+                    transaction.commit()
+                    return rows
+                transaction.commit()
+                return [{"message": "Query executed successfully"}]
+            except Exception as e:
+                transaction.rollback()
+                raise e
+
+    def stream_query(
+        self, query: str, schema_name: Optional[str] = None, chunk_size: int = 500, timeout: Optional[float] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the rows of a query in chunks of `chunk_size`; the sqlite3 cursor steps through them lazily."""
+        with self._get_connection() as conn, cancel_after(conn, timeout):
+            transaction = conn.begin()
+            try:
+                result = conn.execute(text(query))
+
+                if not result.returns_rows:
+                    transaction.commit()
+                    yield [{"message": "Query executed successfully"}]
+                    return
+
+                columns = list(result.keys())
+                for partition in result.partitions(chunk_size):
+                    yield [dict(zip(columns, row)) for row in partition]
+                transaction.commit()
+            except Exception as e:
+                transaction.rollback()
+                raise e
+
+    def bulk_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Iterable[Sequence[Any]],
+        schema_name: Optional[str] = None,
+        ignore_conflicts: bool = False,
+        batch_size: int = 50000,
+    ) -> int:
+        """Loads rows with executemany in a single transaction, `batch_size` rows at a time."""
+        target = f"{schema_name}.{table_name}" if schema_name else table_name
+        statement = (
+            f"INSERT {'OR IGNORE ' if ignore_conflicts else ''}INTO {target} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['?'] * len(columns))})"
+        )
+        rows = iter(rows)
+        inserted = 0
+
+        raw_connection = self._engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                cursor.executemany(statement, batch)
+                inserted += cursor.rowcount
+            raw_connection.commit()
+            return inserted
+        except Exception as e:
+            raw_connection.rollback()
+            raise e
+        finally:
+            raw_connection.close()
+
+    def explain(self, query: str, schema_name: Optional[str] = None) -> Dict[str, float]:
+        """
+        SQLite exposes no cost or row estimates, so this only checks that the query compiles.
+
+        EXPLAIN QUERY PLAN prepares the statement without running it and raises on invalid SQL.
+        """
+        with self._get_connection() as conn:
+            transaction = conn.begin()
+            try:
+                conn.execute(text(f"EXPLAIN QUERY PLAN {query}")).fetchall()
+                return {"cost": 0.0, "rows": 0.0}
+            finally:
+                transaction.rollback()
+
+    def get_engine(self) -> Engine:
+        return self._engine
@@ -0,0 +1,41 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from sqlalchemy.engine import Connection, Engine
+
+
+def cancel_statement(engine: Engine, dbapi_connection: Any) -> None:
+    """Stops the statement running on `dbapi_connection`, from another thread, with each driver's own mechanism."""
+    try:
+        if engine.dialect.name == "postgresql":
+            dbapi_connection.cancel()
+        elif engine.dialect.name in ("sqlite", "duckdb"):
+            dbapi_connection.interrupt()
+        elif engine.dialect.name == "mysql":
+            # PyMySQL cannot cancel from the side; the server kills the statement by connection id.
+            with engine.connect() as other:
+                other.exec_driver_sql(f"KILL QUERY {int(dbapi_connection.thread_id())}")
+    except Exception as e:
+        print(f"Error cancelling statement: {e}")
+
+
+@contextmanager
+def cancel_after(conn: Connection, timeout: Optional[float]) -> Iterator[None]:
+    """
+    Cancels whatever `conn` is running once `timeout` seconds have passed inside the block.
+
+    The caller's own timeout (e.g. asyncio.wait_for) only stops waiting for a statement, which the
+    database would otherwise keep running, with its connection checked out, until it finished.
+    """
+    if not timeout:
+        yield
+        return
+
+    timer = threading.Timer(timeout, cancel_statement, (conn.engine, conn.connection.dbapi_connection))
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.cancel()
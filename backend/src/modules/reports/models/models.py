@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from src.modules.reports.schemas.GraphRequest import GraphRequest
+
+
+class ColumnProfile(BaseModel):
+    """
+    Summary statistics of a column, computed in a single pass over a bounded sample.
+
+    `dtype` is one of "numeric", "datetime", "string" or "unknown", and `distinct_count`
+    is exact within the sample, which makes it an approximation for the whole table.
+    """
+    row_count: int
+    null_ratio: float
+    distinct_count: int
+    min_value: Optional[Any] = None
+    max_value: Optional[Any] = None
+    dtype: str
+
+
+class ReportDefinitionCreate(BaseModel):
+    """
+    Data model for creating a named report.
+
+    A report definition stores the requested charts and the credentials needed to recompute them,
+    so its snapshot can be refreshed on a schedule without a client connected. A None
+    `refresh_interval_minutes` means the snapshot is only refreshed on demand.
+    """
+    name: str
+    user: str
+    graph_requests: List[GraphRequest]
+    credentials: Dict[str, Any]
+    language: str = "en"
+    refresh_interval_minutes: Optional[int] = None
+    last_refreshed_at: Optional[datetime] = None
+
+
+class ReportDefinition(ReportDefinitionCreate):
+    """
+    Data model for an existing report definition.
+
+    This model extends the ReportDefinitionCreate model by including an ID attribute.
+    """
+    id: str
+
+
+class ReportDefinitionSummary(BaseModel):
+    """
+    Data model for a report definition as returned to clients.
+
+    It mirrors ReportDefinition without the stored credentials, which are only read server side
+    to refresh the snapshot.
+    """
+    id: str
+    name: str
+    user: str
+    graph_requests: List[GraphRequest]
+    language: str = "en"
+    refresh_interval_minutes: Optional[int] = None
+    last_refreshed_at: Optional[datetime] = None
+
+    @classmethod
+    def from_definition(cls, definition: ReportDefinition) -> "ReportDefinitionSummary":
+        return cls(**definition.model_dump(exclude={"credentials"}))
+
+
+class ReportSnapshot(BaseModel):
+    """
+    Data model for the materialized charts of a report, as computed at `refreshed_at`.
+    """
+    report_id: str
+    charts: Dict[str, Any]
+    refreshed_at: datetime
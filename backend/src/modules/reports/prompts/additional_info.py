@@ -1,11 +1,7 @@
-ADDITIONAL_INFO_PROMPT = (
+BATCH_ADDITIONAL_INFO_PROMPT = (
     """
-    I need you to give me a brief summary of a graph, this is the information of the graph {graph}.
-    """
-)
-
-TRANSLATE_PROMPT = (
-    """
-    I need you to translate this sentence to spanish, dont change data, only translate it {text}, and return only the translated information, no more.
+    I need you to give me a brief summary of each of the following graphs, written in {language}. Dont change data.
+    Return only a JSON array of strings with exactly {count} summaries, one per graph and in the same order, no more.
+    These are the graphs: {graphs}
     """
 )
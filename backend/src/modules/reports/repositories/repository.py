@@ -1,7 +1,205 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from src.config.constants import Settings
+from src.config.database import database
+from src.modules.queries.utils.DatabaseType import DatabaseType
+from src.modules.reports.models.models import (
+    ReportDefinition,
+    ReportDefinitionCreate,
+    ReportSnapshot,
+)
+
+HISTOGRAM_BINS = 10
+# Fine-grained buckets computed in SQL; the Histogram chart re-bins them with its strategy.
+HISTOGRAM_SQL_BUCKETS = 1000
+TABLE_ROWS_LIMIT = 100
+GROUPING_SETS_DATABASES = {DatabaseType.POSTGRESQL, DatabaseType.DUCKDB}
+
+
 class ReportRepository:
+    """
+    Builds the report queries and stores report definitions and their snapshots.
+
+    Every report query covers all the requested columns of one table, so a report costs one
+    round-trip per table and aggregation instead of one per column.
+    """
+
     def __init__(self):
-        pass
+        self.definitions = database["Reports"]
+        self.snapshots = database["ReportSnapshots"]
+
+    async def column_info(self, column_names: List[str], table_name: str, schema: str, limit: Optional[int] = None):
+        query = f"SELECT {', '.join(column_names)} FROM {schema}.{table_name}"
+        if limit:
+            query += f" LIMIT {limit}"
+        return query
 
-    async def column_info(self, column_name: str, table_name: str, schema: str):
-        query = f"SELECT {column_name} FROM {schema}.{table_name}"
+    async def column_profile(
+        self, column_names: List[str], table_name: str, schema: str, sample_size: int, db_type: Optional[DatabaseType] = None
+    ):
+        # Aliases are indexed so split_column_profiles can map them back to their columns.
+        stats = ", ".join(
+            f"COUNT({column}) AS non_null_count_{i}, COUNT(DISTINCT {column}) AS distinct_count_{i}, "
+            f"{self.extreme(column, 'MIN', db_type)} AS min_value_{i}, {self.extreme(column, 'MAX', db_type)} AS max_value_{i}"
+            for i, column in enumerate(column_names)
+        )
+        query = (
+            f"SELECT COUNT(*) AS row_count, {stats} "
+            f"FROM ({await self.column_info(column_names, table_name, schema, sample_size)}) AS column_sample"
+        )
         return query
+
+    @staticmethod
+    def extreme(column: str, function: str, db_type: Optional[DatabaseType]) -> str:
+        """MIN or MAX of a column of any orderable type."""
+        if db_type != DatabaseType.POSTGRESQL:
+            return f"{function}({column})"
+        # PostgreSQL has no MIN/MAX for boolean columns, but every orderable type can be sorted.
+        order = "DESC" if function == "MAX" else "ASC"
+        return f"(ARRAY_AGG({column} ORDER BY {column} {order}) FILTER (WHERE {column} IS NOT NULL))[1]"
+
+    async def value_counts(
+        self, column_names: List[str], table_name: str, schema: str, db_type: DatabaseType, limit: int
+    ):
+        # Each column's counts come back in its own result column, NULL in the rows of the other columns.
+        # Only the `limit` most frequent values of each column are returned; total_count keeps the count
+        # of all non-null rows so the charts can still report the remainder as "Other".
+        if db_type in GROUPING_SETS_DATABASES:
+            selected = ", ".join(column_names)
+            grouping_sets = ", ".join(f"({column})" for column in column_names)
+            all_null = " AND ".join(f"{column} IS NULL" for column in column_names)
+            return (
+                f"SELECT {selected}, count, total_count FROM ("
+                f"SELECT {selected}, count, "
+                f"ROW_NUMBER() OVER (PARTITION BY grouping_set ORDER BY count DESC) AS value_rank, "
+                f"SUM(count) OVER (PARTITION BY grouping_set) AS total_count FROM ("
+                f"SELECT {selected}, COUNT(*) AS count, GROUPING({selected}) AS grouping_set "
+                f"FROM {schema}.{table_name} GROUP BY GROUPING SETS ({grouping_sets})"
+                f") AS value_groups WHERE NOT ({all_null})"
+                f") AS ranked_values WHERE value_rank <= {limit} ORDER BY count DESC"
+            )
+
+        branches = []
+        for i, column in enumerate(column_names):
+            selected = ", ".join(other if other == column else f"NULL AS {other}" for other in column_names)
+            branches.append(
+                f"SELECT {selected}, count, total_count FROM ("
+                f"SELECT {column}, COUNT(*) AS count, "
+                f"ROW_NUMBER() OVER (ORDER BY COUNT(*) DESC) AS value_rank, "
+                f"SUM(COUNT(*)) OVER () AS total_count "
+                f"FROM {schema}.{table_name} WHERE {column} IS NOT NULL GROUP BY {column}"
+                f") AS ranked_values_{i} WHERE value_rank <= {limit}"
+            )
+        return f"{' UNION ALL '.join(branches)} ORDER BY count DESC"
+
+    async def histogram(
+        self, column_names: List[str], table_name: str, schema: str,
+        db_type: Optional[DatabaseType] = None, bins: int = HISTOGRAM_SQL_BUCKETS
+    ):
+        # FLOOR-based binning works on both PostgreSQL and MySQL, unlike width_bucket.
+        stats = ", ".join(
+            f"MIN({column}) AS min_value_{i}, MAX({column}) AS max_value_{i}" for i, column in enumerate(column_names)
+        )
+        branches = []
+        for i, column in enumerate(column_names):
+            # The offset is scaled by the bucket count, which overflows integer columns with wide ranges.
+            offset = f"{self.as_double(column, db_type)} - stats.min_value_{i}"
+            value_range = f"{self.as_double(f'stats.max_value_{i}', db_type)} - stats.min_value_{i}"
+            bucket = f"COALESCE(LEAST(FLOOR(({offset}) * {bins} / NULLIF({value_range}, 0)), {bins - 1}), 0)"
+            branches.append(
+                f"SELECT {i} AS column_index, {bucket} AS bucket, COUNT(*) AS count, "
+                f"MIN(stats.min_value_{i}) AS min_value, MIN(stats.max_value_{i}) AS max_value "
+                f"FROM {schema}.{table_name} CROSS JOIN stats WHERE {column} IS NOT NULL GROUP BY 2"
+            )
+        return f"WITH stats AS (SELECT {stats} FROM {schema}.{table_name}) {' UNION ALL '.join(branches)} ORDER BY 1, 2"
+
+    @staticmethod
+    def as_double(expression: str, db_type: Optional[DatabaseType]) -> str:
+        # MySQL only accepts DOUBLE as a cast target.
+        target = "DOUBLE" if db_type == DatabaseType.MYSQL else "DOUBLE PRECISION"
+        return f"CAST({expression} AS {target})"
+
+    async def rows(self, column_names: List[str], table_name: str, schema: str, limit: int = TABLE_ROWS_LIMIT):
+        return await self.column_info(column_names, table_name, schema, limit)
+
+    async def aggregate_query(
+        self, aggregation: str, column_names: List[str], table_name: str, schema: str, db_type: DatabaseType
+    ):
+        if aggregation == "value_counts":
+            return await self.value_counts(
+                column_names, table_name, schema, db_type, Settings.REPORTS_VALUE_COUNTS_LIMIT)
+        if aggregation == "histogram":
+            return await self.histogram(column_names, table_name, schema, db_type)
+        if aggregation == "rows":
+            return await self.rows(column_names, table_name, schema)
+        raise ValueError(f"Unsupported aggregation: {aggregation}")
+
+    async def create_definition(self, definition: ReportDefinitionCreate) -> ReportDefinition:
+        definition_dict = definition.model_dump()
+        result = await self.definitions.insert_one(definition_dict)
+        definition_dict["id"] = str(result.inserted_id)
+        return ReportDefinition(**definition_dict)
+
+    async def get_definition(self, report_id: str) -> Optional[ReportDefinition]:
+        try:
+            definition = await self.definitions.find_one({"_id": ObjectId(report_id)})
+            if definition:
+                definition["id"] = str(definition["_id"])
+                del definition["_id"]
+                return ReportDefinition(**definition)
+            return None
+        except Exception:
+            return None
+
+    async def get_definitions(self, query: Optional[Dict[str, Any]] = None) -> List[ReportDefinition]:
+        try:
+            definitions = []
+            async for definition in self.definitions.find(query or {}):
+                definition["id"] = str(definition["_id"])
+                del definition["_id"]
+                definitions.append(ReportDefinition(**definition))
+            return definitions
+        except Exception as e:
+            print(f"Exception in get_definitions: {e}")
+            return []
+
+    async def delete_definition(self, report_id: str) -> bool:
+        try:
+            result = await self.definitions.delete_one({"_id": ObjectId(report_id)})
+            await self.snapshots.delete_one({"report_id": report_id})
+            return result.deleted_count > 0
+        except Exception:
+            return False
+
+    async def save_snapshot(self, snapshot: ReportSnapshot) -> None:
+        # Chart keys are "table.column", and dotted field names are awkward in Mongo, so charts are stored as a list.
+        snapshot_dict = snapshot.model_dump()
+        snapshot_dict["charts"] = [{"key": key, "graphs": graphs} for key, graphs in snapshot.charts.items()]
+
+        await self.snapshots.replace_one({"report_id": snapshot.report_id}, snapshot_dict, upsert=True)
+        await self.definitions.update_one(
+            {"_id": ObjectId(snapshot.report_id)},
+            {"$set": {"last_refreshed_at": snapshot.refreshed_at}}
+        )
+
+    async def get_snapshot(self, report_id: str) -> Optional[ReportSnapshot]:
+        try:
+            snapshot = await self.snapshots.find_one({"report_id": report_id})
+            if snapshot:
+                snapshot["charts"] = {chart["key"]: chart["graphs"] for chart in snapshot["charts"]}
+                del snapshot["_id"]
+                return ReportSnapshot(**snapshot)
+            return None
+        except Exception:
+            return None
+
+    async def get_stale_definitions(self, now: datetime) -> List[ReportDefinition]:
+        definitions = await self.get_definitions({"refresh_interval_minutes": {"$ne": None}})
+        return [
+            definition for definition in definitions
+            if definition.last_refreshed_at is None
+            or (now - definition.last_refreshed_at).total_seconds() >= definition.refresh_interval_minutes * 60
+        ]
@@ -1,11 +1,14 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends, Header, status
 
-from src.config.dependencies import get_report_service
+from src.config.dependencies import get_report_service, get_stored_report_service
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.reports.models.models import ReportDefinitionCreate, ReportDefinitionSummary
 from src.modules.reports.schemas.GraphRequest import GraphRequest
 from src.modules.reports.service import ReportService
+from src.utils.ResponseErrorModel import ResponseError
+from src.utils.ResponseManager import ResponseManager
 
 router = APIRouter()
 
@@ -20,3 +23,100 @@ async def generate_charts(
 
     result = await service.create_graph(connection, graph_requests, lang)
     return result
+
+
+@router.post("/definitions", tags=["reports"], responses={200: {"model": ReportDefinitionSummary, "description": "Report saved successfully"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def create_report(report_data: ReportDefinitionCreate, service: ReportService = Depends(get_stored_report_service)):
+    """
+    Saves a report definition whose charts are materialized and refreshed on its interval.
+
+    Args:
+        report_data (ReportDefinitionCreate): Charts, credentials and refresh interval of the report.
+
+    Returns:
+        ReportDefinitionSummary: The stored report definition, without its credentials.
+    """
+    try:
+        result = ReportDefinitionSummary.from_definition(await service.create_report(report_data))
+        return ResponseManager.success_response(result, status_code=status.HTTP_200_OK)
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.get("/definitions", tags=["reports"], responses={200: {"model": List[ReportDefinitionSummary], "description": "Reports retrieved successfully"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def get_reports(user_id: str, service: ReportService = Depends(get_stored_report_service)):
+    """
+    Retrieves the report definitions of a user.
+
+    Args:
+        user_id (str): The ID of the user.
+
+    Returns:
+        List[ReportDefinitionSummary]: The user's report definitions, without their credentials.
+    """
+    try:
+        result = [ReportDefinitionSummary.from_definition(definition) for definition in await service.get_reports(user_id)]
+        return ResponseManager.success_response(result, status_code=status.HTTP_200_OK)
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.get("/definitions/{report_id}/charts", tags=["reports"], responses={404: {"model": ResponseError, "description": "Report not found"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def get_report_charts(report_id: str, refresh: bool = False, service: ReportService = Depends(get_stored_report_service)):
+    """
+    Serves the last materialized charts of a report.
+
+    Args:
+        report_id (str): The ID of the report.
+        refresh (bool): Recompute the charts before returning them. Defaults to False.
+
+    Returns:
+        dict: The charts of the report and the time they were computed.
+    """
+    try:
+        result = await service.get_report_charts(report_id, refresh)
+        if result:
+            return ResponseManager.success_response(result, status_code=status.HTTP_200_OK)
+        return ResponseManager.error_response("Report not found", status_code=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.post("/definitions/{report_id}/refresh", tags=["reports"], responses={404: {"model": ResponseError, "description": "Report not found"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def refresh_report(report_id: str, service: ReportService = Depends(get_stored_report_service)):
+    """
+    Recomputes and stores the charts of a report.
+
+    Args:
+        report_id (str): The ID of the report.
+
+    Returns:
+        dict: The refreshed charts of the report and the time they were computed.
+    """
+    try:
+        result = await service.get_report_charts(report_id, refresh=True)
+        if result:
+            return ResponseManager.success_response(result, status_code=status.HTTP_200_OK)
+        return ResponseManager.error_response("Report not found", status_code=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@router.delete("/definitions/{report_id}", tags=["reports"], responses={404: {"model": ResponseError, "description": "Report not found"}, 500: {"model": ResponseError, "description": "Internal Server Error"}})
+async def delete_report(report_id: str, service: ReportService = Depends(get_stored_report_service)):
+    """
+    Deletes a report definition and its materialized charts.
+
+    Args:
+        report_id (str): The ID of the report.
+
+    Returns:
+        dict: A message confirming the deletion.
+    """
+    try:
+        result = await service.delete_report(report_id)
+        if result:
+            return ResponseManager.success_response({"message": "Report deleted successfully"}, status_code=status.HTTP_200_OK)
+        return ResponseManager.error_response("Report not found", status_code=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return ResponseManager.error_response(str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,88 +1,229 @@
-from typing import Dict, List
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
 
-import pandas as pd
+from fastapi.encoders import jsonable_encoder
 
 from src.adapters.queries.QueryAdapter import QueryAdapter
+from src.config.constants import Settings
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.queries.utils.DatabaseManagerFactory import DatabaseManagerFactory
+from src.modules.reports.models.models import (
+    ColumnProfile,
+    ReportDefinition,
+    ReportDefinitionCreate,
+    ReportSnapshot,
+)
 from src.modules.reports.repositories.repository import ReportRepository
 from src.modules.reports.schemas.GraphRequest import GraphRequest
 from src.modules.reports.utils.AdditionalInfo import AdditionalInfoClient
+from src.modules.reports.utils.chart_pool import ChartPool
+from src.modules.reports.utils.column_profile import (
+    ColumnProfileCache,
+    split_column_profiles,
+)
 from src.modules.reports.utils.graph_factory import GRAPH_SUGGESTIONS, GraphFactory
+from src.utils.Bulkhead import run_blocking
 
 
 class ReportService:
-    def __init__(self, report_repository: ReportRepository, query_adapter: QueryAdapter) -> None:
+    def __init__(self, report_repository: ReportRepository, query_adapter: QueryAdapter, max_concurrency: Optional[int] = None) -> None:
         self.report_repository = report_repository
         self.query_adapter = query_adapter
-
-    async def infer_column_types(self, df: pd.DataFrame) -> dict:
-        column_type = ""
-
-        for col in df.columns:
-            unique_vals = df[col].dropna().unique()
-            num_unique = len(unique_vals)
-
-            if pd.api.types.is_numeric_dtype(df[col]):
-                if num_unique <= 10:
-                    column_type = "categorical"
-                else:
-                    column_type = "numerical"
-            elif pd.api.types.is_datetime64_any_dtype(df[col]):
-                column_type = "datetime"
-            elif pd.api.types.is_string_dtype(df[col]):
-                if num_unique <= 20:
-                    column_type = "categorical"
-                else:
-                    column_type = "text"
+        self.max_concurrency = max_concurrency or Settings.REPORTS_MAX_CONCURRENCY
+
+    async def infer_column_types(self, profile: ColumnProfile) -> str:
+        if profile.dtype == "numeric":
+            return "categorical" if profile.distinct_count <= 10 else "numerical"
+        if profile.dtype == "datetime":
+            return "datetime"
+        if profile.dtype == "string":
+            return "categorical" if profile.distinct_count <= 20 else "text"
+        return "unknown"
+
+    async def run_query(self, sql_query: str, connection: DatabaseConnection, semaphore: asyncio.Semaphore) -> List[dict]:
+        async with semaphore:
+            return await run_blocking(self.query_adapter.execute_query, sql_query, connection)
+
+    async def get_column_profiles(
+        self, connection: DatabaseConnection, table_name: str, column_names: List[str], semaphore: asyncio.Semaphore
+    ) -> Dict[str, ColumnProfile]:
+        fingerprint = DatabaseManagerFactory.fingerprint(connection)
+        profiles = {}
+        missing_columns = []
+
+        for column_name in column_names:
+            profile = ColumnProfileCache.get((fingerprint, connection.schema_name, table_name, column_name))
+            if profile is None:
+                missing_columns.append(column_name)
             else:
-                column_type = "unknown"
-
-        return column_type
-
-    async def get_table_data(self, connection: DatabaseConnection, table_name: str, column_name: str, schema: str) -> pd.DataFrame:
-        sql_query = await self.report_repository.column_info(column_name, table_name, schema)
-        info = self.query_adapter.execute_query(sql_query, connection)
-        df = pd.DataFrame(info)
-        return df
+                profiles[column_name] = profile
+
+        if missing_columns:
+            sql_query = await self.report_repository.column_profile(
+                missing_columns, table_name, connection.schema_name, Settings.REPORTS_SAMPLE_SIZE, connection.db_type)
+            info = await self.run_query(sql_query, connection, semaphore)
+
+            for column_name, profile in split_column_profiles(info[0] if info else {}, missing_columns).items():
+                ColumnProfileCache.set((fingerprint, connection.schema_name, table_name, column_name), profile)
+                profiles[column_name] = profile
+
+        return profiles
+
+    async def get_aggregated_rows(
+        self,
+        connection: DatabaseConnection,
+        table_name: str,
+        aggregation: str,
+        column_names: List[str],
+        semaphore: asyncio.Semaphore
+    ) -> List[dict]:
+        sql_query = await self.report_repository.aggregate_query(
+            aggregation, column_names, table_name, connection.schema_name, connection.db_type)
+        return await self.run_query(sql_query, connection, semaphore)
 
     async def extract_language(self, accept_language: str) -> str:
         return accept_language.split(',')[0].split(';')[0].strip()
 
+    async def describe_charts(self, chart_configs: List[dict], language: str, semaphore: asyncio.Semaphore) -> None:
+        if not chart_configs:
+            return
+
+        async with semaphore:
+            info_client = AdditionalInfoClient()
+            summaries = await run_blocking(info_client.get_additional_infos, chart_configs, language)
+
+        for chart_config, summary in zip(chart_configs, summaries):
+            chart_config["additional_info"] = summary
+
+    async def build_table_graphs(
+        self, connection: DatabaseConnection, table_name: str, column_names: List[str], semaphore: asyncio.Semaphore
+    ) -> Dict[str, Union[List[dict], str]]:
+        profiles = await self.get_column_profiles(connection, table_name, column_names, semaphore)
+
+        graphs_by_column = {}
+        for column_name in column_names:
+            column_type = await self.infer_column_types(profiles[column_name])
+            if column_type in GRAPH_SUGGESTIONS:
+                graphs_by_column[column_name] = [graph_cls() for graph_cls in GraphFactory.get_graphs(column_type)]
+
+        # One query per aggregation covers every column of the table that needs it.
+        columns_by_aggregation: Dict[str, List[str]] = {}
+        for column_name, graphs in graphs_by_column.items():
+            for graph in graphs:
+                aggregation_columns = columns_by_aggregation.setdefault(graph.aggregation, [])
+                if column_name not in aggregation_columns:
+                    aggregation_columns.append(column_name)
+
+        aggregations = list(columns_by_aggregation)
+        rows = await asyncio.gather(*(
+            self.get_aggregated_rows(connection, table_name, aggregation, columns_by_aggregation[aggregation], semaphore)
+            for aggregation in aggregations
+        ))
+        charts = await ChartPool.render(dict(zip(aggregations, rows)), columns_by_aggregation, graphs_by_column)
+
+        return {
+            column_name: charts[column_name] if column_name in charts else "No Charts available for this type of data."
+            for column_name in column_names
+        }
+
     async def create_graph(
-        self, connection: DatabaseConnection, graph_requests: List[GraphRequest], accept_language: str
+        self,
+        connection: DatabaseConnection,
+        graph_requests: List[GraphRequest],
+        accept_language: str,
+        on_progress: Optional[Callable[[float, str], None]] = None,
     ) -> Dict[str, dict]:
-        graphs_output = {}
-        schema = connection.schema_name
-
+        """
+        Builds the charts of every requested column.
+
+        Each table costs one profiling query (skipped when cached) plus one aggregate query per
+        chart aggregation, whatever the number of requested columns. Tables are processed
+        concurrently, bounded by `max_concurrency` in-flight queries, and every chart description
+        comes from a single cached LLM call. Charts are computed off the event loop, in worker
+        processes for large tables (see ChartPool). The output keeps the order of the requests.
+        `on_progress(fraction, message)` is called as each table finishes.
+        """
         language = await self.extract_language(accept_language)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        finished = []
 
-        for request in graph_requests:
-            table_name = request.table
-            columns = request.columns
+        async def build(request: GraphRequest) -> Dict[str, Union[List[dict], str]]:
+            table_graphs = await self.build_table_graphs(connection, request.table, list(dict.fromkeys(request.columns)), semaphore)
+            finished.append(request.table)
+            if on_progress:
+                # Chart descriptions are the last step, so tables only account for most of the work.
+                on_progress(0.9 * len(finished) / len(graph_requests), f"Charts built for {request.table}")
+            return table_graphs
 
-            for col in columns:
-                df = await self.get_table_data(connection, table_name, col, schema)
-                column_type = await self.infer_column_types(df)
+        tables_graphs = await asyncio.gather(*(build(request) for request in graph_requests))
 
-                graph_classes = GraphFactory.get_graphs(column_type)
-                column_graphs = []
-
-                if column_type not in GRAPH_SUGGESTIONS:
-                    column_graphs = "No Charts available for this type of data."
-                else:
-                    for graph_cls in graph_classes:
-                        graph_instance = graph_cls()
-                        chart_config = graph_instance.generate(col, df)
-
-                        info_client = AdditionalInfoClient()
-                        additional_info = info_client.get_additional_info(chart_config)
-
-                        if language == 'es':
-                            additional_info = info_client.translate(additional_info)
-
-                        chart_config["additional_info"] = additional_info
-                        column_graphs.append(chart_config)
+        graphs_output = {}
+        for request, table_graphs in zip(graph_requests, tables_graphs):
+            for column_name, column_graphs in table_graphs.items():
+                graphs_output[f"{request.table}.{column_name}"] = column_graphs
 
-                graphs_output[f"{table_name}.{col}"] = column_graphs
+        chart_configs = [
+            chart_config
+            for column_graphs in graphs_output.values() if isinstance(column_graphs, list)
+            for chart_config in column_graphs
+        ]
+        await self.describe_charts(chart_configs, language, semaphore)
 
         return graphs_output
+
+    async def create_report(self, definition: ReportDefinitionCreate) -> ReportDefinition:
+        return await self.report_repository.create_definition(definition)
+
+    async def get_report(self, report_id: str) -> Optional[ReportDefinition]:
+        return await self.report_repository.get_definition(report_id)
+
+    async def get_reports(self, user_id: str) -> List[ReportDefinition]:
+        return await self.report_repository.get_definitions({"user": user_id})
+
+    async def delete_report(self, report_id: str) -> bool:
+        return await self.report_repository.delete_definition(report_id)
+
+    async def refresh_report(self, definition: ReportDefinition) -> ReportSnapshot:
+        connection = DatabaseConnection(**definition.credentials)
+        charts = await self.create_graph(connection, definition.graph_requests, definition.language)
+
+        snapshot = ReportSnapshot(
+            report_id=definition.id,
+            charts=jsonable_encoder(charts),
+            refreshed_at=datetime.utcnow()
+        )
+        await self.report_repository.save_snapshot(snapshot)
+        return snapshot
+
+    async def get_report_charts(self, report_id: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Serves the materialized charts of a report.
+
+        The stored snapshot is returned as is, with the time it was computed, unless `refresh`
+        is set or no snapshot exists yet, in which case the charts are recomputed and stored.
+        """
+        definition = await self.report_repository.get_definition(report_id)
+        if not definition:
+            return None
+
+        snapshot = None if refresh else await self.report_repository.get_snapshot(report_id)
+        if snapshot is None:
+            snapshot = await self.refresh_report(definition)
+
+        return {
+            "report_id": report_id,
+            "name": definition.name,
+            "charts": snapshot.charts,
+            "refreshed_at": snapshot.refreshed_at,
+        }
+
+    async def refresh_stale_reports(self) -> int:
+        refreshed = 0
+        for definition in await self.report_repository.get_stale_definitions(datetime.utcnow()):
+            try:
+                await self.refresh_report(definition)
+                refreshed += 1
+            except Exception as e:
+                print(f"Failed to refresh report {definition.id}: {e}")
+        return refreshed
@@ -1,48 +1,113 @@
-from typing import Dict
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
 
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_openai import ChatOpenAI
 
 from src.config.constants import Settings
-from src.modules.reports.prompts.additional_info import (
-    ADDITIONAL_INFO_PROMPT,
-    TRANSLATE_PROMPT,
-)
+from src.modules.reports.prompts.additional_info import BATCH_ADDITIONAL_INFO_PROMPT
+from src.utils.LLMGateway import DEFAULT_PROVIDER, LLMGateway, parse_targets
+from src.utils.SingleFlight import SingleFlight
+from src.utils.TTLCache import TTLCache
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "es": "Spanish",
+}
 
 
 class AdditionalInfoClient:
+    # Narratives only depend on the chart config and the language, so they are shared by every user.
+    _narratives = TTLCache(max_entries=5000, ttl_seconds=Settings.REPORTS_NARRATIVE_TTL_SECONDS)
+    # A report opened by many users at once misses the cache for all of them; only one prompt goes out.
+    _prompt_flights = SingleFlight()
+
     def __init__(self):
         self.api_key = Settings.TEXTTOSQL_API_KEY
         self.base_url = Settings.TEXTTOSQL_BASE_URL
         self.model_name = Settings.TEXTTOSQL_MODEL_NAME
         self.MODEL_TEMPERATURE = Settings.TEXTTOSQL_TEMPERATURE
+        self.targets = parse_targets(DEFAULT_PROVIDER, self.model_name)
         self.llm = self._connect()
+        self._fallbacks: Dict[Tuple[str, str], BaseChatModel] = {}
 
-    def _connect(self) -> ChatGoogleGenerativeAI:
+    def _connect(self, provider: str = DEFAULT_PROVIDER, model: Optional[str] = None) -> BaseChatModel:
+        # Retries are left to the LLM gateway, so both SDKs are asked for a single attempt. The chat
+        # model of langchain-google-genai 2.0 ignores max_retries and still retries Google API errors
+        # once on its own.
+        if provider == "openai":
+            return ChatOpenAI(
+                model=model,
+                api_key=Settings.OPENAI_API_KEY,
+                base_url=Settings.OPENAI_BASE_URL,
+                temperature=self.MODEL_TEMPERATURE,
+                max_tokens=Settings.REPORTS_NARRATIVE_MAX_TOKENS,
+                max_retries=0
+            )
         return ChatGoogleGenerativeAI(
-            model=self.model_name,
+            model=model or self.model_name,
             google_api_key=self.api_key,
             temperature=self.MODEL_TEMPERATURE,
-            max_output_tokens=200,
-            stop=[";"]
+            max_output_tokens=Settings.REPORTS_NARRATIVE_MAX_TOKENS,
+            max_retries=0
         )
 
-    def get_additional_info(self, graph: Dict[str, dict]) -> str:
-        message = ADDITIONAL_INFO_PROMPT.format(
-            graph=graph
+    def _invoke(self, message: str) -> str:
+        def call(provider: str, model: str):
+            if (provider, model) == self.targets[0]:
+                llm = self.llm
+            else:
+                if (provider, model) not in self._fallbacks:
+                    self._fallbacks[(provider, model)] = self._connect(provider, model)
+                llm = self._fallbacks[(provider, model)]
+            return llm.invoke([HumanMessage(content=message)])
+
+        return LLMGateway.invoke(self.targets, call).content
+
+    @staticmethod
+    def narrative_key(graph: Dict[str, dict], language: str) -> str:
+        config = json.dumps(graph, sort_keys=True, default=str)
+        return hashlib.sha256(f"{language}:{config}".encode()).hexdigest()
+
+    def get_additional_infos(self, graphs: List[Dict[str, dict]], language: str) -> List[Optional[str]]:
+        """
+        Summarizes several graphs with a single prompt, written directly in `language`.
+
+        Summaries are cached by chart config and language, so only graphs never seen before
+        reach the model. Graphs whose summary could not be generated get None.
+        """
+        language = language.split('-')[0].lower()
+        keys = [self.narrative_key(graph, language) for graph in graphs]
+        summaries = [self._narratives.get(key) for key in keys]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+
+        if missing:
+            try:
+                for i, summary in zip(missing, self._summarize([graphs[i] for i in missing], language)):
+                    summaries[i] = summary
+                    self._narratives.set(keys[i], summary)
+            except Exception as e:
+                # Failures are not cached, the next render retries them.
+                print(f"Error generating graph summaries: {e}")
+
+        return summaries
+
+    def _summarize(self, graphs: List[Dict[str, dict]], language: str) -> List[str]:
+        message = BATCH_ADDITIONAL_INFO_PROMPT.format(
+            language=LANGUAGE_NAMES.get(language, LANGUAGE_NAMES["en"]),
+            count=len(graphs),
+            graphs=json.dumps(graphs, default=str)
         )
-        try:
-            llm_response = self.llm.invoke([HumanMessage(content=message)])
-            return llm_response.content
-        except Exception as e:
-            return e
-
-    def translate(self, text: str) -> str:
-        message = TRANSLATE_PROMPT.format(
-            text=text
+        content = self._prompt_flights.do(
+            (self.model_name, message), lambda: self._invoke(message)
         )
-        try:
-            llm_response = self.llm.invoke([HumanMessage(content=message)])
-            return llm_response.content
-        except Exception as e:
-            return e
+        summaries = json.loads(re.sub(r"```[a-zA-Z]*", "", content).strip())
+
+        if not isinstance(summaries, list) or len(summaries) != len(graphs):
+            raise ValueError(f"Expected {len(graphs)} summaries, got: {content}")
+
+        return [str(summary) for summary in summaries]
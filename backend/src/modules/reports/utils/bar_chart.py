@@ -1,18 +1,30 @@
 import pandas as pd
 
+from src.config.constants import Settings
+
 from .base_graph import BaseGraph
+from .downsampling import downsample_series, is_series, top_n_with_other
 
 
 class BarChart(BaseGraph):
+    aggregation = "value_counts"
+    top_n = Settings.REPORTS_TOP_N
+    max_points = Settings.REPORTS_MAX_POINTS
+
     def generate(self, column: str, df: pd.DataFrame) -> dict:
-        data = df[column].value_counts()
+        labels, counts = [], []
+        if not df.empty and is_series(df[column]):
+            labels, counts = downsample_series(df[column], df["count"], self.max_points)
+        elif not df.empty:
+            total_count = df["total_count"].iloc[0] if "total_count" in df else None
+            labels, counts = top_n_with_other(df[column].tolist(), df["count"].tolist(), self.top_n, total_count)
         return {
             "type": "bar",
             "data": {
-                "labels": list(data.index),
+                "labels": labels,
                 "datasets": [{
                     "label": column,
-                    "data": [int(val) for val in data.values],
+                    "data": [int(val) for val in counts],
                     "backgroundColor": "rgba(75, 192, 192, 0.2)",
                     "borderColor": "rgba(75, 192, 192, 1)",
                     "borderWidth": 1,
@@ -4,6 +4,9 @@ import pandas as pd
 
 
 class BaseGraph(ABC):
+    # Name of the ReportRepository aggregate query whose result set is passed to `generate`.
+    aggregation: str = "rows"
+
     @abstractmethod
     def generate(self, column: str, df: pd.DataFrame) -> dict:
         pass
@@ -0,0 +1,83 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+STRATEGIES = ("fd", "sturges", "fixed")
+MAX_BINS = 100
+# The Freedman–Diaconis IQR is estimated on an evenly strided subset above this many values.
+QUANTILE_SAMPLE_SIZE = 1_000_000
+
+
+def weighted_quantiles(values: np.ndarray, weights: np.ndarray, quantiles: np.ndarray) -> np.ndarray:
+    """Quantiles of sorted `values` where each value occurs `weights` times."""
+    cumulative = np.cumsum(weights)
+    return values[np.searchsorted(cumulative, quantiles * cumulative[-1], side="left").clip(0, len(values) - 1)]
+
+
+def bin_count(values: np.ndarray, weights: Optional[np.ndarray], strategy: str, bins: int) -> int:
+    """Number of equal-width bins for `values` under a Freedman–Diaconis, Sturges or fixed strategy."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unsupported histogram strategy: {strategy}")
+    if strategy == "fixed":
+        return bins
+
+    n = float(weights.sum()) if weights is not None else float(values.size)
+    sturges = int(np.ceil(np.log2(n))) + 1 if n > 1 else 1
+    if strategy == "sturges":
+        return min(sturges, MAX_BINS)
+
+    if weights is None:
+        step = max(values.size // QUANTILE_SAMPLE_SIZE, 1)
+        q1, q3 = np.percentile(values[::step], [25, 75])
+    else:
+        order = np.argsort(values, kind="stable")
+        q1, q3 = weighted_quantiles(values[order], weights[order], np.array([0.25, 0.75]))
+    width = 2 * (q3 - q1) / np.cbrt(n)
+    if width <= 0:
+        return min(sturges, MAX_BINS)
+    return int(min(max(np.ceil((values.max() - values.min()) / width), 1), MAX_BINS))
+
+
+def compute_histogram(
+    values: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    strategy: str = "fd",
+    bins: int = 10,
+    log_scale: bool = False,
+    value_range: Optional[Tuple[float, float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bins `values` into equal-width buckets and returns `(counts, edges)`.
+
+    NaN and ±inf are ignored, as are non-positive values on a log scale. The finite values are
+    only copied when some of them have to be dropped, and counting is a single np.bincount.
+    `weights` lets pre-aggregated buckets (e.g. SQL bucket midpoints and their counts) be re-binned,
+    with `value_range` keeping the edges on the range of the original data.
+    """
+    values = np.asarray(values, dtype=float)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+    valid = np.isfinite(values)
+    if log_scale:
+        valid &= values > 0
+    if not valid.all():
+        values = values[valid]
+        weights = weights[valid] if weights is not None else None
+
+    if values.size == 0:
+        return np.zeros(0, dtype=int), np.zeros(0)
+
+    scaled = np.log10(values) if log_scale else values
+    count = bin_count(scaled, weights, strategy, bins)
+    low, high = scaled.min(), scaled.max()
+    if value_range is not None and (not log_scale or min(value_range) > 0):
+        low, high = np.log10(value_range) if log_scale else value_range
+    if high == low:
+        high = low + 1
+
+    indices = ((scaled - low) * (count / (high - low))).astype(np.intp)
+    np.clip(indices, 0, count - 1, out=indices)
+    counts = np.bincount(indices, weights=weights, minlength=count).astype(int)
+
+    edges = np.linspace(low, high, count + 1)
+    return counts, (10 ** edges if log_scale else edges)
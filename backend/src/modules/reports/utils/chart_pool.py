@@ -0,0 +1,89 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.config.constants import Settings
+from src.utils.Bulkhead import run_blocking
+
+from .base_graph import BaseGraph
+from .utils import split_aggregated_data
+
+
+def render_charts(
+    rows_by_aggregation: Dict[str, List[dict]],
+    columns_by_aggregation: Dict[str, List[str]],
+    graphs_by_column: Dict[str, List[BaseGraph]],
+) -> Dict[str, List[dict]]:
+    """The CPU-bound stage of a table: frames from the fetched rows, then every chart of every column."""
+    data = {
+        # object dtype keeps integer labels from being widened to float by the NULLs of other columns.
+        aggregation: split_aggregated_data(aggregation, pd.DataFrame(rows, dtype=object), columns_by_aggregation[aggregation])
+        for aggregation, rows in rows_by_aggregation.items()
+    }
+    return {
+        column_name: [graph.generate(column_name, data[graph.aggregation][column_name]) for graph in graphs]
+        for column_name, graphs in graphs_by_column.items()
+    }
+
+
+class ChartPool:
+    """
+    Runs `render_charts` off the event loop.
+
+    Tables with at least REPORTS_CHART_PROCESS_MIN_CELLS fetched cells go to a process pool of
+    REPORTS_CHART_WORKERS workers, so big reports use every core instead of holding the GIL of
+    the worker that serves the other requests. Smaller ones are not worth the transfer and run
+    on a thread. The aggregate queries cap the rows of each column (REPORTS_VALUE_COUNTS_LIMIT
+    values, histogram buckets, a 100-row sample), so it is the number of columns that makes a
+    table big: the value counts of n columns come back as up to n * limit rows of n columns. The rows cross to the worker as they came from the driver and the frames are
+    built there, so no DataFrame is ever pickled. Workers are spawned rather than forked, since
+    the server has threads (and their locks) that a fork would copy.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def executor(cls) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=Settings.REPORTS_CHART_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return cls._executor
+
+    @classmethod
+    async def render(
+        cls,
+        rows_by_aggregation: Dict[str, List[dict]],
+        columns_by_aggregation: Dict[str, List[str]],
+        graphs_by_column: Dict[str, List[BaseGraph]],
+    ) -> Dict[str, List[dict]]:
+        args = (rows_by_aggregation, columns_by_aggregation, graphs_by_column)
+        cells = sum(len(rows) * len(columns_by_aggregation[aggregation]) for aggregation, rows in rows_by_aggregation.items())
+        if cells < Settings.REPORTS_CHART_PROCESS_MIN_CELLS:
+            return await run_blocking(render_charts, *args)
+
+        executor = cls.executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, render_charts, *args)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); the next report gets a new pool.
+            print(f"Chart process pool broken, rendering on a thread: {e}")
+            with cls._lock:
+                if cls._executor is executor:
+                    cls._executor = None
+            return await run_blocking(render_charts, *args)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,75 @@
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config.constants import Settings
+from src.modules.reports.models.models import ColumnProfile
+from src.utils.TTLCache import TTLCache
+
+ProfileKey = Tuple[str, Optional[str], str, str]
+
+
+def infer_dtype(value: Any) -> str:
+    if value is None:
+        return "unknown"
+    if isinstance(value, (bool, int, float, Decimal)):
+        return "numeric"
+    if isinstance(value, (datetime, date, dt_time)):
+        return "datetime"
+    if isinstance(value, str):
+        return "string"
+    return "unknown"
+
+
+def build_column_profile(row: Dict[str, Any]) -> ColumnProfile:
+    row_count = int(row.get("row_count") or 0)
+    non_null_count = int(row.get("non_null_count") or 0)
+    min_value = row.get("min_value")
+
+    return ColumnProfile(
+        row_count=row_count,
+        null_ratio=1 - non_null_count / row_count if row_count else 0.0,
+        distinct_count=int(row.get("distinct_count") or 0),
+        min_value=min_value,
+        max_value=row.get("max_value"),
+        dtype=infer_dtype(min_value),
+    )
+
+
+def split_column_profiles(row: Dict[str, Any], column_names: List[str]) -> Dict[str, ColumnProfile]:
+    """Maps the indexed aliases of a batched ReportRepository.column_profile row back to each column."""
+    return {
+        column: build_column_profile({
+            "row_count": row.get("row_count"),
+            "non_null_count": row.get(f"non_null_count_{i}"),
+            "distinct_count": row.get(f"distinct_count_{i}"),
+            "min_value": row.get(f"min_value_{i}"),
+            "max_value": row.get(f"max_value_{i}"),
+        })
+        for i, column in enumerate(column_names)
+    }
+
+
+class ColumnProfileCache:
+    """
+    Process-wide LRU of column profiles keyed by (connection fingerprint, schema, table, column).
+
+    Entries expire after REPORTS_PROFILE_TTL_SECONDS, which bounds how long a schema change
+    can go unnoticed; `invalidate` drops them earlier.
+    """
+    _profiles = TTLCache(max_entries=10000, ttl_seconds=Settings.REPORTS_PROFILE_TTL_SECONDS)
+
+    @classmethod
+    def get(cls, key: ProfileKey) -> Optional[ColumnProfile]:
+        return cls._profiles.get(key)
+
+    @classmethod
+    def set(cls, key: ProfileKey, profile: ColumnProfile) -> None:
+        cls._profiles.set(key, profile)
+
+    @classmethod
+    def invalidate(cls, table_name: Optional[str] = None) -> None:
+        if table_name is None:
+            cls._profiles.clear()
+        else:
+            cls._profiles.delete_where(lambda key: key[2] == table_name)
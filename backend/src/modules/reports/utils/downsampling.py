@@ -0,0 +1,87 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+OTHER_LABEL = "Other"
+
+
+def top_n_with_other(
+    labels: List, counts: List[int], top_n: int, total_count: Optional[int] = None
+) -> Tuple[List, List[int]]:
+    """
+    Keeps the `top_n` most frequent labels and folds the rest into an "Other" bucket.
+
+    `total_count` is the count of all rows, including values that were never fetched, so the
+    "Other" bucket also covers what the database cut off.
+    """
+    order = sorted(range(len(counts)), key=lambda i: counts[i], reverse=True)
+    kept = order[:top_n]
+    kept_labels = [labels[i] for i in kept]
+    kept_counts = [int(counts[i]) for i in kept]
+
+    total = int(total_count) if total_count is not None else int(sum(counts))
+    other = total - sum(kept_counts)
+    if other > 0:
+        kept_labels.append(OTHER_LABEL)
+        kept_counts.append(other)
+    return kept_labels, kept_counts
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of at most `threshold` points that preserve the visual shape of the
+    series, always keeping the first and last point. `x` must be sorted in ascending order.
+    """
+    length = len(x)
+    if threshold >= length:
+        return np.arange(length)
+    if threshold < 3:
+        raise ValueError("LTTB needs a threshold of at least 3 points")
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (length - 2) / (threshold - 2)
+    indices = np.zeros(threshold, dtype=int)
+
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_start = end
+        next_end = min(int((bucket + 2) * every) + 1, length)
+
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        areas = np.abs(
+            (x[selected] - next_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (next_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    indices[-1] = length - 1
+    return indices
+
+
+def is_series(values: pd.Series) -> bool:
+    """Numeric and datetime labels form an ordered series instead of categories."""
+    values = values.infer_objects()
+    return (
+        pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+    ) or pd.api.types.is_datetime64_any_dtype(values)
+
+
+def downsample_series(labels: pd.Series, counts: pd.Series, max_points: int) -> Tuple[List, List[int]]:
+    """Sorts a numeric or datetime series by label and LTTB-downsamples it to `max_points`."""
+    order = np.argsort(labels.to_numpy(), kind="stable")
+    labels = labels.iloc[order].reset_index(drop=True)
+    counts = counts.iloc[order].reset_index(drop=True)
+
+    x = labels.infer_objects()
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype("int64")
+    keep = lttb(x.to_numpy(dtype=float), counts.to_numpy(dtype=float), max_points)
+    return labels.iloc[keep].tolist(), [int(count) for count in counts.iloc[keep]]
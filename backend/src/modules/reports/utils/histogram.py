@@ -1,14 +1,45 @@
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
+from src.config.constants import Settings
+from src.modules.reports.repositories.repository import HISTOGRAM_BINS, HISTOGRAM_SQL_BUCKETS
+
 from .base_graph import BaseGraph
+from .binning import compute_histogram
 
 
 class Histogram(BaseGraph):
+    aggregation = "histogram"
+
+    def __init__(self, strategy: Optional[str] = None, bins: int = HISTOGRAM_BINS, log_scale: bool = False):
+        self.strategy = strategy or Settings.REPORTS_HISTOGRAM_STRATEGY
+        self.bins = bins
+        self.log_scale = log_scale
+
     def generate(self, column: str, df: pd.DataFrame) -> dict:
-        data = df[column].dropna()
-        counts, bins = pd.cut(data, bins=10, retbins=True)
-        bin_labels = [f"{round(bins[i], 2)} - {round(bins[i + 1], 2)}" for i in range(len(bins) - 1)]
-        bin_counts = counts.value_counts(sort=False)
+        bin_labels = []
+        bin_counts = []
+
+        if not df.empty:
+            if "bucket" in df:
+                # SQL buckets are re-binned through their midpoints, weighted by their counts.
+                min_value = float(df["min_value"].iloc[0])
+                max_value = float(df["max_value"].iloc[0])
+                width = (max_value - min_value) / HISTOGRAM_SQL_BUCKETS
+                values = min_value + (df["bucket"].to_numpy(dtype=float) + 0.5) * width
+                weights = df["count"].to_numpy(dtype=float)
+                value_range = (min_value, max_value)
+            else:
+                values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+                weights = None
+                value_range = None
+
+            counts, edges = compute_histogram(values, weights, self.strategy, self.bins, self.log_scale, value_range)
+            rounded = np.round(edges, 2)
+            bin_labels = [f"{low} - {high}" for low, high in zip(rounded[:-1].tolist(), rounded[1:].tolist())]
+            bin_counts = counts.tolist()
 
         return {
             "type": "bar",
@@ -16,7 +47,7 @@ class Histogram(BaseGraph):
                 "labels": bin_labels,
                 "datasets": [{
                     "label": f"Histogram of {column}",
-                    "data": bin_counts.tolist(),
+                    "data": bin_counts,
                     "backgroundColor": "rgba(75, 192, 192, 0.2)",
                     "borderColor": "rgba(75, 192, 192, 1)",
                     "borderWidth": 1,
@@ -1,18 +1,27 @@
 import pandas as pd
 
+from src.config.constants import Settings
+
 from .base_graph import BaseGraph
+from .downsampling import top_n_with_other
 
 
 class PieChart(BaseGraph):
+    aggregation = "value_counts"
+    top_n = Settings.REPORTS_TOP_N
+
     def generate(self, column: str, df: pd.DataFrame) -> dict:
-        data = df[column].value_counts()
+        labels, counts = [], []
+        if not df.empty:
+            total_count = df["total_count"].iloc[0] if "total_count" in df else None
+            labels, counts = top_n_with_other(df[column].tolist(), df["count"].tolist(), self.top_n, total_count)
         return {
             "type": "pie",
             "data": {
-                "labels": list(data.index),
+                "labels": labels,
                 "datasets": [{
                     "label": column,
-                    "data": [int(val) for val in data.values],
+                    "data": [int(val) for val in counts],
                     "backgroundColor": [
                         "rgba(255, 99, 132, 0.2)",
                         "rgba(54, 162, 235, 0.2)",
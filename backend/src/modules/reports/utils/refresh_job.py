@@ -0,0 +1,28 @@
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+from src.adapters.queries.QueryAdapter import QueryAdapter
+from src.modules.queries.service import QueryService
+from src.modules.reports.repositories.repository import ReportRepository
+from src.modules.reports.service import ReportService
+
+
+class ReportRefreshJob:
+    def __init__(self):
+        self.scheduler = AsyncIOScheduler()
+        self.trigger = IntervalTrigger(minutes=1)
+        self.scheduler.add_job(self.trigger_report_refresh, self.trigger, max_instances=1, coalesce=True)
+
+    async def trigger_report_refresh(self):
+        try:
+            query_adapter = QueryAdapter(QueryService(db_manager=None))
+            report_service = ReportService(ReportRepository(), query_adapter)
+            await report_service.refresh_stale_reports()
+            return True
+        except Exception as e:
+            print(f"Error refreshing reports: {str(e)}")
+            return False
+
+    def start(self):
+        self.scheduler.start()
+        print("Report refresh scheduler started")
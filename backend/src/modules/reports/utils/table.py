@@ -4,8 +4,12 @@ from .base_graph import BaseGraph
 
 
 class Table(BaseGraph):
+    aggregation = "rows"
+
     def generate(self, column: str, df: pd.DataFrame) -> dict:
-        if column == "*":
+        if df.empty:
+            data_subset = df
+        elif column == "*":
             data_subset = df
         else:
             cols = [col.strip() for col in column.split(",")]
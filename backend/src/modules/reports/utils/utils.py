@@ -0,0 +1,23 @@
+from typing import Dict, List
+
+import pandas as pd
+
+
+def split_aggregated_data(aggregation: str, df: pd.DataFrame, column_names: List[str]) -> Dict[str, pd.DataFrame]:
+    """Splits the result of a batched ReportRepository aggregate query into one frame per column."""
+    if df.empty:
+        return {column: pd.DataFrame() for column in column_names}
+
+    if aggregation == "value_counts":
+        fields = ["count", "total_count"] if "total_count" in df else ["count"]
+        return {
+            column: df.loc[df[column].notna(), [column, *fields]].reset_index(drop=True)
+            for column in column_names
+        }
+
+    if aggregation == "histogram":
+        groups = {index: group.reset_index(drop=True) for index, group in df.groupby("column_index")}
+        return {column: groups.get(i, pd.DataFrame()) for i, column in enumerate(column_names)}
+
+    # Row samples are shared: the Table chart selects its own columns.
+    return {column: df for column in column_names}
@@ -13,6 +13,9 @@ AI_INPUT_PROMPT = (
     Chat History (most recent last):
     {chat_history}
 
+    Previous Result:
+    {last_result}
+
     Current User Query:
     {user_input}
 
@@ -21,6 +24,11 @@ AI_INPUT_PROMPT = (
     """
 )
 
+LAST_RESULT_PROMPT = (
+    """The rows of the previous answer are available as the table last_result: {description}.
+    If the current query only filters, sorts, limits or aggregates those rows, query last_result alone, without a schema prefix."""
+)
+
 AI_ALERT_INPUT_PROMPT = (
     """
     You are an expert SQL assistant specialized in generating precise and efficient SQL queries based on user input, database type, and schema structure.
@@ -3,10 +3,12 @@ GENERATE_SYNTHETIC_DATA_PROMPT = (
     You are an SQL database analyst, and your responses must be just SQL statements (not including anything else).
     You are working with a database that contains the following structure: {db_structure}.
     The entire database is within a schema called {schema_name}.
+    This is the data the tables already contain, as row counts and the maximum primary key value of each table:
+    {data_state}
 
     Generate an INSERT statements with exactly 40 registers for EACH TABLE (if the table is the result of an n to m relationship, generate an INSERT statements with exactly 20 registers), ensuring that:
     - The inserted data makes logical sense.
-    - Previously generated data is taken into account, which means, do not duplicate id's.
+    - Existing data is taken into account, which means, do not duplicate id's: new ids start after the maximum primary key value of each table.
     - Names (varchar values) do not exceed 15 characters.
     - Do not duplicate data (specially unique values and primary keys).
     - Be careful of the foreign key constraints, and primary keys.
@@ -16,3 +18,16 @@ GENERATE_SYNTHETIC_DATA_PROMPT = (
     - Create data for all tables.
     """
 )
+
+GENERATE_VOCABULARY_PROMPT = (
+    """
+    You are helping to generate realistic test data for a database, and your response must be just a JSON object (not including anything else).
+    These are the text columns that need values, as "table.column (type)":
+    {columns}
+
+    For EACH column, return a key with the exact "table.column" name and a list of {count} realistic, distinct values, ensuring that:
+    - The values make sense for the table and the column name.
+    - Values never exceed the length of the column type.
+    - Avoid special carachters in the data.
+    """
+)
@@ -1,6 +1,7 @@
 from typing import List
 
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from src.config.database import database
 from src.modules.text_to_sql.models.models import Chat, Message
@@ -9,11 +10,13 @@ from src.modules.text_to_sql.models.models import Chat, Message
 class TextToSqlRepository:
     def __init__(self):
         self.collection = database["Chats"]
+        self.versions = database["ChatVersions"]
 
     async def create_chat(self, chat_data: Chat) -> str:
         try:
             chat_data = chat_data.dict()
             results = await self.collection.insert_one(chat_data)
+            await self.bump_chats_version(chat_data["user_id"])
             return str(results.inserted_id)
         except Exception as e:
             print(f"Error creating chat: {e}")
@@ -71,8 +74,11 @@ class TextToSqlRepository:
             bool: True if deletion was successful, False otherwise
         """
         try:
-            delete_result = await self.collection.delete_one({"_id": ObjectId(chat_id)})
-            return delete_result.deleted_count == 1
+            deleted_chat = await self.collection.find_one_and_delete({"_id": ObjectId(chat_id)})
+            if not deleted_chat:
+                return False
+            await self.bump_chats_version(deleted_chat["user_id"])
+            return True
         except Exception as e:
             print(f"Error deleting chat: {e}")
             return False
@@ -89,11 +95,44 @@ class TextToSqlRepository:
             bool: True if update was successful, False otherwise
         """
         try:
-            update_result = await self.collection.update_one(
+            updated_chat = await self.collection.find_one_and_update(
                 {"_id": ObjectId(chat_id)},
                 {"$set": {"title": new_title}}
             )
-            return update_result.modified_count == 1
+            if not updated_chat:
+                return False
+            await self.bump_chats_version(updated_chat["user_id"])
+            return True
         except Exception as e:
             print(f"Error updating chat title: {e}")
             return False
+
+    async def get_chats_version(self, user_id: str) -> int:
+        """
+        Get the version of a user's chat list.
+
+        Args:
+            user_id (str): The ID of the user who owns the chats
+
+        Returns:
+            int: A counter that changes whenever a chat is created, renamed or deleted
+        """
+        try:
+            result = await self.versions.find_one({"user_id": user_id})
+            return result["version"] if result else 0
+        except Exception as e:
+            print(f"Error getting chats version: {e}")
+            return 0
+
+    async def bump_chats_version(self, user_id: str) -> int:
+        try:
+            result = await self.versions.find_one_and_update(
+                {"user_id": user_id},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return result["version"]
+        except Exception as e:
+            print(f"Error updating chats version: {e}")
+            return 0
@@ -1,15 +1,22 @@
-from typing import Optional
+from contextlib import aclosing
+from typing import Literal, Optional
 
 from fastapi import APIRouter, Body, Depends, status
+from fastapi.responses import StreamingResponse
 
 from src.config.dependencies import (
+    get_fan_out_executor,
+    get_fan_out_lang_to_sql_service,
     get_lang_to_sql_service,
     get_synthetic_data_model_service,
 )
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.queries.schemas.FanOutRequest import FanOutRequest
+from src.modules.queries.utils.FanOutExecutor import FanOutExecutor
 from src.modules.text_to_sql.models.models import Chat
 from src.modules.text_to_sql.service import LangToSqlService, SyntheticDataModelService
 from src.utils.ResponseManager import ResponseManager
+from src.utils.Streaming import to_sse
 
 router = APIRouter()
 
@@ -20,6 +27,8 @@ async def chat(
     user_input: Optional[str] = Body(None, embed=True),
     chat_data: Chat = Body(..., embed=True),
     chat_id: Optional[str] = Body(None, embed=True),
+    response_mode: Literal["full", "delta"] = Body("full", embed=True),
+    chats_version: Optional[int] = Body(None, embed=True),
     lang_to_sql_service: LangToSqlService = Depends(get_lang_to_sql_service)
 ):
     """
@@ -30,6 +39,8 @@ async def chat(
         user_input (str): The user's query that needs to be converted into SQL.
         chat_data (Chat): Chat-related information, including user ID and previous messages.
         chat_id (Optional[str]): The identifier for an existing chat. If None, a new chat will be created.
+        response_mode (str): "full" returns every chat and message; "delta" returns only this turn's messages and `chats_version`.
+        chats_version (Optional[int]): In "delta" mode, the chat-list version the client has; `chats` is only sent when it changed.
         lang_to_sql_service (LangToSqlService): A service for processing user queries into SQL, injected via `Depends(get_lang_to_sql_service)`.
 
     Returns:
@@ -56,7 +67,8 @@ async def chat(
         ```
     """
     try:
-        results = await lang_to_sql_service.chat(connection, user_input, chat_data, chat_id)
+        results = await lang_to_sql_service.chat(
+            connection, user_input, chat_data, chat_id, response_mode, chats_version)
         return ResponseManager.success_response(
             data={"results": results},
             message="Success",
@@ -70,6 +82,84 @@ async def chat(
         )
 
 
+@router.post("/chat/stream")
+async def chat_stream(
+    connection: DatabaseConnection,
+    user_input: str = Body(..., embed=True),
+    chat_data: Chat = Body(..., embed=True),
+    chat_id: Optional[str] = Body(None, embed=True),
+    lang_to_sql_service: LangToSqlService = Depends(get_lang_to_sql_service)
+):
+    """
+    Streaming variant of `/chat` that sends Server-Sent Events as each stage completes.
+
+    Args:
+        connection (DatabaseConnection): The database connection details including type, credentials, host, port, and schema.
+        user_input (str): The user's query that needs to be converted into SQL.
+        chat_data (Chat): Chat-related information, including user ID and previous messages.
+        chat_id (Optional[str]): The identifier for an existing chat. If None, a new chat will be created.
+        lang_to_sql_service (LangToSqlService): A service for processing user queries into SQL, injected via `Depends(get_lang_to_sql_service)`.
+
+    Returns:
+        A `text/event-stream` response with the events, in order:
+        ```
+        event: chat      data: {"chat_id": "..."}
+        event: header    data: {"token": "..."}             (one per generated token)
+        event: sql       data: {"sql_query": "SELECT ..."}
+        event: rows      data: {"rows": [{...}, ...]}       (one per chunk of rows)
+        event: message   data: {"chat_id": "...", "sql_query": "...", "message": {...}}
+        ```
+        An `error` event with `{"error": "Error description"}` ends the stream early.
+    """
+    async def events():
+        # Closing the chat stream when the client disconnects releases its database cursor at once.
+        async with aclosing(lang_to_sql_service.chat_stream(connection, user_input, chat_data, chat_id)) as stream:
+            async for event, data in stream:
+                yield to_sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/fan_out")
+async def fan_out(
+    request: FanOutRequest,
+    executor: FanOutExecutor = Depends(get_fan_out_executor),
+    lang_to_sql_service: LangToSqlService = Depends(get_fan_out_lang_to_sql_service)
+):
+    """
+    Answers one question on several databases with the same schema (e.g. per-region shards).
+
+    Args:
+        request (FanOutRequest): `user_input`, the target `connections`, the `merge` mode ("union", "union_with_source" or "aggregate"), and for "aggregate" the `group_by` columns and `aggregations` (column to sum, count, min or max; for an average, merge SUM and COUNT and divide). `timeout_seconds` overrides the per-target timeout.
+
+    Returns:
+        A `text/event-stream` response with the events, in order:
+        ```
+        event: sql       data: {"sql_query": "SELECT ..."}
+        event: rows      data: {"source": "host/db.schema", "rows": [{...}, ...]}   (one per chunk, or once with the merged rows for "aggregate")
+        event: error     data: {"source": "host/db.schema", "error": "..."}         (one per failed or timed out target)
+        event: done      data: {"sources": [...], "failed": [...]}
+        ```
+        An `error` event without `source` ends the stream early.
+    """
+    async def events():
+        if not request.user_input:
+            yield to_sse("error", {"error": "user_input is required"})
+            return
+        async for event, data in lang_to_sql_service.fan_out(request, executor):
+            yield to_sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/chat")
 async def delete_chat(
     chat_id: str = Body(..., embed=True),
@@ -234,6 +324,8 @@ async def get_messages(
 async def generate_synthetic_data(
     connection: DatabaseConnection,
     iterations: int = Body(..., embed=True),
+    strategy: Literal["llm", "local"] = Body("llm", embed=True),
+    use_llm_vocabulary: bool = Body(False, embed=True),
     synthetic_data_model_service: SyntheticDataModelService = Depends(get_synthetic_data_model_service)
 ):
     """
@@ -241,6 +333,9 @@ async def generate_synthetic_data(
 
     Args:
 
+        iterations: With the "local" strategy, rows to generate per table. With the "llm" strategy, a budget the model spends in batches of 40: it is asked for INSERT statements `iterations // 40` times, and how many rows each answer inserts is up to the model.
+        strategy: "llm" asks the model for INSERT statements; "local" generates typed rows locally and bulk-loads them (COPY on PostgreSQL, multi-row INSERT on MySQL).
+        use_llm_vocabulary: With the "local" strategy, ask the model once for realistic text values.
         synthetic_data_model_service: A service for generating synthetic data. Retrieved via `Depends(get_synthetic_data_model_service)`.
 
     Returns:
@@ -268,7 +363,10 @@ async def generate_synthetic_data(
         ```
     """
     try:
-        results = await synthetic_data_model_service.generate_synthetic_data(iterations, connection)
+        if strategy == "local":
+            results = await synthetic_data_model_service.generate_local_data(iterations, connection, use_llm_vocabulary)
+        else:
+            results = await synthetic_data_model_service.generate_synthetic_data(iterations, connection)
 
         return ResponseManager.success_response(
             data={"results": results},
@@ -1,15 +1,35 @@
+import asyncio
 import json
-from typing import Dict, List, Optional
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlglot import exp
 
 from src.adapters.queries.QueryAdapter import QueryAdapter
+from src.config.constants import Settings
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
-from src.modules.queries.utils.SQLUtils import SQLUtils
+from src.modules.queries.schemas.FanOutRequest import FanOutRequest
+from src.modules.queries.utils.DatabaseManagerFactory import DatabaseManagerFactory
+from src.modules.queries.utils.FanOutExecutor import FanOutExecutor
+from src.modules.queries.utils.QueryGuard import QueryGuard
+from src.modules.queries.utils.SQLUtils import SQLGLOT_DIALECTS, SQLUtils
 from src.modules.text_to_sql.models.models import Chat, Message
 from src.modules.text_to_sql.prompts.synthetic_data import (
     GENERATE_SYNTHETIC_DATA_PROMPT,
+    GENERATE_VOCABULARY_PROMPT,
 )
 from src.modules.text_to_sql.repositories.repository import TextToSqlRepository
+from src.modules.text_to_sql.utils.ChatWorkingSet import ChatWorkingSet
 from src.modules.text_to_sql.utils.ILLMCLient import ILLMClient
+from src.modules.text_to_sql.utils.SyntheticDataGenerator import (
+    SyntheticDataGenerator,
+    column_kind,
+    forward_references,
+    table_order,
+)
+from src.utils.Bulkhead import run_blocking
+from src.utils.Streaming import iterate_in_thread
 
 
 class SyntheticDataModelService:
@@ -17,15 +37,35 @@ class SyntheticDataModelService:
         self.query_adapter = query_adapter
         self.llm_client = llm_client
 
-    async def generate_synthetic_data(self, iterations: int, connection: DatabaseConnection) -> str:
+    async def generate_synthetic_data(
+        self, iterations: int, connection: DatabaseConnection, on_progress: Optional[Callable[[float, str], None]] = None
+    ) -> str:
+        """
+        Asks the model for INSERT statements `iterations // 40` times and executes them.
+
+        The model and database calls block, so the batches run in a worker thread.
+        `on_progress(fraction, message)` is called from that thread before every batch; it may
+        raise to stop the run.
+        """
+        return await run_blocking(self._generate_synthetic_data, iterations, connection, on_progress)
+
+    def _generate_synthetic_data(
+        self, iterations: int, connection: DatabaseConnection, on_progress: Optional[Callable[[float, str], None]] = None
+    ) -> str:
         iterations = iterations // 40
         db_structure = self.query_adapter.get_db_structure(connection)
-        user_input = GENERATE_SYNTHETIC_DATA_PROMPT.format(
-            db_structure=db_structure, schema_name=connection.schema_name)
         last_query = ""
 
-        for _ in range(iterations):
+        for iteration in range(iterations):
+            if on_progress:
+                on_progress(iteration / iterations, f"Generating batch {iteration + 1} of {iterations}")
             try:
+                # The prompt carries a summary of the current data instead of the previous responses,
+                # so every call has the same size no matter how many iterations ran before.
+                user_input = GENERATE_SYNTHETIC_DATA_PROMPT.format(
+                    db_structure=db_structure,
+                    schema_name=connection.schema_name,
+                    data_state=self.get_data_state(db_structure, connection))
                 last_query = self.llm_client.get_model_response(user_input)
                 last_query = SQLUtils.clean_sql_query(last_query)
                 self.query_adapter.execute_query(last_query, connection)
@@ -33,37 +73,229 @@ class SyntheticDataModelService:
                 return {"error": str(e)}
         return last_query
 
+    def get_data_state(self, db_structure: Dict[str, Any], connection: DatabaseConnection) -> str:
+        """Row count and maximum primary key of every table, in one query."""
+        selects = []
+        for table, info in db_structure.items():
+            primary_keys = [column["name"] for column in info["columns"] if column["primary_key"]]
+            max_key = f"CAST(MAX({primary_keys[0]}) AS CHAR(64))" if len(primary_keys) == 1 else "NULL"
+            selects.append(
+                f"SELECT '{table}' AS table_name, COUNT(*) AS row_count, {max_key} AS max_key "
+                f"FROM {self.qualified_name(table, connection)}")
+        if not selects:
+            return "No tables."
+
+        try:
+            rows = self.query_adapter.execute_query(" UNION ALL ".join(selects), connection, use_cache=False)
+        except Exception as e:
+            print(f"Error reading synthetic data state: {e}")
+            rows = None
+        if not isinstance(rows, list) or not rows:
+            return "Unknown."
+        return "\n".join(
+            f"- {row['table_name']}: {row['row_count']} rows"
+            + (f", max primary key {str(row['max_key']).strip()}" if row.get("max_key") is not None else "")
+            for row in rows
+        )
+
+    async def generate_local_data(
+        self,
+        rows_per_table: int,
+        connection: DatabaseConnection,
+        use_llm_vocabulary: bool = False,
+        on_progress: Optional[Callable[[float, str], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Generates `rows_per_table` rows for every table locally and bulk-loads them.
+
+        The LLM is only asked, optionally, for realistic text values; everything else is produced by
+        SyntheticDataGenerator. Returns the number of rows loaded per table. `on_progress` is called
+        from the worker thread before every table.
+        """
+        return await run_blocking(self._generate_local_data, rows_per_table, connection, use_llm_vocabulary, on_progress)
+
+    def _generate_local_data(
+        self,
+        rows_per_table: int,
+        connection: DatabaseConnection,
+        use_llm_vocabulary: bool,
+        on_progress: Optional[Callable[[float, str], None]] = None,
+    ) -> Dict[str, int]:
+        db_structure = self.query_adapter.get_db_structure(connection)
+        vocabularies = self.get_vocabularies(db_structure) if use_llm_vocabulary else {}
+        generator = SyntheticDataGenerator(db_structure, vocabularies)
+        referenced_columns = {
+            (fk["references"], fk["referenced_column"])
+            for info in db_structure.values() for fk in info.get("foreign_keys", [])
+        }
+        keys: Dict[Tuple[str, str], np.ndarray] = {}
+        inserted = {}
+
+        tables = table_order(db_structure)
+        # In tables that reference each other, the reference to the table generated later is left
+        # NULL and filled in once that table has rows, unless it already has some.
+        backfills = {}
+        for (table, column), fk in forward_references(db_structure, tables).items():
+            reference = (fk["references"], fk["referenced_column"])
+            if reference not in keys:
+                keys[reference] = self.existing_keys(*reference, connection)
+            if len(keys[reference]):
+                continue
+            if not next(info["nullable"] for info in db_structure[table]["columns"] if info["name"] == column):
+                raise ValueError(
+                    f"{table}.{column} and {fk['references']} reference each other and {fk['references']} is empty: "
+                    f"a NOT NULL reference in a cycle cannot be satisfied by generated rows")
+            backfills[(table, column)] = fk
+        generated = {}
+
+        for position, table in enumerate(tables):
+            if on_progress:
+                on_progress(position / len(tables), f"Loading {table}")
+            referenced_keys = {}
+            for column, fk in generator.foreign_keys(table).items():
+                reference = (fk["references"], fk["referenced_column"])
+                if reference not in keys:
+                    keys[reference] = self.existing_keys(*reference, connection)
+                referenced_keys[column] = keys[reference]
+
+            nullable = {column["name"]: column["nullable"] for column in db_structure[table]["columns"]}
+            if any(
+                not len(values) and not nullable.get(column, True) and generator.foreign_keys(table)[column]["references"] != table
+                for column, values in referenced_keys.items()
+            ):
+                inserted[table] = 0
+                continue
+
+            data = generator.generate(table, rows_per_table, self.key_offsets(generator, table, connection), referenced_keys)
+            columns = list(data)
+            # Only integer keys are guaranteed to be new; other distinct values may already exist.
+            inserted[table] = self.query_adapter.bulk_insert(
+                table, columns, generator.to_rows(data, columns), connection,
+                ignore_conflicts=len(generator.primary_keys(table)) > 1 or any(
+                    column_kind(column["type"]) != "integer" for column in generator.distinct_columns(table)))
+
+            for column in columns:
+                if (table, column) in referenced_columns:
+                    existing = keys.get((table, column))
+                    if existing is None:
+                        existing = self.existing_keys(table, column, connection)
+                    keys[(table, column)] = np.concatenate([existing, data[column]])
+            if any(backfill_table == table for backfill_table, _ in backfills):
+                generated[table] = data
+
+        for (table, column), fk in backfills.items():
+            if table in generated:
+                self.backfill_reference(
+                    generator, table, column, generated[table], keys[(fk["references"], fk["referenced_column"])], connection)
+        return inserted
+
+    def backfill_reference(
+        self,
+        generator: SyntheticDataGenerator,
+        table: str,
+        column: str,
+        data: Dict[str, np.ndarray],
+        keys: np.ndarray,
+        connection: DatabaseConnection,
+    ) -> None:
+        """Points the rows generated for `table` at `keys` of the table `column` references, now that it has rows."""
+        primary_keys = generator.primary_keys(table)
+        if len(primary_keys) != 1 or not len(keys):
+            return
+        dialect = SQLGLOT_DIALECTS.get(connection.db_type.value)
+        # One literal per statement, which every database casts to the column's type.
+        for key, rows in generator.backfill_groups(data[primary_keys[0]], keys).items():
+            row_keys = ", ".join(exp.convert(row).sql(dialect=dialect) for row in rows.tolist())
+            self.query_adapter.execute_query(
+                f"UPDATE {self.qualified_name(table, connection)} SET {column} = {exp.convert(key).sql(dialect=dialect)} "
+                f"WHERE {primary_keys[0]} IN ({row_keys})",
+                connection, use_cache=False)
+
+    def qualified_name(self, table: str, connection: DatabaseConnection) -> str:
+        return f"{connection.schema_name}.{table}" if connection.schema_name else table
+
+    def key_offsets(self, generator: SyntheticDataGenerator, table: str, connection: DatabaseConnection) -> Dict[str, int]:
+        """Current maximum of every integer primary key or UNIQUE column of `table`."""
+        columns = [column["name"] for column in generator.distinct_columns(table) if column_kind(column["type"]) == "integer"]
+        if not columns:
+            return {}
+        result = self.query_adapter.execute_query(
+            "SELECT " + ", ".join(f"MAX({column}) AS {column}" for column in columns)
+            + f" FROM {self.qualified_name(table, connection)}",
+            connection, use_cache=False)
+        row = result[0] if result else {}
+        return {column: int(row.get(column) or 0) for column in columns}
+
+    def existing_keys(self, table: str, column: str, connection: DatabaseConnection) -> np.ndarray:
+        result = self.query_adapter.execute_query(
+            f"SELECT DISTINCT {column} FROM {self.qualified_name(table, connection)} "
+            f"WHERE {column} IS NOT NULL LIMIT {Settings.SYNTHETIC_KEY_SAMPLE_SIZE}",
+            connection, use_cache=False)
+        return np.array([row[column] for row in result or []], dtype=object)
+
+    def get_vocabularies(self, db_structure: Dict[str, Any]) -> Dict[str, List[str]]:
+        columns = [
+            f"{table}.{column['name']} ({column['type']})"
+            for table, info in db_structure.items() for column in info["columns"]
+            if column_kind(column["type"]) == "text" and not column["primary_key"]
+        ]
+        if not columns:
+            return {}
+
+        try:
+            response = self.llm_client.get_model_response(
+                GENERATE_VOCABULARY_PROMPT.format(columns="\n".join(columns), count=Settings.SYNTHETIC_VOCABULARY_SIZE))
+            vocabularies = json.loads(SQLUtils.clean_sql_query(response))
+            return {key: [str(value) for value in values] for key, values in vocabularies.items() if isinstance(values, list) and values}
+        except Exception as e:
+            print(f"Error parsing synthetic data vocabularies: {e}")
+            return {}
+
 
 class LangToSqlService:
-    def __init__(self, query_adapter: QueryAdapter, llm_client: ILLMClient, TextToSqlRepository: TextToSqlRepository):
+    def __init__(self, query_adapter: QueryAdapter, llm_client: ILLMClient, TextToSqlRepository: TextToSqlRepository, query_guard: Optional[QueryGuard] = None):
         self.query_adapter = query_adapter
         self.llm_client = llm_client
         self.repository = TextToSqlRepository
+        self.query_guard = query_guard
 
-    async def chat(self, connection: DatabaseConnection, user_input: Optional[str], chat_data: Chat, chat_id: str) -> Dict:
+    async def ensure_chat(self, chat_id: Optional[str], chat_data: Chat) -> Optional[str]:
         if chat_id:
             existing_chat = await self.repository.get_chat(chat_id)
-            if not existing_chat:
-                chat_id = await self.repository.create_chat(chat_data)
-                if not chat_id:
-                    return {"error": "Failed to create chat"}
-        elif not chat_id:
-            chat_id = await self.repository.create_chat(chat_data)
-            if not chat_id:
-                return {"error": "Failed to create chat"}
+            if existing_chat:
+                return chat_id
+        return await self.repository.create_chat(chat_data)
+
+    async def chat(
+        self,
+        connection: DatabaseConnection,
+        user_input: Optional[str],
+        chat_data: Chat,
+        chat_id: str,
+        response_mode: str = "full",
+        chats_version: Optional[int] = None
+    ) -> Dict:
+        """
+        Runs one chat turn.
+
+        In "full" mode the response carries the user's whole chat list and the chat's whole history.
+        In "delta" mode it only carries the messages added by this turn plus `chats_version`, and the
+        chat list is included only when it differs from the `chats_version` the client already has.
+        """
+        chat_id = await self.ensure_chat(chat_id, chat_data)
+        if not chat_id:
+            return {"error": "Failed to create chat"}
 
         if not user_input:
-            chats = await self.get_chats(chat_data.user_id)
             full_chat = await self.get_messages(chat_id)
             response = {
                 "chat_id": chat_id,
                 "header": "Chat",
                 "sql_query": "",
                 "sql_results": [],
-                "chats": chats,
                 "messages": full_chat["messages"]
             }
-            return response
+            return await self.add_chats(response, chat_data.user_id, response_mode, chats_version)
         try:
             user_message = Message(role=1, message=user_input)
             saved_user_message = await self.repository.add_message(chat_id, user_message)
@@ -71,34 +303,170 @@ class LangToSqlService:
             if not saved_user_message:
                 return {"error": "user message not saved into the database."}
 
-            db_structure = self.query_adapter.get_db_structure(connection)
+            db_structure = await run_blocking(self.query_adapter.get_db_structure, connection)
             db_type = connection.db_type
             chat_history = await self.get_messages(chat_id)
-            sql_query = self.llm_client.get_model_response(
-                db_structure, user_input, connection.schema_name, chat_history, db_type)
-            sql_results = self.query_adapter.execute_query(sql_query, connection)
-            human_response = self.llm_client.get_human_response(user_input)
+            # Model calls block while the gateway waits for rate limits and retries, so they run on a
+            # worker thread like the database calls.
+            sql_query = await run_blocking(
+                self.llm_client.get_model_response,
+                db_structure, user_input, connection.schema_name, chat_history, db_type,
+                last_result=ChatWorkingSet.describe(chat_id, self.working_set_owner(connection)))
+            sql_query, sql_results = await run_blocking(self.run_query, chat_id, sql_query, connection)
+            human_response = await run_blocking(self.llm_client.get_human_response, user_input)
             bot_message = Message(role=0, message=human_response + '\n' + str(sql_results))
             saved_bot_message = await self.repository.add_message(chat_id, bot_message)
 
             if not saved_bot_message:
                 return {"error": "bot message not saved into the database."}
 
-            chats = await self.get_chats(chat_data.user_id)
-            full_chat = await self.get_messages(chat_id)
+            if response_mode == "delta":
+                messages = [user_message, bot_message]
+            else:
+                messages = (await self.get_messages(chat_id))["messages"]
 
             response = {
                 "chat_id": chat_id,
                 "header": human_response,
                 "sql_query": sql_query,
                 "sql_results": json.dumps(sql_results),
-                "chats": chats,
-                "messages": full_chat["messages"]
+                "messages": messages
             }
-            return response
+            return await self.add_chats(response, chat_data.user_id, response_mode, chats_version)
         except Exception as e:
             return {"error": str(e)}
 
+    def working_set_owner(self, connection: DatabaseConnection) -> Tuple[str, Optional[str]]:
+        return DatabaseManagerFactory.fingerprint(connection), connection.schema_name
+
+    def refine_last_result(self, chat_id: str, sql_query: str, connection: DatabaseConnection) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answers SQL that only reads `last_result` from the chat's working set, without touching the
+        database. Returns None for any other SQL.
+        """
+        dialect = SQLGLOT_DIALECTS.get(connection.db_type.value)
+        if not ChatWorkingSet.is_refinement(sql_query, dialect):
+            return None
+
+        rows = ChatWorkingSet.query(chat_id, self.working_set_owner(connection), sql_query, dialect)
+        if rows is None:
+            raise ValueError("The previous result of this chat is no longer available, please ask the full question again")
+        return rows
+
+    def run_query(self, chat_id: str, sql_query: str, connection: DatabaseConnection) -> Tuple[str, List[Dict[str, Any]]]:
+        """Runs generated SQL locally when it refines the last result, and on the database otherwise."""
+        sql_query = SQLUtils.clean_sql_query(sql_query)
+        sql_results = self.refine_last_result(chat_id, sql_query, connection)
+        if sql_results is None:
+            if self.query_guard:
+                sql_query = self.query_guard.check(sql_query, connection)
+            sql_results = self.query_adapter.execute_query(sql_query, connection)
+        ChatWorkingSet.store(chat_id, self.working_set_owner(connection), sql_results)
+        return sql_query, sql_results
+
+    async def add_chats(self, response: Dict, user_id: str, response_mode: str, chats_version: Optional[int]) -> Dict:
+        if response_mode != "delta":
+            response["chats"] = await self.get_chats(user_id)
+            return response
+
+        current_version = await self.repository.get_chats_version(user_id)
+        response["chats_version"] = current_version
+        if chats_version != current_version:
+            response["chats"] = await self.get_chats(user_id)
+        return response
+
+    async def chat_stream(
+        self, connection: DatabaseConnection, user_input: str, chat_data: Chat, chat_id: Optional[str]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of `chat`, yielding `(event, data)` pairs as each stage finishes.
+
+        The SQL is generated in a worker thread while the header tokens stream, then the result rows
+        are sent in chunks and the persisted bot message closes the stream. Errors end the stream
+        with an "error" event.
+        """
+        chat_id = await self.ensure_chat(chat_id, chat_data)
+        if not chat_id:
+            yield "error", {"error": "Failed to create chat"}
+            return
+        yield "chat", {"chat_id": chat_id}
+
+        sql_task = None
+        try:
+            saved_user_message = await self.repository.add_message(chat_id, Message(role=1, message=user_input))
+            if not saved_user_message:
+                yield "error", {"error": "user message not saved into the database."}
+                return
+
+            db_structure = await run_blocking(self.query_adapter.get_db_structure, connection)
+            chat_history = await self.get_messages(chat_id)
+            sql_task = asyncio.create_task(run_blocking(
+                self.llm_client.get_model_response,
+                db_structure, user_input, connection.schema_name, chat_history, connection.db_type,
+                last_result=ChatWorkingSet.describe(chat_id, self.working_set_owner(connection))))
+
+            header_tokens = []
+            async with aclosing(iterate_in_thread(iter(self.llm_client.stream_human_response(user_input)))) as tokens:
+                async for token in tokens:
+                    header_tokens.append(token)
+                    yield "header", {"token": token}
+            human_response = "".join(header_tokens)
+
+            sql_query = SQLUtils.clean_sql_query(await sql_task)
+            local_results = await run_blocking(self.refine_last_result, chat_id, sql_query, connection)
+            if local_results is None and self.query_guard:
+                sql_query = await run_blocking(self.query_guard.check, sql_query, connection)
+            yield "sql", {"sql_query": sql_query}
+
+            sql_results = []
+            if local_results is None:
+                rows = iter(self.query_adapter.stream_query(sql_query, connection, Settings.CHAT_STREAM_CHUNK_ROWS))
+            else:
+                chunk_size = Settings.CHAT_STREAM_CHUNK_ROWS
+                rows = (local_results[start:start + chunk_size] for start in range(0, len(local_results), chunk_size))
+            async with aclosing(iterate_in_thread(rows)) as chunks:
+                async for chunk in chunks:
+                    sql_results.extend(chunk)
+                    yield "rows", {"rows": chunk}
+            await run_blocking(ChatWorkingSet.store, chat_id, self.working_set_owner(connection), sql_results)
+
+            bot_message = Message(role=0, message=human_response + '\n' + str(sql_results))
+            saved_bot_message = await self.repository.add_message(chat_id, bot_message)
+            if not saved_bot_message:
+                yield "error", {"error": "bot message not saved into the database."}
+                return
+
+            yield "message", {"chat_id": chat_id, "sql_query": sql_query, "message": bot_message.model_dump()}
+        except Exception as e:
+            yield "error", {"error": str(e)}
+        finally:
+            # The header stream failing or the client leaving must not leave the SQL generation behind.
+            if sql_task is not None:
+                sql_task.cancel()
+
+    async def fan_out(self, request: FanOutRequest, executor: FanOutExecutor) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Answers one question on every connection of `request`, yielding `(event, data)` pairs.
+
+        The SQL is generated once from the first connection's schema, which the other targets are
+        expected to share, and sent as a "sql" event before the FanOutExecutor events.
+        """
+        try:
+            connection = request.connections[0]
+            db_structure = await run_blocking(self.query_adapter.get_db_structure, connection)
+            sql_query = await run_blocking(
+                self.llm_client.get_response, db_structure, request.user_input, connection.schema_name, connection.db_type)
+            sql_query = SQLUtils.clean_sql_query(sql_query)
+            if self.query_guard:
+                sql_query = await run_blocking(self.query_guard.check, sql_query, connection)
+            yield "sql", {"sql_query": sql_query}
+
+            async for event, data in executor.stream(
+                    sql_query, request.connections, request.merge, request.group_by, request.aggregations):
+                yield event, data
+        except Exception as e:
+            yield "error", {"error": str(e)}
+
     async def get_messages(self, chat_id: str) -> Dict:
         response = await self.repository.get_chat(chat_id)
         if response is None:
@@ -147,6 +515,7 @@ class LangToSqlService:
             result = await self.repository.delete_chat(chat_id)
             if not result:
                 raise Exception("Failed to delete chat")
+            ChatWorkingSet.discard(chat_id)
 
             return True
         except Exception as e:
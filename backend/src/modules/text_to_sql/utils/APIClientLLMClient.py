@@ -1,7 +1,11 @@
+from typing import Any, Dict, Tuple
+
 import google.generativeai as genai
+from langchain_openai import ChatOpenAI
 
 from src.config.constants import Settings
 from src.modules.text_to_sql.utils.ILLMCLient import ILLMClient
+from src.utils.LLMGateway import DEFAULT_PROVIDER, LLMGateway, output_tokens, parse_targets
 
 
 class APIClientLLMClient(ILLMClient):
@@ -9,27 +13,49 @@ class APIClientLLMClient(ILLMClient):
         self.api_key = Settings.SYNTHETIC_DATA_MODEL_API_KEY
         self.base_url = Settings.SYNTHETIC_DATA_BASE_URL
         self.model_name = Settings.SYNTHETIC_DATA_MODEL
-        self.conversation_history = []
         self.MODEL_TEMPERATURE = 0.7
+        self.targets = parse_targets(DEFAULT_PROVIDER, self.model_name)
 
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel(
-            model_name=self.model_name,
+        self.model = self._connect(DEFAULT_PROVIDER, self.model_name)
+        self._fallbacks: Dict[Tuple[str, str], Any] = {}
+
+    def _connect(self, provider: str, model: str) -> Any:
+        if provider == "openai":
+            return ChatOpenAI(
+                model=model,
+                api_key=Settings.OPENAI_API_KEY,
+                base_url=Settings.OPENAI_BASE_URL,
+                temperature=self.MODEL_TEMPERATURE,
+                max_retries=0
+            )
+        return genai.GenerativeModel(
+            model_name=model,
             generation_config={
                 "temperature": self.MODEL_TEMPERATURE
             }
         )
 
-    def _post_request(self) -> dict:
-        try:
-            response = self.model.generate_content(self.conversation_history)
-            self.conversation_history.append({"role": "assistant", "parts": [response.text]})
-            return response.text
-        except Exception as e:
-            return {"error": str(e)}
+    def _client(self, provider: str, model: str) -> Any:
+        if (provider, model) == self.targets[0]:
+            return self.model
+        if (provider, model) not in self._fallbacks:
+            self._fallbacks[(provider, model)] = self._connect(provider, model)
+        return self._fallbacks[(provider, model)]
 
-    def get_model_response(self, user_input: str) -> str:
-        self.conversation_history.append({"role": "user", "parts": [user_input]})
+    def _post_request(self, contents: list) -> str:
+        def call(provider: str, model: str) -> Tuple[str, Any]:
+            client = self._client(provider, model)
+            if provider == "openai":
+                response = client.invoke([("human" if content["role"] == "user" else "ai", "".join(content["parts"])) for content in contents])
+                return response.content, response
+            response = client.generate_content(contents)
+            return response.text, response
 
-        response = self._post_request()
-        return response
+        text, _ = LLMGateway.invoke(self.targets, call, count_tokens=lambda result: output_tokens(result[1]))
+        return text
+
+    def get_model_response(self, user_input: str) -> str:
+        # Every call is self-contained: callers put whatever state the model needs in the prompt,
+        # so the request size does not grow with the number of calls.
+        return self._post_request([{"role": "user", "parts": [user_input]}])
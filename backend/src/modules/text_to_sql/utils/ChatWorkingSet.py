@@ -0,0 +1,184 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import duckdb
+import pandas as pd
+from sqlglot import exp
+
+from src.config.constants import Settings
+from src.modules.queries.utils.SQLUtils import SQLUtils
+
+WORKING_SET_TABLE = "last_result"
+
+
+class ChatWorkingSet:
+    """
+    Process-wide, in-memory DuckDB copy of the last result of each chat.
+
+    A chat's result is only reused with the credentials (fingerprint and schema) that produced it.
+    Entries expire after a TTL and are evicted least-recently-used once their total in-memory
+    size goes over the byte budget; results larger than the per-entry budget are not kept.
+    Each chat has its own DuckDB schema holding a `last_result` table, and follow-up SQL that only
+    reads `last_result` runs with that schema as its search path, any qualifier dropped. Such SQL
+    comes from the model, so it may name no other table and no table function, and the database
+    cannot reach files or change its configuration.
+    """
+
+    max_bytes: int = Settings.CHAT_WORKING_SET_MAX_BYTES
+    max_entry_bytes: int = Settings.CHAT_WORKING_SET_MAX_ENTRY_BYTES
+    ttl_seconds: float = Settings.CHAT_WORKING_SET_TTL_SECONDS
+
+    # chat_id -> (owner, expires_at, schema, size, description)
+    _entries: "OrderedDict[str, Tuple[Tuple[str, Optional[str]], float, str, int, str]]" = OrderedDict()
+    _size: int = 0
+    _lock = threading.Lock()
+    _connection: Optional[duckdb.DuckDBPyConnection] = None
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls.ttl_seconds > 0 and cls.max_bytes > 0
+
+    @classmethod
+    def _get_connection(cls) -> duckdb.DuckDBPyConnection:
+        if cls._connection is None:
+            cls._connection = duckdb.connect(":memory:")
+            # DuckDB stores the tables compressed, so the pandas-sized budget plus the same again
+            # for query execution is a hard ceiling it should never reach.
+            cls._connection.execute(f"SET memory_limit = '{2 * cls.max_bytes}B'")
+            cls._connection.execute("SET enable_external_access = false")
+            cls._connection.execute("SET lock_configuration = true")
+        return cls._connection
+
+    @classmethod
+    def store(cls, chat_id: str, owner: Tuple[str, Optional[str]], rows: Any) -> bool:
+        """Keeps `rows` as the chat's last result, replacing the previous one."""
+        if not cls.enabled() or not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            return False
+
+        try:
+            frame = pd.DataFrame.from_records(rows)
+            size = int(frame.memory_usage(deep=True).sum())
+        except Exception:
+            return False
+
+        with cls._lock:
+            if chat_id in cls._entries:
+                cls._remove(chat_id)
+            if size > cls.max_entry_bytes:
+                return False
+
+            schema = f"chat_{re.sub(r'[^0-9A-Za-z_]', '_', chat_id)}"
+            table = f"{schema}.{WORKING_SET_TABLE}"
+            connection = cls._get_connection()
+            try:
+                connection.register("working_set_stage", frame)
+                connection.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+                connection.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM working_set_stage")
+                columns = connection.execute(f"DESCRIBE {table}").fetchall()
+            except Exception as e:
+                print(f"Error storing the working set of chat {chat_id}: {e}")
+                return False
+            finally:
+                connection.unregister("working_set_stage")
+
+            description = f"{WORKING_SET_TABLE}({', '.join(f'{name} {column_type}' for name, column_type, *_ in columns)}), {len(frame)} rows"
+            cls._entries[chat_id] = (owner, time.monotonic() + cls.ttl_seconds, schema, size, description)
+            cls._size += size
+            while cls._size > cls.max_bytes:
+                cls._remove(next(iter(cls._entries)))
+        return True
+
+    @classmethod
+    def describe(cls, chat_id: str, owner: Tuple[str, Optional[str]]) -> str:
+        """Columns and row count of the chat's last result, for the prompt; empty when there is none."""
+        with cls._lock:
+            entry = cls._get(chat_id, owner)
+            return entry[4] if entry else ""
+
+    @classmethod
+    def is_refinement(cls, query: str, dialect: Optional[str] = None) -> bool:
+        """True for a single read-only statement whose only table is `last_result`."""
+        statements = SQLUtils.parse(query, dialect)
+        if not statements or len(statements) != 1 or not SQLUtils.is_read_only(query, dialect):
+            return False
+
+        ctes = {cte.alias_or_name.lower() for cte in statements[0].find_all(exp.CTE)}
+        tables = set()
+        for table in statements[0].find_all(exp.Table):
+            # Table functions (read_csv, query_table, duckdb_tables...) parse as tables without a name.
+            if not isinstance(table.this, exp.Identifier):
+                return False
+            tables.add(table.name.lower())
+        return WORKING_SET_TABLE in tables and tables <= ctes | {WORKING_SET_TABLE}
+
+    @classmethod
+    def query(cls, chat_id: str, owner: Tuple[str, Optional[str]], query: str, dialect: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Runs a refinement of the chat's last result locally.
+
+        The SQL is transpiled from the database's dialect to DuckDB and run with the chat's schema
+        as the search path; `last_result` loses any schema the model qualified it with, so it can
+        only ever be the chat's own table. Returns None when the chat has no usable working set.
+        """
+        with cls._lock:
+            entry = cls._get(chat_id, owner)
+            if entry is None:
+                return None
+
+            statement = SQLUtils.parse(query, dialect)[0].transform(cls._unqualify)
+            local_query = statement.sql(dialect="duckdb")
+            cursor = cls._get_connection().cursor()
+            try:
+                cursor.execute(f"SET search_path = '{entry[2]}'")
+                result = cursor.execute(local_query)
+                columns = [column[0] for column in result.description]
+                return [dict(zip(columns, row)) for row in result.fetchall()]
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _unqualify(node: exp.Expression) -> exp.Expression:
+        if isinstance(node, exp.Table) and node.name.lower() == WORKING_SET_TABLE:
+            node = node.copy()
+            node.set("db", None)
+            node.set("catalog", None)
+        return node
+
+    @classmethod
+    def discard(cls, chat_id: str) -> None:
+        with cls._lock:
+            if chat_id in cls._entries:
+                cls._remove(chat_id)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            for chat_id in list(cls._entries):
+                cls._remove(chat_id)
+
+    @classmethod
+    def size(cls) -> int:
+        return cls._size
+
+    @classmethod
+    def _get(cls, chat_id: str, owner: Tuple[str, Optional[str]]):
+        entry = cls._entries.get(chat_id)
+        if entry is None:
+            return None
+        if entry[0] != owner or entry[1] < time.monotonic():
+            cls._remove(chat_id)
+            return None
+        cls._entries.move_to_end(chat_id)
+        return entry
+
+    @classmethod
+    def _remove(cls, chat_id: str) -> None:
+        _, _, schema, size, _ = cls._entries.pop(chat_id)
+        cls._size -= size
+        try:
+            cls._get_connection().execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        except Exception as e:
+            print(f"Error dropping the working set of chat {chat_id}: {e}")
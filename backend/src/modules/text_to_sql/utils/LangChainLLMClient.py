@@ -1,5 +1,10 @@
+from itertools import chain
+from typing import Dict, Iterator, Tuple
+
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_openai import ChatOpenAI
 
 from src.config.constants import Settings
 from src.modules.text_to_sql.models.models import Chat
@@ -7,60 +12,109 @@ from src.modules.text_to_sql.prompts.lang_to_sql import (
     AI_ALERT_INPUT_PROMPT,
     AI_INPUT_PROMPT,
     HUMAN_RESPONSE_PROMPT,
+    LAST_RESULT_PROMPT,
 )
 from src.modules.text_to_sql.utils.ILLMCLient import ILLMClient
+from src.modules.text_to_sql.utils.PromptBuilder import PromptBuilder
+from src.utils.LLMGateway import DEFAULT_PROVIDER, LLMGateway, parse_targets
+from src.utils.SingleFlight import SingleFlight
 
 
 class LangChainLLMClient(ILLMClient):
+    # Identical prompts sent while one is waiting for the model share its answer.
+    _prompt_flights = SingleFlight()
+
     def __init__(self):
         self.api_key = Settings.TEXTTOSQL_API_KEY
         self.base_url = Settings.TEXTTOSQL_BASE_URL
         self.model_name = Settings.TEXTTOSQL_MODEL_NAME
         self.MODEL_TEMPERATURE = Settings.TEXTTOSQL_TEMPERATURE
+        self.targets = parse_targets(DEFAULT_PROVIDER, self.model_name)
+        self.prompt_builder = PromptBuilder()
         self.llm = self._connect()
+        self._fallbacks: Dict[Tuple[str, str], BaseChatModel] = {}
 
-    def _connect(self) -> ChatGoogleGenerativeAI:
+    def _connect(self, provider: str = DEFAULT_PROVIDER, model: str = None) -> BaseChatModel:
+        # Retries are left to the LLM gateway, so both SDKs are asked for a single attempt. The chat
+        # model of langchain-google-genai 2.0 ignores max_retries and still retries Google API errors
+        # once on its own.
+        if provider == "openai":
+            return ChatOpenAI(
+                model=model,
+                api_key=Settings.OPENAI_API_KEY,
+                base_url=Settings.OPENAI_BASE_URL,
+                temperature=self.MODEL_TEMPERATURE,
+                max_tokens=200,
+                stop=[";"],
+                max_retries=0
+            )
         return ChatGoogleGenerativeAI(
-            model=self.model_name,
+            model=model or self.model_name,
             google_api_key=self.api_key,
             temperature=self.MODEL_TEMPERATURE,
             max_output_tokens=200,
-            stop=[";"]
+            stop=[";"],
+            max_retries=0
         )
 
-    def get_model_response(self, db_structure: str, user_input: str, schema_name: str, chat_history: Chat, db_type: str) -> str:
-        message = AI_INPUT_PROMPT.format(
+    def _chat_model(self, provider: str, model: str) -> BaseChatModel:
+        if (provider, model) == self.targets[0]:
+            return self.llm
+        if (provider, model) not in self._fallbacks:
+            self._fallbacks[(provider, model)] = self._connect(provider, model)
+        return self._fallbacks[(provider, model)]
+
+    def get_model_response(
+        self, db_structure: str, user_input: str, schema_name: str, chat_history: Chat, db_type: str, last_result: str = ""
+    ) -> str:
+        message = self.prompt_builder.build(
+            AI_INPUT_PROMPT,
             db_structure=db_structure,
             user_input=user_input,
             schema_name=schema_name,
             chat_history=chat_history,
-            db_type=db_type
+            db_type=db_type,
+            last_result=LAST_RESULT_PROMPT.format(description=last_result) if last_result else "None"
         )
-        try:
-            llm_response = self.llm.invoke([HumanMessage(content=message)])
-            return llm_response.content
-        except Exception as e:
-            return e
+        return self._invoke(message)
 
     def get_response(self, db_structure: str, user_input: str, schema_name: str, db_type: str) -> str:
-        message = AI_ALERT_INPUT_PROMPT.format(
+        message = self.prompt_builder.build(
+            AI_ALERT_INPUT_PROMPT,
             db_structure=db_structure,
             user_input=user_input,
             schema_name=schema_name,
             db_type=db_type
         )
-        try:
-            llm_response = self.llm.invoke([HumanMessage(content=message)])
-            return llm_response.content
-        except Exception as e:
-            return e
+        return self._invoke(message)
 
     def get_human_response(self, question: str) -> str:
         message = HUMAN_RESPONSE_PROMPT.format(
             human_question=question
         )
-        try:
-            llm_response = self.llm.invoke([HumanMessage(content=message)])
-            return llm_response.content
-        except Exception as e:
-            return e
+        return self._invoke(message)
+
+    def _invoke(self, message: str) -> str:
+        return self._prompt_flights.do(
+            (self.model_name, self.MODEL_TEMPERATURE, message),
+            lambda: LLMGateway.invoke(
+                self.targets, lambda provider, model: self._chat_model(provider, model).invoke([HumanMessage(content=message)])
+            ).content
+        )
+
+    def stream_human_response(self, question: str) -> Iterator[str]:
+        message = HUMAN_RESPONSE_PROMPT.format(
+            human_question=question
+        )
+
+        # Only opening the stream goes through the gateway: once text was sent it cannot be retried.
+        def open_stream(provider: str, model: str):
+            chunks = self._chat_model(provider, model).stream([HumanMessage(content=message)])
+            return chunks, next(chunks, None)
+
+        chunks, first = LLMGateway.invoke(self.targets, open_stream, count_tokens=lambda _: 0)
+        if first is None:
+            return
+        for chunk in chain([first], chunks):
+            if chunk.content:
+                yield chunk.content
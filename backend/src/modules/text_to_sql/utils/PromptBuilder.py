@@ -0,0 +1,172 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import tiktoken
+
+from src.config.constants import Settings
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken's `PROMPT_TOKENIZER` encoding, shared by the whole process.
+
+    It is only an estimate for Gemini, whose tokenizer is not available locally, but stable
+    enough to budget with. When the encoding cannot be loaded (it is downloaded once and
+    cached), it falls back to one token per four characters.
+    """
+
+    _encoding = None
+    _loaded = False
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_encoding(cls):
+        if not cls._loaded:
+            with cls._lock:
+                if not cls._loaded:
+                    try:
+                        cls._encoding = tiktoken.get_encoding(Settings.PROMPT_TOKENIZER)
+                    except Exception as e:
+                        print(f"Tokenizer {Settings.PROMPT_TOKENIZER} unavailable, estimating tokens from characters: {e}")
+                    cls._loaded = True
+        return cls._encoding
+
+    @classmethod
+    def count(cls, text: str) -> int:
+        encoding = cls._get_encoding()
+        if encoding is None:
+            return (len(text) + 3) // 4
+        return len(encoding.encode(text, disallowed_special=()))
+
+    @classmethod
+    def truncate(cls, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if cls.count(text) <= max_tokens:
+            return text
+        encoding = cls._get_encoding()
+        if encoding is None:
+            return text[:max_tokens * 4] + "..."
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]) + "..."
+
+
+class PromptBuilder:
+    """
+    Fills a prompt template within a token budget (PROMPT_MAX_TOKENS).
+
+    The template, the question and any other fixed value are always sent whole. The schema comes
+    next: when it does not fit, the tables named in the question and the recent history are kept
+    first, followed by the tables they reference, and the rest are listed by name only while
+    space remains. The chat history takes what is left, newest message first, with every message
+    capped at PROMPT_MAX_MESSAGE_TOKENS; the schema always leaves it PROMPT_HISTORY_MIN_TOKENS
+    when the history needs them. The tokens of each component are logged per prompt.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        history_min_tokens: Optional[int] = None,
+        max_message_tokens: Optional[int] = None,
+    ):
+        self.max_tokens = max_tokens or Settings.PROMPT_MAX_TOKENS
+        self.history_min_tokens = Settings.PROMPT_HISTORY_MIN_TOKENS if history_min_tokens is None else history_min_tokens
+        self.max_message_tokens = max_message_tokens or Settings.PROMPT_MAX_MESSAGE_TOKENS
+
+    def build(
+        self,
+        template: str,
+        db_structure: Any,
+        user_input: str,
+        chat_history: Any = None,
+        **fixed: Any,
+    ) -> str:
+        fixed_values = {"user_input": user_input, **{key: str(value) for key, value in fixed.items()}}
+        has_history = "{chat_history}" in template
+        empty = {"db_structure": "", "chat_history": ""} if has_history else {"db_structure": ""}
+        fixed_tokens = TokenCounter.count(template.format(**fixed_values, **empty))
+        available = max(0, self.max_tokens - fixed_tokens)
+
+        messages = self._messages(chat_history) if has_history else []
+        history_need = sum(TokenCounter.count(line) for line in messages)
+        schema, schema_tokens = self._schema(
+            db_structure, available - min(history_need, self.history_min_tokens), user_input, messages)
+        history, history_tokens = self._history(messages, available - schema_tokens)
+
+        values = {**fixed_values, "db_structure": schema}
+        if has_history:
+            values["chat_history"] = history
+        print(
+            f"Prompt tokens: fixed={fixed_tokens} schema={schema_tokens} history={history_tokens} "
+            f"total={fixed_tokens + schema_tokens + history_tokens} budget={self.max_tokens}"
+        )
+        return template.format(**values)
+
+    def _messages(self, chat_history: Any) -> List[str]:
+        """One `user:`/`assistant:` line per message, oldest first, each capped at the per-message budget."""
+        messages = chat_history.get("messages", []) if isinstance(chat_history, dict) else getattr(chat_history, "messages", None)
+        lines = []
+        for message in messages or []:
+            role = message.get("role") if isinstance(message, dict) else getattr(message, "role", None)
+            text = message.get("message") if isinstance(message, dict) else getattr(message, "message", None)
+            if text:
+                speaker = "user" if role == 1 else "assistant"
+                lines.append(f"{speaker}: {TokenCounter.truncate(str(text), self.max_message_tokens)}")
+        return lines
+
+    def _history(self, lines: List[str], budget: int) -> Tuple[str, int]:
+        kept: List[str] = []
+        used = 0
+        for line in reversed(lines):
+            tokens = TokenCounter.count(line) + 1
+            if used + tokens > budget:
+                break
+            kept.append(line)
+            used += tokens
+        if not kept:
+            return "None", 0
+        return "\n".join(reversed(kept)), used
+
+    def _schema(self, db_structure: Any, budget: int, user_input: str, messages: List[str]) -> Tuple[str, int]:
+        full = str(db_structure)
+        tokens = TokenCounter.count(full)
+        if tokens <= budget or not isinstance(db_structure, dict):
+            return full, tokens
+
+        included: Dict[str, Any] = {}
+        used = TokenCounter.count("{}")
+        for table in self._rank_tables(db_structure, " ".join([user_input, *messages[-4:]])):
+            table_tokens = TokenCounter.count(f"{table!r}: {db_structure[table]!r}, ")
+            if used + table_tokens <= budget:
+                included[table] = db_structure[table]
+                used += table_tokens
+
+        schema = str(included)
+        used = TokenCounter.count(schema)
+        omitted = [table for table in db_structure if table not in included]
+        header = "\nOther tables (columns omitted): "
+        if omitted and used + TokenCounter.count(header) < budget:
+            names = []
+            used += TokenCounter.count(header)
+            for table in omitted:
+                table_tokens = TokenCounter.count(f"{table}, ")
+                if used + table_tokens > budget:
+                    break
+                names.append(table)
+                used += table_tokens
+            if names:
+                schema = f"{schema}{header}{', '.join(names)}"
+        return schema, TokenCounter.count(schema)
+
+    def _rank_tables(self, db_structure: Dict[str, Any], text: str) -> List[str]:
+        """Tables named in `text` first, then the tables they reference, then the rest in schema order."""
+        words = set(re.findall(r"\w+", text.lower()))
+        mentioned = [
+            table for table in db_structure
+            if table.lower() in words or table.lower().rstrip("s") in words or f"{table.lower()}s" in words
+        ]
+        referenced = [
+            fk["references"] for table in mentioned for fk in db_structure[table].get("foreign_keys", [])
+            if fk["references"] in db_structure
+        ]
+        return list(dict.fromkeys([*mentioned, *referenced, *db_structure]))
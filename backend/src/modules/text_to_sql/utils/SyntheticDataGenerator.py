@@ -0,0 +1,340 @@
+import re
+import uuid
+from graphlib import CycleError, TopologicalSorter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Inclusive value range of each integer type, by base type name.
+INTEGER_RANGES = {
+    **dict.fromkeys(("TINYINT", "INT1"), (-2 ** 7, 2 ** 7 - 1)),
+    **dict.fromkeys(("SMALLINT", "INT2", "SHORT"), (-2 ** 15, 2 ** 15 - 1)),
+    "SMALLSERIAL": (1, 2 ** 15 - 1),
+    "MEDIUMINT": (-2 ** 23, 2 ** 23 - 1),
+    **dict.fromkeys(("INT", "INTEGER", "INT4"), (-2 ** 31, 2 ** 31 - 1)),
+    "SERIAL": (1, 2 ** 31 - 1),
+    **dict.fromkeys(("BIGINT", "INT8", "LONG", "HUGEINT"), (-2 ** 63, 2 ** 63 - 1)),
+    "BIGSERIAL": (1, 2 ** 63 - 1),
+    "UTINYINT": (0, 2 ** 8 - 1),
+    "USMALLINT": (0, 2 ** 16 - 1),
+    "UINTEGER": (0, 2 ** 32 - 1),
+    "UBIGINT": (0, 2 ** 63 - 1),
+}
+DECIMAL_TYPES = {"NUMERIC", "DECIMAL", "FLOAT", "FLOAT4", "FLOAT8", "DOUBLE", "DOUBLE PRECISION", "REAL", "MONEY", "NUMBER"}
+NULL_RATIO = 0.05
+# Distinct keys used when backfilling a reference; each one costs an UPDATE.
+BACKFILL_KEYS = 100
+MAX_INTEGER = 1000
+MAX_DECIMAL = 10000
+DATE_START = np.datetime64("2020-01-01")
+DATE_RANGE_DAYS = 5 * 365
+
+
+def base_type(column_type: str) -> str:
+    """Type name without arguments or sign modifiers, e.g. "BIGINT" for "BIGINT(20) UNSIGNED"."""
+    words = re.sub(r"\(.*?\)", " ", column_type.upper()).split()
+    return " ".join(word for word in words if word not in ("UNSIGNED", "SIGNED", "ZEROFILL"))
+
+
+def integer_range(column_type: str) -> Tuple[int, int]:
+    low, high = INTEGER_RANGES[base_type(column_type)]
+    if "UNSIGNED" in column_type.upper().split():
+        return 0, 2 * high + 1
+    return low, high
+
+
+def column_kind(column_type: str) -> str:
+    name = base_type(column_type)
+    column_type = column_type.upper()
+    if "BOOL" in column_type or column_type == "TINYINT(1)":
+        return "boolean"
+    if "UUID" in column_type:
+        return "uuid"
+    if "TIMESTAMP" in column_type or "DATETIME" in column_type:
+        return "timestamp"
+    if "DATE" in column_type:
+        return "date"
+    if "TIME" in column_type:
+        return "time"
+    if "JSON" in column_type:
+        return "json"
+    if name in INTEGER_RANGES:
+        return "integer"
+    if name in DECIMAL_TYPES:
+        return "decimal"
+    return "text"
+
+
+def type_arguments(column_type: str) -> List[int]:
+    match = re.search(r"\(([\d\s,]+)\)", column_type)
+    return [int(value) for value in match.group(1).split(",")] if match else []
+
+
+def table_order(db_structure: Dict[str, Any]) -> List[str]:
+    """
+    Tables with every referenced table before its referrers.
+
+    get_db_structure already follows SQLAlchemy's sorted_tables; sorting again keeps the order
+    valid for structures built elsewhere. Self-references are ignored, and tables that reference
+    each other keep the order of the structure; see `forward_references`.
+    """
+    graph = {
+        table: {
+            fk["references"] for fk in info.get("foreign_keys", [])
+            if fk["references"] != table and fk["references"] in db_structure
+        }
+        for table, info in db_structure.items()
+    }
+    try:
+        return list(TopologicalSorter(graph).static_order())
+    except CycleError:
+        return list(db_structure)
+
+
+def forward_references(db_structure: Dict[str, Any], tables: List[str]) -> Dict[Tuple[str, str], Dict[str, str]]:
+    """
+    Foreign keys, by (table, column), that point at a table coming later in `tables`.
+
+    They only exist when tables reference each other, and break the cycle: their rows are
+    generated before the referenced table has any.
+    """
+    position = {table: index for index, table in enumerate(tables)}
+    return {
+        (table, fk["column"]): fk
+        for table in tables for fk in db_structure[table].get("foreign_keys", [])
+        if position.get(fk["references"], -1) > position[table]
+    }
+
+
+class SyntheticDataGenerator:
+    """
+    Generates typed rows for a database structure as returned by `get_db_structure`.
+
+    Values are produced column by column with NumPy and stay within the range of each column's
+    type. Primary keys and UNIQUE columns get distinct values: integers continue after the
+    current maximum, text gets a per-run prefix. Foreign keys draw from the keys of the
+    referenced table (existing and newly generated); without any, they are NULL, or point at
+    earlier rows of the same batch for self-references. Text columns use `vocabularies` (keyed by
+    "table.column") when given, and numbered placeholders otherwise.
+    """
+
+    def __init__(self, db_structure: Dict[str, Any], vocabularies: Optional[Dict[str, List[str]]] = None, seed: Optional[int] = None):
+        self.db_structure = db_structure
+        self.vocabularies = vocabularies or {}
+        self.rng = np.random.default_rng(seed)
+        self.run_id = uuid.uuid4().hex[:6]
+
+    def primary_keys(self, table: str) -> List[str]:
+        return [column["name"] for column in self.db_structure[table]["columns"] if column["primary_key"]]
+
+    def foreign_keys(self, table: str) -> Dict[str, Dict[str, str]]:
+        return {fk["column"]: fk for fk in self.db_structure[table].get("foreign_keys", [])}
+
+    def distinct_columns(self, table: str) -> List[Dict[str, Any]]:
+        """Columns whose generated values must not repeat: a single-column primary key and UNIQUE columns."""
+        primary_keys = self.primary_keys(table)
+        return [
+            column for column in self.db_structure[table]["columns"]
+            if column.get("unique") or (column["primary_key"] and len(primary_keys) == 1)
+        ]
+
+    def generate(
+        self,
+        table: str,
+        rows: int,
+        key_offsets: Optional[Dict[str, int]] = None,
+        referenced_keys: Optional[Dict[str, np.ndarray]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Column arrays for up to `rows` new rows of `table`.
+
+        `key_offsets` maps integer distinct columns to their current maximum. `referenced_keys` maps
+        each foreign-key column to the candidate values of the column it references. Fewer rows are
+        returned when a distinct column's type has no room for more values.
+        """
+        key_offsets = key_offsets or {}
+        referenced_keys = referenced_keys or {}
+        primary_keys = self.primary_keys(table)
+        foreign_keys = self.foreign_keys(table)
+        distinct = {column["name"] for column in self.distinct_columns(table) if column["name"] not in foreign_keys}
+        data: Dict[str, np.ndarray] = {}
+
+        composite_keys = [key for key in primary_keys if key in foreign_keys and key in referenced_keys]
+        if len(primary_keys) > 1 and composite_keys == primary_keys:
+            # Link tables: distinct combinations of the referenced keys.
+            data.update(self.key_combinations(primary_keys, referenced_keys, rows))
+            rows = len(next(iter(data.values())))
+
+        for column in self.db_structure[table]["columns"]:
+            if column["name"] in distinct:
+                rows = min(rows, self.capacity(column, key_offsets.get(column["name"], 0)))
+
+        self_references = []
+        for column in self.db_structure[table]["columns"]:
+            name = column["name"]
+            if name in data:
+                data[name] = data[name][:rows]
+                continue
+            if name in foreign_keys and len(referenced_keys.get(name, ())):
+                data[name] = self.rng.choice(referenced_keys[name], rows)
+                if column["nullable"]:
+                    data[name] = self.with_nulls(data[name])
+            elif name in foreign_keys and foreign_keys[name]["references"] == table:
+                # Filled from the keys of this batch once they are generated.
+                self_references.append(column)
+            elif name in foreign_keys:
+                if not column["nullable"]:
+                    raise ValueError(f"{table}.{name} references {foreign_keys[name]['references']}, which has no rows")
+                data[name] = np.full(rows, None, dtype=object)
+            elif name in distinct:
+                data[name] = self.distinct_values(column, rows, key_offsets.get(name, 0))
+            else:
+                data[name] = self.values(table, column, rows)
+                if column["nullable"]:
+                    data[name] = self.with_nulls(data[name])
+
+        for column in self_references:
+            keys = data[foreign_keys[column["name"]]["referenced_column"]]
+            data[column["name"]] = self.earlier_keys(keys, column["nullable"])
+        return {column["name"]: data[column["name"]] for column in self.db_structure[table]["columns"]}
+
+    def earlier_keys(self, keys: np.ndarray, nullable: bool) -> np.ndarray:
+        """
+        Self-references for a batch whose table has no rows yet.
+
+        Every row points at an earlier row of the batch, or at itself when the column is not
+        nullable, so the rows are valid in insertion order whatever the database checks per row.
+        """
+        positions = np.arange(len(keys))
+        if not nullable:
+            return keys[(self.rng.random(len(keys)) * (positions + 1)).astype(int)]
+        values = self.with_nulls(keys[(self.rng.random(len(keys)) * positions).astype(int)])
+        values[positions == 0] = None
+        return values
+
+    def backfill_groups(self, row_keys: np.ndarray, keys: np.ndarray) -> Dict[Any, np.ndarray]:
+        """
+        Rows to point at each key when filling in a reference after the fact, as {key: row keys}.
+
+        At most BACKFILL_KEYS keys are used, so the rows can be updated with one statement per key,
+        and NULL_RATIO of the rows stay NULL.
+        """
+        targets = self.rng.choice(keys, min(len(keys), BACKFILL_KEYS), replace=False)
+        assigned = self.rng.integers(0, len(targets), len(row_keys))
+        assigned[self.rng.random(len(row_keys)) < NULL_RATIO] = -1
+        groups = {target: row_keys[assigned == index] for index, target in enumerate(targets.tolist())}
+        return {target: rows for target, rows in groups.items() if len(rows)}
+
+    def key_combinations(self, columns: List[str], referenced_keys: Dict[str, np.ndarray], rows: int) -> Dict[str, np.ndarray]:
+        sizes = [len(referenced_keys[column]) for column in columns]
+        total = int(np.prod(sizes, dtype=object))
+        rows = min(rows, total)
+        picked = np.unique(self.rng.integers(0, total, size=rows * 2 if total > rows * 2 else total))
+        if len(picked) < rows:
+            picked = np.arange(total)
+        picked = self.rng.permutation(picked)[:rows]
+
+        combinations = {}
+        for column, size in zip(reversed(columns), reversed(sizes)):
+            picked, index = np.divmod(picked, size)
+            combinations[column] = referenced_keys[column][index]
+        return {column: combinations[column] for column in columns}
+
+    def capacity(self, column: Dict[str, Any], key_offset: int) -> int:
+        """How many distinct values the column's type still has room for."""
+        kind = column_kind(column["type"])
+        arguments = type_arguments(column["type"])
+        if kind == "integer":
+            return max(integer_range(column["type"])[1] - key_offset, 0)
+        if kind == "decimal" and arguments:
+            scale = arguments[1] if len(arguments) > 1 else 0
+            return 10 ** (arguments[0] - scale) - 1
+        if kind == "text" and arguments:
+            # Run-prefixed keys are only used when they fit; plain numbers otherwise.
+            return 10 ** arguments[0] - 1
+        if kind == "boolean":
+            return 2
+        if kind == "time":
+            return 86400
+        if kind == "json":
+            return 1
+        return np.iinfo(np.int64).max
+
+    def distinct_values(self, column: Dict[str, Any], rows: int, key_offset: int) -> np.ndarray:
+        kind = column_kind(column["type"])
+        numbers = np.arange(1, rows + 1)
+        if kind == "integer":
+            return numbers + key_offset
+        if kind == "decimal":
+            return numbers.astype(float)
+        if kind == "uuid":
+            return np.array([str(uuid.uuid4()) for _ in range(rows)], dtype=object)
+        if kind == "boolean":
+            return np.array([False, True][:rows])
+        if kind == "date":
+            days = self.rng.choice(max(rows, DATE_RANGE_DAYS), rows, replace=False)
+            return (DATE_START + days).astype(str)
+        if kind == "timestamp":
+            seconds = self.rng.choice(DATE_RANGE_DAYS * 86400, rows, replace=False)
+            return np.char.replace((DATE_START.astype("datetime64[s]") + seconds).astype(str), "T", " ")
+        if kind == "time":
+            seconds = self.rng.choice(86400, rows, replace=False)
+            return np.array([timestamp[11:] for timestamp in (np.datetime64("1970-01-01T00:00:00") + seconds).astype(str)])
+        if kind == "json":
+            return np.full(rows, "{}", dtype=object)
+
+        keys = np.char.add(f"{self.run_id}-", numbers.astype(str))
+        arguments = type_arguments(column["type"])
+        if rows and arguments and len(keys[-1]) > arguments[0]:
+            keys = numbers.astype(str)
+        return keys
+
+    def values(self, table: str, column: Dict[str, Any], rows: int) -> np.ndarray:
+        kind = column_kind(column["type"])
+        if kind == "integer":
+            low, high = integer_range(column["type"])
+            return self.rng.integers(max(low, 0), min(high, MAX_INTEGER) + 1, rows)
+        if kind == "decimal":
+            arguments = type_arguments(column["type"])
+            precision = arguments[0] if arguments else 0
+            scale = arguments[1] if len(arguments) > 1 else (0 if arguments else 2)
+            upper = min(10 ** (precision - scale) - 1, MAX_DECIMAL) if precision else MAX_DECIMAL
+            return np.round(self.rng.uniform(0, upper, rows), scale)
+        if kind == "boolean":
+            return self.rng.random(rows) < 0.5
+        if kind == "date":
+            return (DATE_START + self.rng.integers(0, DATE_RANGE_DAYS, rows)).astype(str)
+        if kind == "timestamp":
+            seconds = self.rng.integers(0, DATE_RANGE_DAYS * 86400, rows)
+            timestamps = (DATE_START.astype("datetime64[s]") + seconds).astype(str)
+            return np.char.replace(timestamps, "T", " ")
+        if kind == "time":
+            seconds = self.rng.integers(0, 86400, rows)
+            return np.array([timestamp[11:] for timestamp in (np.datetime64("1970-01-01T00:00:00") + seconds).astype(str)])
+        if kind == "uuid":
+            return np.array([str(uuid.uuid4()) for _ in range(rows)], dtype=object)
+        if kind == "json":
+            return np.full(rows, "{}", dtype=object)
+
+        vocabulary = self.vocabularies.get(f"{table}.{column['name']}")
+        if vocabulary:
+            texts = self.rng.choice(np.array(vocabulary, dtype=str), rows)
+        else:
+            texts = np.char.add(f"{column['name']} ", self.rng.integers(1, max(rows, 2) * 10, rows).astype(str))
+        return self.truncate(texts, column["type"])
+
+    def truncate(self, values: np.ndarray, column_type: str) -> np.ndarray:
+        arguments = type_arguments(column_type)
+        if arguments and column_kind(column_type) == "text":
+            return values.astype(f"U{arguments[0]}")
+        return values
+
+    def with_nulls(self, values: np.ndarray) -> np.ndarray:
+        values = values.astype(object)
+        values[self.rng.random(len(values)) < NULL_RATIO] = None
+        return values
+
+    @staticmethod
+    def to_rows(data: Dict[str, np.ndarray], columns: Sequence[str]) -> Iterator[tuple]:
+        """Row tuples of plain Python values, ready for COPY or executemany."""
+        return zip(*(data[column].tolist() for column in columns))
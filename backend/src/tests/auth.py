@@ -1,10 +1,13 @@
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import jwt
 import pytest
 from bson import ObjectId
+from fastapi import HTTPException
 
 from src.modules.auth.models.models import UserPatch
 from src.modules.auth.service import UserService
+from src.modules.auth.utils.util import _token_cache, create_tokens, decode_token
 
 
 class TestUserService:
@@ -84,6 +87,24 @@ class TestUserService:
             assert "user" in result
             assert "password" not in result["user"]
 
+    def test_decoded_tokens_are_cached(self):
+        _token_cache.clear()
+        access_token, refresh_token = create_tokens(data={"sub": "test@example.com"})
+
+        with patch('src.modules.auth.utils.util.jwt.decode', wraps=jwt.decode) as mock_decode:
+            claims = decode_token(access_token)
+            claims["sub"] = "someone@else.com"
+            assert decode_token(access_token)["sub"] == "test@example.com"
+            assert decode_token(refresh_token, "refresh")["type"] == "refresh"
+            assert mock_decode.call_count == 2
+
+            with pytest.raises(HTTPException):
+                decode_token(access_token, "refresh")
+            for _ in range(2):
+                with pytest.raises(HTTPException):
+                    decode_token(access_token + "x")
+            assert mock_decode.call_count == 4
+
     @pytest.mark.asyncio
     async def test_login_failure(self, user_service):
         email = "test@example.com"
@@ -0,0 +1,311 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from src.config.constants import Settings
+from src.config.dependencies import get_job_service
+from src.modules.jobs.models.models import Job, JobCreate, JobPatch, JobStatus
+from src.modules.jobs.service import JobService
+from src.tests.utils.database_connection import database_connection
+from src.utils.Bulkhead import Bulkhead, BulkheadFullError
+
+client = TestClient(app)
+
+
+class InMemoryJobRepository:
+    def __init__(self):
+        self.jobs: Dict[str, dict] = {}
+
+    async def create_job(self, job_data: JobCreate) -> Job:
+        job_id = str(len(self.jobs) + 1)
+        self.jobs[job_id] = {**job_data.model_dump(), "id": job_id}
+        return Job(**self.jobs[job_id])
+
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        return Job(**self.jobs[job_id]) if job_id in self.jobs else None
+
+    async def update_job(self, job_id: str, job_data: JobPatch) -> None:
+        self.jobs[job_id].update({k: v for k, v in job_data.model_dump().items() if v is not None})
+
+    async def update_job_unless_cancelled(self, job_id: str, job_data: JobPatch) -> None:
+        if self.jobs[job_id]["status"] != JobStatus.CANCELLED.value:
+            await self.update_job(job_id, job_data)
+
+    async def cancelled_job_ids(self, job_ids: List[str]) -> List[str]:
+        return [job_id for job_id in job_ids if self.jobs[job_id]["status"] == JobStatus.CANCELLED.value]
+
+    async def claim_job(self, owner: str, job_types: List[str], stale_before: datetime) -> Optional[Job]:
+        for job in self.jobs.values():
+            if job["status"] == JobStatus.QUEUED.value and job["job_type"] in job_types and self.stale(job, stale_before):
+                job.update(status=JobStatus.RUNNING.value, owner=owner, heartbeat_at=datetime.utcnow())
+                return Job(**job)
+        return None
+
+    async def touch_jobs(self, owner: str) -> None:
+        for job in self.jobs.values():
+            if job["owner"] == owner:
+                job["heartbeat_at"] = datetime.utcnow()
+
+    async def mark_interrupted(self, stale_before: datetime) -> int:
+        running = [job for job in self.jobs.values() if job["status"] == JobStatus.RUNNING.value and self.stale(job, stale_before)]
+        for job in running:
+            job["status"] = JobStatus.INTERRUPTED.value
+        return len(running)
+
+    @staticmethod
+    def stale(job: dict, stale_before: datetime) -> bool:
+        return job["heartbeat_at"] is None or job["heartbeat_at"] < stale_before
+
+
+async def wait_for(service: JobService, job_id: str) -> Job:
+    for _ in range(200):
+        job = await service.get_job(job_id)
+        if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class TestJobs:
+    @pytest.mark.asyncio
+    async def test_job_reports_progress_and_result(self):
+        repository = InMemoryJobRepository()
+        service = JobService(repository, max_workers=1, progress_interval=0)
+        progress = []
+
+        async def runner(params, on_progress):
+            for step in range(params["steps"]):
+                # Progress is reported from a worker thread, as the synthetic data runner does.
+                await asyncio.to_thread(on_progress, step / params["steps"], f"step {step}")
+                progress.append(repository.jobs["1"]["progress"])
+            return {"steps": params["steps"]}
+
+        service.register("count", runner)
+        job = await service.submit("count", {"steps": 4})
+        finished = await wait_for(service, job.id)
+
+        assert finished.status == JobStatus.SUCCEEDED
+        assert finished.progress == 1.0
+        assert finished.result == {"steps": 4}
+        assert progress[-1] == 0.75
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_work_in_thread(self):
+        repository = InMemoryJobRepository()
+        service = JobService(repository, max_workers=1, progress_interval=0)
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def work(on_progress):
+            started.set()
+            try:
+                while True:
+                    on_progress(0.5, "working")
+                    threading.Event().wait(0.01)
+            finally:
+                stopped.set()
+
+        async def runner(params, on_progress):
+            return await asyncio.to_thread(work, on_progress)
+
+        service.register("endless", runner)
+        job = await service.submit("endless", {})
+        await asyncio.to_thread(started.wait, 1)
+
+        cancelled = await service.cancel(job.id)
+
+        assert cancelled.status == JobStatus.CANCELLED
+        assert await asyncio.to_thread(stopped.wait, 1)
+        assert (await wait_for(service, job.id)).status == JobStatus.CANCELLED
+
+    @pytest.mark.asyncio
+    async def test_cancel_from_another_process_stops_the_owner(self):
+        repository = InMemoryJobRepository()
+        owner, other = JobService(repository, max_workers=1, progress_interval=0), JobService(repository, max_workers=1)
+        started = threading.Event()
+        stopped = threading.Event()
+        finish = asyncio.Event()
+
+        def work(on_progress):
+            started.set()
+            try:
+                while True:
+                    on_progress(0.5, "working")
+                    threading.Event().wait(0.01)
+            finally:
+                stopped.set()
+
+        async def endless(params, on_progress):
+            return await asyncio.to_thread(work, on_progress)
+
+        async def late(params, on_progress):
+            await finish.wait()
+            return "done"
+
+        owner.register("endless", endless)
+        owner.register("late", late)
+        job = await owner.submit("endless", {})
+        await asyncio.to_thread(started.wait, 1)
+
+        with patch.object(Settings, "JOBS_HEARTBEAT_INTERVAL_SECONDS", 0.01):
+            watcher = asyncio.create_task(owner.watch())
+            try:
+                assert (await other.cancel(job.id)).status == JobStatus.CANCELLED
+                assert await asyncio.to_thread(stopped.wait, 1)
+            finally:
+                watcher.cancel()
+
+        # Work finishing after a cancellation it has not noticed yet keeps the cancelled status.
+        late_job = await owner.submit("late", {})
+        await asyncio.sleep(0.01)
+        await other.cancel(late_job.id)
+        finish.set()
+        await asyncio.sleep(0.01)
+
+        assert (await owner.get_job(job.id)).status == JobStatus.CANCELLED
+        assert (await owner.get_job(late_job.id)).status == JobStatus.CANCELLED
+        assert (await owner.get_job(late_job.id)).result is None
+
+    @pytest.mark.asyncio
+    async def test_recover_claims_only_jobs_of_stopped_workers(self):
+        repository = InMemoryJobRepository()
+        now, stale = datetime.utcnow(), datetime.utcnow() - timedelta(hours=1)
+        running = await repository.create_job(JobCreate(job_type="count", params={}, status=JobStatus.RUNNING, heartbeat_at=stale))
+        queued = await repository.create_job(JobCreate(job_type="count", params={"value": 3}, heartbeat_at=stale))
+        live_running = await repository.create_job(JobCreate(job_type="count", params={}, status=JobStatus.RUNNING, heartbeat_at=now))
+        live_queued = await repository.create_job(JobCreate(job_type="count", params={"value": 4}, heartbeat_at=now))
+        service = JobService(repository, max_workers=2)
+
+        async def runner(params, on_progress):
+            return params["value"]
+
+        service.register("count", runner)
+        assert await service.recover() == 1
+
+        assert (await service.get_job(running.id)).status == JobStatus.INTERRUPTED
+        recovered = await wait_for(service, queued.id)
+        assert recovered.status == JobStatus.SUCCEEDED
+        assert recovered.result == 3
+        assert recovered.owner == service.owner
+        assert (await service.get_job(live_running.id)).status == JobStatus.RUNNING
+        assert (await service.get_job(live_queued.id)).status == JobStatus.QUEUED
+
+    @pytest.mark.asyncio
+    async def test_shutdown_leaves_running_jobs_to_recovery(self):
+        repository = InMemoryJobRepository()
+        service = JobService(repository, max_workers=1)
+        started = asyncio.Event()
+
+        async def runner(params, on_progress):
+            started.set()
+            await asyncio.Event().wait()
+
+        service.register("wait", runner)
+        job = await service.submit("wait", {})
+        await started.wait()
+
+        service.tasks[job.id].cancel()
+        await asyncio.sleep(0.01)
+
+        assert job.id not in service.tasks
+        assert (await service.get_job(job.id)).status == JobStatus.RUNNING
+
+    def test_submit_report_job_endpoint(self):
+        repository = InMemoryJobRepository()
+        service = JobService(repository)
+
+        async def runner(params, on_progress):
+            return {"charts": len(params["graph_requests"])}
+
+        service.register("report", runner)
+        app.dependency_overrides[get_job_service] = lambda: service
+        try:
+            response = client.post("/api/jobs/reports", json={
+                "connection": database_connection.model_dump(),
+                "graph_requests": [{"table": "product", "columns": ["standard_cost"]}],
+            }, headers={"lang": "en"})
+            job_id = response.json()["data"]["id"]
+
+            assert response.json()["data"]["status"] == JobStatus.QUEUED
+            assert "params" not in response.json()["data"]
+            assert repository.jobs[job_id]["params"]["graph_requests"][0]["table"] == "product"
+
+            response = client.get("/api/jobs/unknown")
+            assert response.json()["status_code"] == 404
+        finally:
+            app.dependency_overrides.pop(get_job_service, None)
+
+
+class TestBulkhead:
+    @pytest.mark.asyncio
+    async def test_free_slots_alternate_between_tenants(self):
+        bulkhead = Bulkhead("test", max_concurrency=1, max_queue=10)
+        order = []
+
+        async def request(tenant, label):
+            async with bulkhead.hold(tenant):
+                order.append(label)
+                await asyncio.sleep(0.01)
+
+        await bulkhead.acquire("alice")
+        tasks = [asyncio.create_task(request("alice", f"alice-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("bob", "bob-0")))
+        await asyncio.sleep(0)
+        bulkhead.release("alice")
+        await asyncio.gather(*tasks)
+
+        assert order == ["alice-0", "bob-0", "alice-1", "alice-2"]
+        assert bulkhead.active == 0 and bulkhead.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_full_tenant_queue_is_rejected(self):
+        bulkhead = Bulkhead("test", max_concurrency=2, max_queue=4, tenant_share=0.5)
+        await bulkhead.acquire("alice")
+        waiting = [asyncio.create_task(bulkhead.acquire("alice")) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(BulkheadFullError) as error:
+            await bulkhead.acquire("alice")
+        assert error.value.retry_after >= 1
+        await bulkhead.acquire("bob")
+
+        for task in waiting:
+            task.cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+        assert bulkhead.queued == 0
+
+    def test_saturated_endpoint_answers_429(self):
+        bulkhead = Bulkhead("queries", max_concurrency=1, max_queue=0)
+        asyncio.run(bulkhead.acquire("ip:testclient"))
+        with patch.dict(Bulkhead._bulkheads, {"queries": bulkhead}):
+            response = client.post("/api/queries/execute_query/", json={}, headers={"X-User-Id": "someone-else"})
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.json()["details"] == {"bulkhead": "queries"}
+
+    @pytest.mark.asyncio
+    async def test_submit_rejects_users_with_too_many_jobs(self):
+        service = JobService(InMemoryJobRepository(), max_workers=1)
+        release = asyncio.Event()
+
+        async def runner(params, on_progress):
+            await release.wait()
+
+        service.register("wait", runner)
+        limit = service.bulkhead.tenant_concurrency + service.bulkhead.tenant_queue
+        jobs = [await service.submit("wait", {}, "alice") for _ in range(limit)]
+        with pytest.raises(BulkheadFullError):
+            await service.submit("wait", {}, "alice")
+        other = await service.submit("wait", {}, "bob")
+
+        release.set()
+        for job in [*jobs, other]:
+            assert (await wait_for(service, job.id)).status == JobStatus.SUCCEEDED
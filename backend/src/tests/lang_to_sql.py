@@ -1,16 +1,31 @@
+import asyncio
 import json
+import re
+import threading
+import time
+from contextlib import aclosing
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
+from google.api_core.exceptions import ServiceUnavailable
 
 from app import app
+from src.config.constants import Settings
+from src.config.dependencies import get_lang_to_sql_service
 from src.modules.queries.schemas.DatabaseConnection import DatabaseConnection
+from src.modules.queries.utils.QueryGuard import QueryGuard, QueryRejectedError
 from src.modules.text_to_sql.models.models import Chat, Message
+from src.modules.text_to_sql.prompts.lang_to_sql import AI_ALERT_INPUT_PROMPT, AI_INPUT_PROMPT
 from src.modules.text_to_sql.service import LangToSqlService, SyntheticDataModelService
 from src.modules.text_to_sql.utils.APIClientLLMClient import APIClientLLMClient
+from src.modules.text_to_sql.utils.ChatWorkingSet import ChatWorkingSet
+from src.modules.text_to_sql.utils.PromptBuilder import PromptBuilder, TokenCounter
+from src.modules.text_to_sql.utils.SyntheticDataGenerator import SyntheticDataGenerator, column_kind
 from src.tests.utils.database_connection import database_connection
 from src.tests.utils.mock_db_structure import MOCK_DB_STRUCTURE
+from src.utils.LLMGateway import LLMGateway, LLMUnavailableError, parse_targets
 
 client = TestClient(app)
 
@@ -197,6 +212,219 @@ class TestLangToSqlService:
         mock_service_with_memory.repository.get_chat.assert_called_with(chat_id)
         assert mock_service_with_memory.repository.add_message.call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_chat_guards_generated_sql(self, setup_service, fake_connection, fake_chat_data):
+        _, query_adapter, llm_client, repository = setup_service
+        guard = QueryGuard(query_adapter, max_cost=1000, max_rows=5000, row_limit=100)
+        service = LangToSqlService(query_adapter, llm_client, repository, guard)
+
+        repository.create_chat = AsyncMock(return_value="guard-chat")
+        repository.add_message = AsyncMock(return_value=True)
+        repository.get_chat = AsyncMock(return_value=MagicMock(messages=[]))
+        repository.get_users_chats = AsyncMock(return_value=[])
+        query_adapter.execute_query.return_value = []
+        llm_client.get_human_response.return_value = "Here they are:"
+
+        query_adapter.explain.side_effect = lambda query, connection: (
+            {"cost": 50, "rows": 100} if "LIMIT 100" in query else {"cost": 90000, "rows": 2500000})
+        llm_client.get_model_response.return_value = "```sql\nSELECT * FROM orders CROSS JOIN customers\n```"
+        limited = await service.chat(fake_connection, "Show everything", fake_chat_data, "")
+
+        llm_client.get_model_response.return_value = "DELETE FROM orders"
+        rejected = await service.chat(fake_connection, "Remove the orders", fake_chat_data, "")
+
+        assert limited["sql_query"] == "SELECT * FROM orders CROSS JOIN customers LIMIT 100"
+        query_adapter.execute_query.assert_called_once_with(limited["sql_query"], fake_connection)
+        assert "rejected" in rejected["error"]
+        with pytest.raises(QueryRejectedError):
+            guard.check("SELECT 1; DROP TABLE orders", fake_connection)
+
+        # The database cannot EXPLAIN DDL, so it is not estimated.
+        query_adapter.explain.reset_mock()
+        assert guard.check("CREATE TABLE archive (id INT)", fake_connection) == "CREATE TABLE archive (id INT)"
+        query_adapter.explain.assert_not_called()
+        with pytest.raises(QueryRejectedError):
+            guard.check("CREATE TABLE archive AS SELECT * FROM orders CROSS JOIN customers", fake_connection)
+
+    def test_chat_stream_sends_events_in_order(self, setup_service, fake_connection):
+        service, query_adapter, llm_client, repository = setup_service
+        repository.get_chat = AsyncMock(return_value=MagicMock(messages=[]))
+        repository.add_message = AsyncMock(return_value=True)
+        query_adapter.get_db_structure.return_value = {"tables": ["orders"]}
+        query_adapter.stream_query.return_value = iter([[{"id": 1}, {"id": 2}], [{"id": 3}]])
+        llm_client.stream_human_response.return_value = iter(["Here ", "are ", "the orders:"])
+        llm_client.get_model_response.return_value = "SELECT id FROM orders"
+
+        app.dependency_overrides[get_lang_to_sql_service] = lambda: service
+        try:
+            response = client.post("/api/text-to-sql/chat/stream", json={
+                "connection": fake_connection.model_dump(),
+                "user_input": "Show me the orders",
+                "chat_data": {"user_id": "user-123"},
+                "chat_id": "stream-chat",
+            })
+        finally:
+            app.dependency_overrides.clear()
+
+        events = [
+            (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+            for block in response.text.strip().split("\n\n")
+        ]
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert [event for event, _ in events] == ["chat", "header", "header", "header", "sql", "rows", "rows", "message"]
+        assert events[4][1] == {"sql_query": "SELECT id FROM orders"}
+        assert events[5][1]["rows"] == [{"id": 1}, {"id": 2}]
+        assert events[-1][1]["message"]["message"] == "Here are the orders:\n[{'id': 1}, {'id': 2}, {'id': 3}]"
+
+    @pytest.mark.asyncio
+    async def test_chat_stream_closes_the_cursor_when_the_client_leaves(self, setup_service, fake_connection):
+        service, query_adapter, llm_client, repository = setup_service
+        repository.get_chat = AsyncMock(return_value=MagicMock(messages=[]))
+        repository.add_message = AsyncMock(return_value=True)
+        llm_client.stream_human_response.return_value = iter(["Here they are:"])
+        llm_client.get_model_response.return_value = "SELECT id FROM orders"
+        closed = []
+
+        def rows():
+            try:
+                yield [{"id": 1}]
+                yield [{"id": 2}]
+            finally:
+                closed.append(True)
+
+        query_adapter.stream_query.return_value = rows()
+        async with aclosing(service.chat_stream(fake_connection, "Show me the orders", Chat(user_id="user-123"), "stream-chat")) as stream:
+            async for event, _ in stream:
+                if event == "rows":
+                    break
+            assert not closed
+
+        assert closed == [True]
+
+    @pytest.mark.asyncio
+    async def test_chat_stream_cancels_sql_generation_when_the_client_leaves(self, setup_service, fake_connection):
+        service, query_adapter, llm_client, repository = setup_service
+        repository.get_chat = AsyncMock(return_value=MagicMock(messages=[]))
+        repository.add_message = AsyncMock(return_value=True)
+        llm_client.stream_human_response.return_value = iter(["Here ", "they are:"])
+        released = threading.Event()
+        llm_client.get_model_response.side_effect = lambda *args, **kwargs: released.wait(5) and "SELECT id FROM orders"
+        tasks = []
+        create_task = asyncio.create_task
+
+        def record_task(coroutine):
+            tasks.append(create_task(coroutine))
+            return tasks[-1]
+
+        try:
+            with patch("src.modules.text_to_sql.service.asyncio.create_task", side_effect=record_task):
+                async with aclosing(service.chat_stream(fake_connection, "Show me the orders", Chat(user_id="user-123"), "stream-chat")) as stream:
+                    async for event, _ in stream:
+                        if event == "header":
+                            break
+            await asyncio.sleep(0)
+            assert len(tasks) == 1 and tasks[0].cancelled()
+        finally:
+            released.set()
+
+    @pytest.mark.asyncio
+    async def test_chat_delta_mode_returns_only_new_messages(self, setup_service, fake_connection, fake_chat_data):
+        service, query_adapter, llm_client, repository = setup_service
+        repository.get_chat = AsyncMock(return_value=MagicMock(messages=[Message(role=1, message="Earlier question")]))
+        repository.add_message = AsyncMock(return_value=True)
+        repository.get_users_chats = AsyncMock(return_value=[{"chat_id": "delta-chat", "title": "Orders"}])
+        repository.get_chats_version = AsyncMock(return_value=3)
+        query_adapter.execute_query.return_value = [{"count": 7}]
+        llm_client.get_model_response.return_value = "SELECT COUNT(*) FROM orders"
+        llm_client.get_human_response.return_value = "You have:"
+
+        changed = await service.chat(fake_connection, "How many orders?", fake_chat_data, "delta-chat", "delta", 2)
+        unchanged = await service.chat(fake_connection, "How many orders?", fake_chat_data, "delta-chat", "delta", 3)
+
+        assert [message.message for message in changed["messages"]] == ["How many orders?", "You have:\n[{'count': 7}]"]
+        assert changed["chats_version"] == 3 and changed["chats"] == [{"chat_id": "delta-chat", "title": "Orders"}]
+        assert unchanged["chats_version"] == 3 and "chats" not in unchanged
+        repository.get_users_chats.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_chat_keeps_blocking_calls_off_the_event_loop(self, setup_service, fake_connection, fake_chat_data):
+        service, query_adapter, llm_client, repository = setup_service
+        repository.get_chat = AsyncMock(return_value=MagicMock(messages=[]))
+        repository.add_message = AsyncMock(return_value=True)
+        repository.get_users_chats = AsyncMock(return_value=[])
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def blocking(value):
+            def call(*args, **kwargs):
+                threads.append(threading.get_ident())
+                return value
+            return call
+
+        query_adapter.get_db_structure.side_effect = blocking({})
+        query_adapter.execute_query.side_effect = blocking([{"count": 7}])
+        llm_client.get_model_response.side_effect = blocking("SELECT COUNT(*) FROM orders")
+        llm_client.get_human_response.side_effect = blocking("You have:")
+
+        response = await service.chat(fake_connection, "How many orders?", fake_chat_data, "thread-chat")
+
+        assert response["header"] == "You have:"
+        assert len(threads) == 4 and loop_thread not in threads
+        ChatWorkingSet.discard("thread-chat")
+
+    @pytest.mark.asyncio
+    async def test_follow_up_questions_refine_the_last_result_locally(self, setup_service, fake_connection, fake_chat_data):
+        service, query_adapter, llm_client, repository = setup_service
+        repository.get_chat = AsyncMock(return_value=MagicMock(messages=[]))
+        repository.add_message = AsyncMock(return_value=True)
+        repository.get_users_chats = AsyncMock(return_value=[])
+        query_adapter.execute_query.return_value = [
+            {"name": "Ana", "city": "Medellín", "price": 30.5},
+            {"name": "Luis", "city": "Bogotá", "price": 12.0},
+            {"name": "Sara", "city": "Medellín", "price": 18.25},
+        ]
+        llm_client.get_human_response.return_value = "Here they are:"
+        ChatWorkingSet.discard("working-set-chat")
+
+        llm_client.get_model_response.return_value = "SELECT name, city, price FROM customers"
+        await service.chat(fake_connection, "Show the customers", fake_chat_data, "working-set-chat")
+        llm_client.get_model_response.return_value = (
+            "SELECT name, price FROM public.last_result WHERE city = 'Medellín' ORDER BY price DESC")
+        refined = await service.chat(fake_connection, "Now only the ones from Medellín, sorted by price", fake_chat_data, "working-set-chat")
+
+        assert json.loads(refined["sql_results"]) == [{"name": "Ana", "price": 30.5}, {"name": "Sara", "price": 18.25}]
+        query_adapter.execute_query.assert_called_once()
+        last_result = llm_client.get_model_response.call_args.kwargs["last_result"]
+        assert last_result.startswith("last_result(name VARCHAR, city VARCHAR, price DOUBLE), 3 rows")
+
+        other_database = fake_connection.model_copy(update={"database_name": "other_db"})
+        missing = await service.chat(other_database, "Sort that by price", fake_chat_data, "working-set-chat")
+        assert "no longer available" in missing["error"]
+        ChatWorkingSet.discard("working-set-chat")
+
+    def test_working_set_only_answers_from_the_chats_own_result(self):
+        owner = ("fingerprint", "public")
+        ChatWorkingSet.store("chat-a", owner, [{"secret": "a"}])
+        ChatWorkingSet.store("chat-b", owner, [{"secret": "b"}])
+        try:
+            for query in [
+                "SELECT * FROM query_table('chat_chat_a')",
+                "SELECT * FROM read_csv('/etc/passwd')",
+                "SELECT * FROM last_result, duckdb_tables()",
+                "SELECT * FROM last_result JOIN chat_chat_a ON true",
+                "SELECT * FROM last_result; SELECT * FROM last_result",
+            ]:
+                assert not ChatWorkingSet.is_refinement(query, "postgres"), query
+            assert ChatWorkingSet.is_refinement("WITH a AS (SELECT * FROM last_result) SELECT * FROM a", "postgres")
+
+            assert ChatWorkingSet.query("chat-b", owner, "SELECT * FROM chat_chat_a.last_result", "postgres") == [{"secret": "b"}]
+            # Even SQL that got past the guard cannot read files.
+            with pytest.raises(Exception):
+                ChatWorkingSet.query("chat-b", owner, "SELECT * FROM read_text('/etc/passwd')", "postgres")
+        finally:
+            ChatWorkingSet.discard("chat-a")
+            ChatWorkingSet.discard("chat-b")
+
 
 class TestSyntheticData:
     @patch("src.modules.text_to_sql.service.SyntheticDataModelService.generate_synthetic_data")
@@ -219,6 +447,161 @@ class TestSyntheticData:
 
         mock_generate_synthetic_data.assert_called_once_with(1, database_connection)
 
+    @pytest.mark.asyncio
+    async def test_generate_local_data_respects_keys(self):
+        query_adapter = MagicMock()
+        llm_client = MagicMock()
+        query_adapter.get_db_structure.return_value = MOCK_DB_STRUCTURE
+        query_adapter.execute_query.side_effect = lambda query, connection, use_cache=True: (
+            [{"id": 40}] if "MAX(" in query else [{"id": 7}] if "FROM inventory.supplier" in query else [])
+        loaded = {}
+
+        def bulk_insert(table, columns, rows, connection, ignore_conflicts=False):
+            loaded[table] = [dict(zip(columns, row)) for row in rows]
+            return len(loaded[table])
+
+        query_adapter.bulk_insert.side_effect = bulk_insert
+        llm_client.get_model_response.return_value = '```json\n{"category.name": ["Hardware", "Garden"]}\n```'
+        service = SyntheticDataModelService(query_adapter, llm_client)
+
+        result = await service.generate_local_data(200, database_connection, use_llm_vocabulary=True)
+
+        assert result == {"category": 200, "supplier": 200, "product": 200}
+        assert list(loaded) == ["category", "supplier", "product"]
+        assert [row["id"] for row in loaded["category"]] == list(range(41, 241))
+        assert {row["name"] for row in loaded["category"]} <= {"Hardware", "Garden"}
+        assert {row["category_id"] for row in loaded["product"]} <= set(range(41, 241))
+        assert {row["supplier_id"] for row in loaded["product"]} <= {7, *range(41, 241)}
+        assert all(len(row["phone"] or "") <= 20 for row in loaded["supplier"])
+        assert all(isinstance(row["price"], float) for row in loaded["product"])
+
+    def test_generated_values_fit_their_column_types(self):
+        structure = {
+            "place": {
+                "columns": [
+                    {"name": "code", "type": "SMALLINT", "nullable": False, "primary_key": True},
+                    {"name": "email", "type": "VARCHAR(8)", "nullable": False, "primary_key": False, "unique": True},
+                    {"name": "rank", "type": "TINYINT", "nullable": False, "primary_key": False},
+                    {"name": "location", "type": "POINT", "nullable": False, "primary_key": False},
+                ],
+                "foreign_keys": [],
+            }
+        }
+        generator = SyntheticDataGenerator(structure, seed=1)
+
+        data = generator.generate("place", 1000, key_offsets={"code": 2 ** 15 - 301})
+
+        assert column_kind("POINT") == "text" and column_kind("INT UNSIGNED") == "integer"
+        assert list(data["code"]) == list(range(2 ** 15 - 300, 2 ** 15))
+        assert len(set(data["email"])) == 300 and all(len(email) <= 8 for email in data["email"])
+        assert 0 <= data["rank"].min() and data["rank"].max() <= 127
+
+    @pytest.mark.asyncio
+    async def test_foreign_keys_without_referenced_rows_stay_valid(self):
+        structure = {
+            "department": {
+                "columns": [{"name": "id", "type": "INTEGER", "nullable": False, "primary_key": True}],
+                "foreign_keys": [],
+            },
+            "employee": {
+                "columns": [
+                    {"name": "manager_id", "type": "INTEGER", "nullable": True, "primary_key": False},
+                    {"name": "id", "type": "INTEGER", "nullable": False, "primary_key": True},
+                    {"name": "department_id", "type": "INTEGER", "nullable": True, "primary_key": False},
+                ],
+                "foreign_keys": [
+                    {"column": "manager_id", "references": "employee", "referenced_column": "id"},
+                    {"column": "department_id", "references": "department", "referenced_column": "id"},
+                ],
+            },
+        }
+        generator = SyntheticDataGenerator(structure, seed=3)
+
+        data = generator.generate("employee", 200, referenced_keys={"manager_id": np.array([]), "department_id": np.array([])})
+
+        ids = list(data["id"])
+        assert list(data) == ["manager_id", "id", "department_id"]
+        assert data["manager_id"][0] is None and any(manager is not None for manager in data["manager_id"])
+        assert all(manager is None or manager in ids[:position] for position, manager in enumerate(data["manager_id"]))
+        assert all(department is None for department in data["department_id"])
+        structure["employee"]["columns"][2]["nullable"] = False
+        with pytest.raises(ValueError):
+            generator.generate("employee", 10, referenced_keys={"department_id": np.array([])})
+
+    @pytest.mark.asyncio
+    async def test_tables_referencing_each_other_are_backfilled(self):
+        structure = {
+            "department": {
+                "columns": [
+                    {"name": "id", "type": "INTEGER", "nullable": False, "primary_key": True},
+                    {"name": "head_id", "type": "INTEGER", "nullable": True, "primary_key": False},
+                ],
+                "foreign_keys": [{"column": "head_id", "references": "employee", "referenced_column": "id"}],
+            },
+            "employee": {
+                "columns": [
+                    {"name": "id", "type": "INTEGER", "nullable": False, "primary_key": True},
+                    {"name": "department_id", "type": "INTEGER", "nullable": False, "primary_key": False},
+                ],
+                "foreign_keys": [{"column": "department_id", "references": "department", "referenced_column": "id"}],
+            },
+        }
+        query_adapter = MagicMock()
+        query_adapter.get_db_structure.return_value = structure
+        updates = []
+        query_adapter.execute_query.side_effect = lambda query, connection, use_cache=True: (
+            updates.append(query) if query.startswith("UPDATE") else [])
+        loaded = {}
+
+        def bulk_insert(table, columns, rows, connection, ignore_conflicts=False):
+            loaded[table] = [dict(zip(columns, row)) for row in rows]
+            return len(loaded[table])
+
+        query_adapter.bulk_insert.side_effect = bulk_insert
+        service = SyntheticDataModelService(query_adapter, MagicMock())
+
+        assert await service.generate_local_data(300, database_connection) == {"department": 300, "employee": 300}
+
+        assert all(row["head_id"] is None for row in loaded["department"])
+        assert {row["department_id"] for row in loaded["employee"]} <= set(range(1, 301))
+        heads = {}
+        for update in updates:
+            match = re.fullmatch(r"UPDATE \S+ SET head_id = (\d+) WHERE id IN \(([\d, ]+)\)", update)
+            heads.update(dict.fromkeys(map(int, match.group(2).split(", ")), int(match.group(1))))
+        assert set(heads.values()) <= set(range(1, 301)) and len(heads) > 250
+
+        structure["department"]["columns"][1]["nullable"] = False
+        loaded.clear()
+        with pytest.raises(ValueError, match="reference each other"):
+            await service.generate_local_data(300, database_connection)
+        assert not loaded
+
+    @pytest.mark.asyncio
+    async def test_synthetic_data_prompts_have_constant_size(self):
+        query_adapter = MagicMock()
+        query_adapter.get_db_structure.return_value = MOCK_DB_STRUCTURE
+        counts = iter(range(0, 1000, 40))
+
+        def execute_query(query, connection, use_cache=True):
+            if "UNION ALL" in query:
+                count = next(counts)
+                return [{"table_name": table, "row_count": count, "max_key": str(count)} for table in MOCK_DB_STRUCTURE]
+            return [{"message": "Query executed successfully"}]
+
+        query_adapter.execute_query.side_effect = execute_query
+        with patch("src.modules.text_to_sql.utils.APIClientLLMClient.genai") as mock_genai:
+            mock_genai.GenerativeModel.return_value.generate_content.return_value = MagicMock(text="INSERT INTO inventory.category VALUES (1, 'A');")
+            service = SyntheticDataModelService(query_adapter, APIClientLLMClient())
+
+            await service.generate_synthetic_data(iterations=160, connection=database_connection)
+
+        calls = mock_genai.GenerativeModel.return_value.generate_content.call_args_list
+        prompts = [call.args[0] for call in calls]
+        assert len(prompts) == 4 and all(len(contents) == 1 for contents in prompts)
+        assert "- product: 120 rows, max primary key 120" in prompts[-1][0]["parts"][0]
+        sizes = [len(contents[0]["parts"][0]) for contents in prompts]
+        assert max(sizes) - min(sizes) < 50
+
     @pytest.fixture
     def mock_synthetic_data_service(self):
         mock_query_adapter = MagicMock()
@@ -235,3 +618,87 @@ class TestSyntheticData:
 
         assert isinstance(response, str)
         assert "INSERT INTO" in response
+
+
+class TestLLMGateway:
+    def setup_method(self):
+        LLMGateway.clear()
+
+    def test_rate_limited_model_fails_over(self):
+        calls = []
+
+        class QuotaError(Exception):
+            code = 429
+
+        def call(provider, model):
+            calls.append(model)
+            if model == "primary":
+                raise QuotaError("Resource has been exhausted")
+            return MagicMock(content="SELECT 1", usage_metadata={"output_tokens": 3})
+
+        with patch.multiple(Settings, LLM_MAX_RETRIES=1, LLM_BACKOFF_BASE_SECONDS=0):
+            response = LLMGateway.invoke(parse_targets("google", "primary", "openai:backup"), call)
+
+        assert response.content == "SELECT 1"
+        assert calls == ["primary", "primary", "backup"]
+        metrics = LLMGateway.metrics()
+        assert metrics["google:primary"]["rate_limited"] == 2 and metrics["google:primary"]["concurrency_limit"] < Settings.LLM_MAX_CONCURRENCY
+        assert metrics["openai:backup"]["failovers"] == 1 and metrics["openai:backup"]["output_tokens"] == 3
+
+    def test_request_errors_are_not_retried(self):
+        call = MagicMock(side_effect=ValueError("429 rows were invalid"))
+        with pytest.raises(ValueError):
+            LLMGateway.invoke(parse_targets("google", "primary", "backup"), call)
+        call.assert_called_once_with("google", "primary")
+
+    def test_rate_tokens_are_only_spent_with_a_slot(self):
+        release = threading.Event()
+        with patch.multiple(
+                Settings, LLM_REQUESTS_PER_MINUTE=1, LLM_BURST=2, LLM_MAX_CONCURRENCY=1, LLM_QUEUE_TIMEOUT_SECONDS=0.05, LLM_FALLBACK_MODELS=""):
+            busy = threading.Thread(target=LLMGateway.invoke, args=(parse_targets("google", "primary"), lambda *_: release.wait(1)))
+            busy.start()
+            time.sleep(0.02)
+            with pytest.raises(LLMUnavailableError):
+                LLMGateway.invoke(parse_targets("google", "primary"), MagicMock())
+            release.set()
+            busy.join()
+
+            # The call that timed out waiting for a slot left the second token of the burst in place.
+            assert LLMGateway.invoke(parse_targets("google", "primary"), lambda *_: "SELECT 1", lambda _: 0) == "SELECT 1"
+
+    def test_client_raises_instead_of_returning_the_error(self):
+        with patch("src.modules.text_to_sql.utils.APIClientLLMClient.genai") as mock_genai, \
+                patch.multiple(Settings, LLM_MAX_RETRIES=0, LLM_FALLBACK_MODELS=""):
+            mock_genai.GenerativeModel.return_value.generate_content.side_effect = ServiceUnavailable("Service Unavailable")
+            with pytest.raises(LLMUnavailableError):
+                APIClientLLMClient().get_model_response("INSERT some rows")
+
+
+class TestPromptBuilder:
+    def test_schema_and_history_are_trimmed_in_priority_order(self):
+        columns = [{"name": f"column_{i}", "type": "VARCHAR", "nullable": True, "primary_key": False} for i in range(30)]
+        db_structure = {f"table_{i}": {"columns": columns, "foreign_keys": []} for i in range(40)}
+        db_structure["invoices"] = {
+            "columns": columns, "foreign_keys": [{"column": "column_1", "references": "table_7", "referenced_column": "column_0"}]}
+        history = Chat(user_id="user-123", messages=[
+            Message(role=1, message=f"old question {i} " + "padding " * 400) for i in range(20)
+        ] + [Message(role=0, message="latest answer")])
+        user_input = "How many invoices were paid last month?"
+
+        builder = PromptBuilder(max_tokens=3000, history_min_tokens=600, max_message_tokens=200)
+        prompt = builder.build(
+            AI_INPUT_PROMPT, db_structure=db_structure, user_input=user_input, schema_name="public",
+            chat_history=history, db_type="postgresql", last_result="None")
+
+        assert TokenCounter.count(prompt) <= 3000
+        assert user_input in prompt
+        assert "'invoices': {" in prompt and "'table_7': {" in prompt
+        assert "Other tables (columns omitted): " in prompt and "'table_39': {" not in prompt
+        assert "assistant: latest answer" in prompt and "old question 0 " not in prompt
+
+    def test_small_prompts_are_sent_whole(self):
+        builder = PromptBuilder(max_tokens=8000)
+        prompt = builder.build(
+            AI_ALERT_INPUT_PROMPT, db_structure=MOCK_DB_STRUCTURE, user_input="Count the products",
+            schema_name="inventory", db_type="postgresql")
+        assert str(MOCK_DB_STRUCTURE) in prompt
@@ -1,9 +1,34 @@
 import json
-from unittest.mock import AsyncMock, patch
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
+import pandas as pd
+import pytest
 from fastapi.testclient import TestClient
 
 from app import app
+from src.config.constants import Settings
+from src.modules.queries.utils.DatabaseType import DatabaseType
+from src.modules.reports.models.models import ReportDefinition, ReportSnapshot
+from src.modules.reports.repositories.repository import ReportRepository
+from src.modules.reports.schemas.GraphRequest import GraphRequest
+from src.modules.reports.service import ReportService
+from src.modules.reports.utils.AdditionalInfo import AdditionalInfoClient
+from src.modules.reports.utils.bar_chart import BarChart
+from src.modules.reports.utils.binning import compute_histogram
+from src.modules.reports.utils.chart_pool import ChartPool, render_charts
+from src.modules.reports.utils.column_profile import (
+    ColumnProfileCache,
+    build_column_profile,
+)
+from src.modules.reports.utils.downsampling import OTHER_LABEL, lttb
+from src.modules.reports.utils.histogram import Histogram
+from src.modules.reports.utils.pie_chart import PieChart
+from src.modules.reports.utils.table import Table
+from src.modules.reports.utils.utils import split_aggregated_data
 from src.tests.utils.database_connection import database_connection
 
 client = TestClient(app)
@@ -41,3 +66,270 @@ class TestReportService:
 
         assert response.status_code == 200
         assert response.json()["status"] == "success"
+
+    @pytest.mark.asyncio
+    async def test_create_graph_batches_columns_per_table(self):
+        lock = threading.Lock()
+        in_flight = {"current": 0, "max": 0}
+
+        def execute_query(query, connection):
+            with lock:
+                in_flight["current"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["current"])
+            time.sleep(0.05)
+            with lock:
+                in_flight["current"] -= 1
+
+            if "COUNT(DISTINCT" in query:
+                row = {"row_count": 4}
+                for i in range(query.count("COUNT(DISTINCT")):
+                    row.update({
+                        f"non_null_count_{i}": 4, f"distinct_count_{i}": 3, f"min_value_{i}": "a", f"max_value_{i}": "c"
+                    })
+                return [row]
+
+            columns = query[len("SELECT "):query.index(" FROM")].split(", ")
+            if "GROUPING SETS" in query:
+                columns = columns[:-1]
+                return [
+                    {**{other: value if other == column else None for other in columns}, "count": count}
+                    for column in columns
+                    for value, count in [("b", 2), ("a", 1), ("c", 1)]
+                ]
+            return [{column: value for column in columns} for value in ["a", "b", "b", "c"]]
+
+        query_adapter = MagicMock()
+        query_adapter.execute_query.side_effect = execute_query
+        service = ReportService(ReportRepository(), query_adapter, max_concurrency=2)
+        ColumnProfileCache.invalidate()
+
+        graph_requests = [
+            GraphRequest(table="warehouse", columns=["country", "region", "city"]),
+            GraphRequest(table="product", columns=["category"]),
+        ]
+
+        with patch("src.modules.reports.service.AdditionalInfoClient") as MockInfoClient:
+            MockInfoClient.return_value.get_additional_infos.side_effect = lambda charts, language: ["summary"] * len(charts)
+            result = await service.create_graph(database_connection, graph_requests, "en-US,en;q=0.9")
+
+        assert list(result.keys()) == ["warehouse.country", "warehouse.region", "warehouse.city", "product.category"]
+        assert [chart["type"] for chart in result["warehouse.region"]] == ["bar", "pie", "table"]
+        assert result["warehouse.region"][0]["data"]["labels"] == ["b", "a", "c"]
+        assert result["warehouse.region"][0]["data"]["datasets"][0]["data"] == [2, 1, 1]
+        assert result["warehouse.city"][2]["data"]["columns"] == ["city"]
+        assert all(chart["additional_info"] == "summary" for chart in result["product.category"])
+        assert in_flight["max"] == 2
+        # Per table: one profile query, one shared value-count query (bar and pie) and one row query.
+        assert query_adapter.execute_query.call_count == 2 * 3
+
+        with patch("src.modules.reports.service.AdditionalInfoClient") as MockInfoClient:
+            MockInfoClient.return_value.get_additional_infos.side_effect = lambda charts, language: ["summary"] * len(charts)
+            await service.create_graph(database_connection, graph_requests, "en-US")
+            assert MockInfoClient.return_value.get_additional_infos.call_count == 1
+
+        profile_queries = [call for call in query_adapter.execute_query.call_args_list if "COUNT(DISTINCT" in call.args[0]]
+        assert len(profile_queries) == 2
+
+    @pytest.mark.asyncio
+    async def test_report_queries_aggregate_in_database(self):
+        repository = ReportRepository()
+
+        grouping_sets = await repository.aggregate_query(
+            "value_counts", ["country", "region"], "warehouse", "inventory", DatabaseType.POSTGRESQL)
+        union = await repository.aggregate_query(
+            "value_counts", ["country", "region"], "warehouse", "inventory", DatabaseType.MYSQL)
+        histogram = await repository.aggregate_query(
+            "histogram", ["price", "stock"], "product", "inventory", DatabaseType.POSTGRESQL)
+        rows = await repository.aggregate_query("rows", ["country", "region"], "warehouse", "inventory", DatabaseType.MYSQL)
+        postgres_profile = await repository.column_profile(["active"], "warehouse", "inventory", 100, DatabaseType.POSTGRESQL)
+        mysql_profile = await repository.column_profile(["active"], "warehouse", "inventory", 100, DatabaseType.MYSQL)
+
+        assert "GROUP BY GROUPING SETS ((country), (region))" in grouping_sets
+        assert union.count("UNION ALL") == 1 and "NULL AS region" in union
+        assert f"value_rank <= {Settings.REPORTS_VALUE_COUNTS_LIMIT}" in grouping_sets
+        assert union.count(f"value_rank <= {Settings.REPORTS_VALUE_COUNTS_LIMIT}") == 2
+        assert "FLOOR(" in histogram and histogram.count("UNION ALL") == 1
+        assert rows == "SELECT country, region FROM inventory.warehouse LIMIT 100"
+        # PostgreSQL has no MIN(boolean), so the profile sorts instead.
+        assert "MIN(" not in postgres_profile and "ARRAY_AGG(active ORDER BY active ASC)" in postgres_profile
+        assert "MIN(active) AS min_value_0, MAX(active) AS max_value_0" in mysql_profile
+
+    @pytest.mark.asyncio
+    async def test_histogram_buckets_wide_integer_ranges(self):
+        duckdb = pytest.importorskip("duckdb")
+        repository = ReportRepository()
+        # Both max - min and (value - min) * buckets overflow INTEGER arithmetic on this column.
+        values = [-2_000_000_000, 0, 2_148_000, 2_000_000_000]
+        database = duckdb.connect()
+        database.execute("CREATE SCHEMA inventory")
+        database.execute("CREATE TABLE inventory.product (stock INTEGER)")
+        database.executemany("INSERT INTO inventory.product VALUES (?)", [[value] for value in values])
+
+        query = await repository.aggregate_query("histogram", ["stock"], "product", "inventory", DatabaseType.DUCKDB)
+        buckets = database.execute(query).fetchall()
+
+        assert [row[1] for row in buckets] == [0, 500, 999]
+        assert [row[2] for row in buckets] == [1, 2, 1]
+        assert (buckets[0][3], buckets[0][4]) == (-2_000_000_000, 2_000_000_000)
+
+    def test_split_aggregated_data_keeps_column_values(self):
+        df = pd.DataFrame([
+            {"country": None, "stock": 5, "count": 3},
+            {"country": "CO", "stock": None, "count": 2},
+            {"country": None, "stock": 7, "count": 1},
+        ], dtype=object)
+
+        frames = split_aggregated_data("value_counts", df, ["country", "stock"])
+
+        assert frames["country"]["country"].tolist() == ["CO"]
+        assert frames["stock"]["stock"].tolist() == [5, 7]
+        assert BarChart().generate("stock", frames["stock"])["data"]["labels"] == [5, 7]
+
+    @pytest.mark.asyncio
+    async def test_infer_column_types_from_profile(self):
+        service = ReportService(ReportRepository(), MagicMock())
+
+        numeric = build_column_profile({"row_count": 100, "non_null_count": 90, "distinct_count": 50, "min_value": 1, "max_value": 99})
+        status = build_column_profile({"row_count": 100, "non_null_count": 100, "distinct_count": 3, "min_value": "a", "max_value": "c"})
+        empty = build_column_profile({"row_count": 0, "non_null_count": 0, "distinct_count": 0})
+
+        assert numeric.null_ratio == pytest.approx(0.1)
+        assert await service.infer_column_types(numeric) == "numerical"
+        assert await service.infer_column_types(status) == "categorical"
+        assert await service.infer_column_types(empty) == "unknown"
+
+    def test_high_cardinality_charts_are_bounded(self):
+        categories = pd.DataFrame({
+            "user_id": [f"u{i}" for i in range(1000)],
+            "count": list(range(1000, 0, -1)),
+            "total_count": 600000,
+        })
+        series = pd.DataFrame({"price": [float(i) for i in range(5000, 0, -1)], "count": [i % 17 for i in range(5000)]})
+
+        pie = PieChart().generate("user_id", categories)
+        bar = BarChart().generate("price", series)
+
+        assert len(pie["data"]["labels"]) == Settings.REPORTS_TOP_N + 1
+        assert pie["data"]["labels"][-1] == OTHER_LABEL
+        assert sum(pie["data"]["datasets"][0]["data"]) == 600000
+        assert len(bar["data"]["labels"]) == Settings.REPORTS_MAX_POINTS
+        assert bar["data"]["labels"][0] == 1.0 and bar["data"]["labels"][-1] == 5000.0
+        assert list(lttb([0, 1, 2, 3, 4], [0, 5, 0, 0, 0], 3)) == [0, 1, 4]
+
+    @pytest.mark.asyncio
+    async def test_large_tables_are_charted_in_worker_processes(self):
+        rows = {
+            "value_counts": [{"country": country, "count": count} for country, count in [("FR", 5), ("DE", 3)]],
+            "rows": [{"price": float(i)} for i in range(1000)],
+        }
+        columns = {"value_counts": ["country"], "rows": ["price"]}
+        graphs = {"country": [BarChart(), PieChart()], "price": [Table()]}
+        expected = render_charts(rows, columns, graphs)
+
+        try:
+            with patch.object(Settings, "REPORTS_CHART_PROCESS_MIN_CELLS", 0), patch.object(Settings, "REPORTS_CHART_WORKERS", 1):
+                charts = await ChartPool.render(rows, columns, graphs)
+        finally:
+            ChartPool.shutdown()
+
+        assert charts == expected
+        assert charts["country"][0]["data"]["labels"] == ["FR", "DE"]
+        assert len(charts["price"][0]["data"]["rows"]) == 100
+
+    def test_histogram_fills_empty_buckets(self):
+        df = pd.DataFrame([
+            {"bucket": 0, "count": 3, "min_value": 0, "max_value": 10},
+            {"bucket": 999, "count": 1, "min_value": 0, "max_value": 10},
+        ])
+
+        chart = Histogram(strategy="fixed").generate("price", df)
+
+        assert chart["data"]["labels"][0] == "0.0 - 1.0"
+        assert chart["data"]["datasets"][0]["data"] == [3, 0, 0, 0, 0, 0, 0, 0, 0, 1]
+
+    def test_histogram_binning_strategies(self):
+        values = np.random.default_rng(0).normal(size=10000)
+        values[:5] = [np.nan, np.inf, -np.inf, np.nan, np.nan]
+        finite = values[np.isfinite(values)]
+
+        for strategy in ("fd", "sturges", "fixed"):
+            counts, edges = compute_histogram(values, strategy=strategy)
+            assert counts.sum() == finite.size
+            np.testing.assert_array_equal(counts, np.histogram(finite, bins=edges)[0])
+
+        assert len(compute_histogram(values, strategy="sturges")[0]) == 15
+        log_counts, log_edges = compute_histogram(np.abs(values), strategy="fixed", log_scale=True)
+        assert log_edges[0] > 0 and np.allclose(np.diff(np.log10(log_edges)), np.diff(np.log10(log_edges))[0])
+        with pytest.raises(ValueError):
+            compute_histogram(values, strategy="auto")
+
+    def test_chart_narratives_are_batched_and_cached(self):
+        charts = [
+            {"type": "bar", "data": {"labels": ["a"], "datasets": [{"data": [1]}]}},
+            {"type": "pie", "data": {"labels": ["b"], "datasets": [{"data": [2]}]}},
+        ]
+
+        with patch("src.modules.reports.utils.AdditionalInfo.ChatGoogleGenerativeAI") as MockLLM:
+            MockLLM.return_value.invoke.return_value = MagicMock(content='```json\n["Resumen uno", "Resumen dos"]\n```')
+            AdditionalInfoClient._narratives.clear()
+            client = AdditionalInfoClient()
+
+            first = client.get_additional_infos(charts, "es-CO")
+            second = client.get_additional_infos(list(reversed(charts)), "es")
+
+        assert first == ["Resumen uno", "Resumen dos"]
+        assert second == ["Resumen dos", "Resumen uno"]
+        MockLLM.return_value.invoke.assert_called_once()
+        assert "Spanish" in MockLLM.return_value.invoke.call_args.args[0][0].content
+
+        with patch("src.modules.reports.utils.AdditionalInfo.ChatGoogleGenerativeAI") as MockLLM:
+            MockLLM.return_value.invoke.side_effect = ValueError("invalid request")
+            failed = AdditionalInfoClient().get_additional_infos([{"type": "bar", "data": {"labels": ["c"]}}], "en")
+
+        assert failed == [None]
+
+    @pytest.mark.asyncio
+    async def test_report_snapshots_are_served_until_refreshed(self):
+        repository = MagicMock()
+        definition = ReportDefinition(
+            id="65f1c0a7e4b0a1b2c3d4e5f6",
+            name="Stock",
+            user="user",
+            graph_requests=[GraphRequest(table="warehouse", columns=["country"])],
+            credentials=connection_dict,
+            refresh_interval_minutes=60,
+        )
+        stored = ReportSnapshot(report_id=definition.id, charts={"warehouse.country": []}, refreshed_at=datetime.utcnow() - timedelta(minutes=5))
+        repository.get_definition = AsyncMock(return_value=definition)
+        repository.get_snapshot = AsyncMock(return_value=stored)
+        repository.save_snapshot = AsyncMock()
+        service = ReportService(repository, MagicMock())
+
+        with patch.object(ReportService, "create_graph", new_callable=AsyncMock) as mock_create_graph:
+            mock_create_graph.return_value = {"warehouse.country": [{"type": "bar"}]}
+
+            cached = await service.get_report_charts(definition.id)
+            refreshed = await service.get_report_charts(definition.id, refresh=True)
+
+        assert cached["charts"] == stored.charts and cached["refreshed_at"] == stored.refreshed_at
+        assert refreshed["charts"] == {"warehouse.country": [{"type": "bar"}]}
+        assert refreshed["refreshed_at"] > stored.refreshed_at
+        mock_create_graph.assert_awaited_once()
+        repository.save_snapshot.assert_awaited_once()
+
+    @patch("src.modules.reports.service.ReportService.get_reports", new_callable=AsyncMock)
+    def test_report_definitions_hide_credentials(self, mock_get_reports):
+        mock_get_reports.return_value = [ReportDefinition(
+            id="65f1c0a7e4b0a1b2c3d4e5f6",
+            name="Stock",
+            user="user",
+            graph_requests=[GraphRequest(table="warehouse", columns=["country"])],
+            credentials=connection_dict,
+        )]
+
+        response = client.get("api/reports/definitions", params={"user_id": "user"})
+
+        assert response.status_code == 200
+        assert response.json()["data"][0]["name"] == "Stock"
+        assert "credentials" not in response.json()["data"][0]
+        assert str(connection_dict["password"]) not in response.text
@@ -0,0 +1,83 @@
+import re
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.modules.auth.utils.util import decode_access_token
+from src.utils.Bulkhead import Bulkhead, BulkheadFullError
+from src.utils.ResponseManager import ResponseManager
+
+# (method, path pattern, bulkhead); the first match wins and unmatched requests are not limited.
+ADMISSION_ROUTES: Tuple[Tuple[Optional[str], "re.Pattern[str]", str], ...] = (
+    ("POST", re.compile(r"^/api/text-to-sql/chat(/stream)?/?$"), "chat"),
+    ("POST", re.compile(r"^/api/text-to-sql/fan_out/?$"), "queries"),
+    ("POST", re.compile(r"^/api/text-to-sql/generate_synthetic_data/?$"), "bulk"),
+    (None, re.compile(r"^/api/queries/"), "queries"),
+    (None, re.compile(r"^/api/reports/"), "reports"),
+    (None, re.compile(r"^/api/alerts/"), "alerts"),
+)
+
+
+def bulkhead_for(method: str, path: str) -> Optional[str]:
+    for route_method, pattern, name in ADMISSION_ROUTES:
+        if (route_method is None or route_method == method) and pattern.match(path):
+            return name
+    return None
+
+
+def tenant_of(scope: Scope) -> str:
+    """
+    The user of a verified bearer token, else the client address.
+
+    Request headers are not trusted for this, since any client could claim another user's share.
+    """
+    headers = Headers(scope=scope)
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = decode_access_token(token).get("sub")
+            if subject:
+                return f"user:{subject}"
+        except Exception:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "anonymous"
+
+
+def too_many_requests(error: BulkheadFullError) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content=ResponseManager.error_response(str(error), status_code=429, details={"bulkhead": error.name}),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+class AdmissionControlMiddleware:
+    """
+    Runs every expensive endpoint inside its bulkhead (see ADMISSION_ROUTES and Bulkhead).
+
+    The slot is held until the response is fully sent, so streamed answers count for as long as
+    they stream. When the bulkhead's queue or the tenant's share of it is full, the request is
+    answered at once with 429 and a Retry-After header instead of waiting.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        name = bulkhead_for(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        admitted = False
+        try:
+            async with Bulkhead.get(name).hold(tenant_of(scope)):
+                admitted = True
+                await self.app(scope, receive, send)
+        except BulkheadFullError as e:
+            if admitted:
+                raise
+            await too_many_requests(e)(scope, receive, send)
@@ -0,0 +1,202 @@
+import asyncio
+import contextvars
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, TypeVar
+
+from src.config.constants import Settings
+
+T = TypeVar("T")
+
+# The bulkhead of the request or job being served, so its blocking work runs on that bulkhead's threads.
+_current: contextvars.ContextVar[Optional["Bulkhead"]] = contextvars.ContextVar("bulkhead", default=None)
+_worker = threading.local()
+
+
+class BulkheadFullError(Exception):
+    """Raised when a bulkhead, or the tenant's share of it, has no room left in its queue."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"Too many {name} requests, retry in {retry_after} seconds")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """
+    Bounded concurrency and a bounded, per-tenant fair queue for one class of work.
+
+    At most `max_concurrency` holders run at once, and one tenant at most `tenant_concurrency` of
+    them. Waiters queue per tenant, and freed slots go to the tenants round-robin, so a tenant
+    with many queued requests cannot starve the others. When the whole queue or the tenant's
+    part of it is full, `acquire` raises BulkheadFullError with a Retry-After estimated from the
+    average time a slot is held. Each bulkhead has its own threads for blocking work (see
+    `run_blocking`), so a saturated class cannot take the threads of the others.
+
+    Bulkheads are process-wide and created on first use with `get`.
+    """
+
+    _bulkheads: Dict[str, "Bulkhead"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, tenant_share: float = 1.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.tenant_concurrency = max(1, math.floor(max_concurrency * tenant_share))
+        self.tenant_queue = max(1, math.floor(max_queue * tenant_share))
+        self.active = 0
+        self.queued = 0
+        self.hold_seconds = 1.0
+        self._active_by_tenant: Dict[str, int] = {}
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def get(cls, name: str) -> "Bulkhead":
+        with cls._registry_lock:
+            if name not in cls._bulkheads:
+                concurrency, queue = BULKHEAD_LIMITS[name]
+                cls._bulkheads[name] = Bulkhead(name, concurrency, queue, Settings.BULKHEAD_TENANT_SHARE)
+            return cls._bulkheads[name]
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._registry_lock:
+            cls._bulkheads.clear()
+
+    async def acquire(self, tenant: str, bounded: bool = True) -> None:
+        """Waits for a slot; with `bounded`, raises BulkheadFullError instead of queueing past the limits."""
+        with self._lock:
+            if not self._waiters.get(tenant) and self._has_room(tenant):
+                self._grant(tenant)
+                return
+            waiters = self._waiters.setdefault(tenant, deque())
+            if bounded and (self.queued >= self.max_queue or len(waiters) >= self.tenant_queue):
+                if not waiters:
+                    del self._waiters[tenant]
+                raise BulkheadFullError(self.name, self.retry_after())
+            future = asyncio.get_running_loop().create_future()
+            waiters.append(future)
+            self.queued += 1
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiters = self._waiters.get(tenant)
+                granted = False
+                if waiters is not None and future in waiters:
+                    waiters.remove(future)
+                    self.queued -= 1
+                    if not waiters:
+                        del self._waiters[tenant]
+                else:
+                    # Cancelled after `_wake` handed over the slot; otherwise `_wake` gives it back.
+                    granted = future.done() and not future.cancelled()
+            if granted:
+                self.release(tenant)
+            raise
+
+    def release(self, tenant: str, held_seconds: Optional[float] = None) -> None:
+        with self._lock:
+            self.active -= 1
+            self._active_by_tenant[tenant] -= 1
+            if not self._active_by_tenant[tenant]:
+                del self._active_by_tenant[tenant]
+            if held_seconds is not None:
+                self.hold_seconds = 0.8 * self.hold_seconds + 0.2 * held_seconds
+            self._dispatch()
+
+    def retry_after(self) -> int:
+        """Seconds until the queue is expected to have room again, between 1 and 60."""
+        return min(60, max(1, math.ceil(self.hold_seconds * (self.queued + 1) / self.max_concurrency)))
+
+    def _has_room(self, tenant: str) -> bool:
+        return self.active < self.max_concurrency and self._active_by_tenant.get(tenant, 0) < self.tenant_concurrency
+
+    def _grant(self, tenant: str) -> None:
+        self.active += 1
+        self._active_by_tenant[tenant] = self._active_by_tenant.get(tenant, 0) + 1
+
+    def _dispatch(self) -> None:
+        """Hands free slots to the waiting tenants in turn; called with the lock held."""
+        while self.active < self.max_concurrency:
+            tenant = next((tenant for tenant in self._waiters if self._has_room(tenant)), None)
+            if tenant is None:
+                return
+            waiters = self._waiters.pop(tenant)
+            future = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                # Re-inserted last, so the next free slot goes to another tenant first.
+                self._waiters[tenant] = waiters
+            if future.done():
+                continue
+            self._grant(tenant)
+            future.get_loop().call_soon_threadsafe(self._wake, future, tenant)
+
+    def _wake(self, future: asyncio.Future, tenant: str) -> None:
+        if future.done():
+            # The waiter was cancelled after it was given the slot.
+            self.release(tenant)
+        else:
+            future.set_result(None)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Room for a second blocking call per holder, e.g. a query next to an LLM call.
+                self._executor = ThreadPoolExecutor(
+                    max_workers=2 * self.max_concurrency,
+                    thread_name_prefix=f"bulkhead-{self.name}",
+                    initializer=_mark_worker,
+                )
+            return self._executor
+
+    @asynccontextmanager
+    async def hold(self, tenant: str, bounded: bool = True) -> AsyncIterator[None]:
+        """Holds a slot for the body of the block, whose blocking work runs on this bulkhead's threads."""
+        await self.acquire(tenant, bounded)
+        token = _current.set(self)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            _current.reset(token)
+            self.release(tenant, time.monotonic() - started)
+
+
+def _mark_worker() -> None:
+    _worker.active = True
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    asyncio.to_thread on the threads of the current bulkhead.
+
+    Outside of a bulkhead, and from a thread of one (where waiting on the same pool could
+    deadlock), it is plain asyncio.to_thread.
+    """
+    bulkhead = _current.get()
+    if bulkhead is None or getattr(_worker, "active", False):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(bulkhead.executor, call)
+
+
+BULKHEAD_LIMITS = {
+    "chat": (Settings.BULKHEAD_CHAT_CONCURRENCY, Settings.BULKHEAD_CHAT_QUEUE),
+    "queries": (Settings.BULKHEAD_QUERIES_CONCURRENCY, Settings.BULKHEAD_QUERIES_QUEUE),
+    "reports": (Settings.BULKHEAD_REPORTS_CONCURRENCY, Settings.BULKHEAD_REPORTS_QUEUE),
+    "alerts": (Settings.BULKHEAD_ALERTS_CONCURRENCY, Settings.BULKHEAD_ALERTS_QUEUE),
+    "bulk": (Settings.BULKHEAD_BULK_CONCURRENCY, Settings.BULKHEAD_BULK_QUEUE),
+}
@@ -0,0 +1,246 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from src.config.constants import Settings
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+DEFAULT_PROVIDER = "google"
+
+
+class LLMUnavailableError(Exception):
+    """Raised when no configured model could answer: every one was rate limited, failing or saturated."""
+
+
+def parse_targets(provider: str, model: str, fallbacks: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    The ordered `(provider, model)` pairs to try: the client's own model first, then the
+    comma-separated `provider:model` entries of `fallbacks` (LLM_FALLBACK_MODELS by default).
+    Entries without a provider use the default one.
+    """
+    targets = [(provider, model)]
+    for entry in (Settings.LLM_FALLBACK_MODELS if fallbacks is None else fallbacks).split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        target_provider, _, target_model = entry.rpartition(":")
+        target = (target_provider or DEFAULT_PROVIDER, target_model)
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """
+    HTTP status of a provider error, from the SDK exception or the one it was raised from.
+
+    google-api-core exceptions expose it as `code`, OpenAI's as `status_code`, and HTTP client
+    errors on their `response`.
+    """
+    while error is not None:
+        for value in (
+            getattr(error, "status_code", None),
+            getattr(error, "code", None),
+            getattr(getattr(error, "response", None), "status_code", None),
+        ):
+            if isinstance(value, int):
+                return value
+        error = error.__cause__
+    return None
+
+
+def output_tokens(response: Any) -> int:
+    """Generated tokens of a LangChain message (`usage_metadata`) or a google-generativeai response."""
+    usage = getattr(response, "usage_metadata", None)
+    tokens = usage.get("output_tokens") if isinstance(usage, dict) else getattr(usage, "candidates_token_count", None)
+    return tokens if isinstance(tokens, int) else 0
+
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, (TimeoutError, ConnectionError)) or status_code(error) in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float) -> bool:
+        """Takes one token, waiting for it until `deadline` (a time.monotonic() value)."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """
+    Caps the requests in flight with additive-increase, multiplicative-decrease: every success
+    raises the limit by 1/limit (about one slot per round trip) up to `max_limit`, and every
+    rate-limit response halves it, down to one.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline: float) -> bool:
+        with self._condition:
+            while self.in_flight >= max(1, int(self.limit)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def abandon(self) -> None:
+        """Frees a slot that was never used for a request, leaving the limit as it is."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def release(self, rate_limited: bool = False) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if rate_limited:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class _ModelState:
+    def __init__(self):
+        self.bucket = TokenBucket(Settings.LLM_REQUESTS_PER_MINUTE / 60, Settings.LLM_BURST)
+        self.limiter = AdaptiveLimiter(Settings.LLM_MAX_CONCURRENCY)
+        self.metrics: Dict[str, float] = {
+            "requests": 0, "failures": 0, "retries": 0, "rate_limited": 0, "failovers": 0,
+            "queue_seconds": 0.0, "max_queue_seconds": 0.0, "generation_seconds": 0.0, "output_tokens": 0,
+        }
+
+
+class LLMGateway:
+    """
+    Process-wide gate in front of every model call.
+
+    Each `provider:model` has its own token bucket (LLM_REQUESTS_PER_MINUTE, LLM_BURST) and
+    adaptive concurrency limit (up to LLM_MAX_CONCURRENCY). A call waits for both, at most
+    LLM_QUEUE_TIMEOUT_SECONDS; 429 and 5xx responses are retried with full-jitter exponential
+    backoff, and once a model is out of retries or its queue is full the call fails over to the
+    next target. Other errors are raised at once, since another model would not fix the request.
+    Queue time and output tokens per second are kept per model, see `metrics`.
+    """
+
+    _models: Dict[str, _ModelState] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _state(cls, name: str) -> _ModelState:
+        with cls._lock:
+            state = cls._models.get(name)
+            if state is None:
+                state = cls._models[name] = _ModelState()
+            return state
+
+    @classmethod
+    def invoke(
+        cls,
+        targets: List[Tuple[str, str]],
+        call: Callable[[str, str], T],
+        count_tokens: Callable[[T], int] = output_tokens,
+    ) -> T:
+        """Returns `call(provider, model)` for the first target that answers."""
+        last_error: Optional[BaseException] = None
+        for index, (provider, model) in enumerate(targets):
+            name = f"{provider}:{model}"
+            state = cls._state(name)
+            if index:
+                cls._record(state, failovers=1)
+                print(f"LLM gateway: failing over to {name} after: {last_error}")
+
+            for attempt in range(Settings.LLM_MAX_RETRIES + 1):
+                if attempt:
+                    cls._record(state, retries=1)
+                    time.sleep(random.uniform(0, min(Settings.LLM_BACKOFF_MAX_SECONDS, Settings.LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)))
+
+                queued_at = time.monotonic()
+                deadline = queued_at + Settings.LLM_QUEUE_TIMEOUT_SECONDS
+                # The rate token is only spent once a slot is held, so a call that times out in the
+                # concurrency queue does not use up the budget of the calls behind it.
+                if not state.limiter.acquire(deadline):
+                    last_error = LLMUnavailableError(f"{name} is saturated")
+                    break
+                if not state.bucket.acquire(deadline):
+                    state.limiter.abandon()
+                    last_error = LLMUnavailableError(f"{name} is saturated")
+                    break
+
+                started_at = time.monotonic()
+                rate_limited = False
+                try:
+                    response = call(provider, model)
+                except Exception as e:
+                    last_error = e
+                    rate_limited = status_code(e) == 429
+                    cls._record(state, requests=1, failures=1, rate_limited=int(rate_limited), queue_seconds=started_at - queued_at)
+                    if not is_retryable(e):
+                        raise
+                    continue
+                finally:
+                    state.limiter.release(rate_limited)
+
+                cls._record(
+                    state, requests=1, queue_seconds=started_at - queued_at,
+                    generation_seconds=time.monotonic() - started_at, output_tokens=count_tokens(response),
+                )
+                return response
+
+        raise LLMUnavailableError(f"No model could answer: {last_error}") from last_error
+
+    @classmethod
+    def _record(cls, state: _ModelState, **values: float) -> None:
+        with cls._lock:
+            for key, value in values.items():
+                state.metrics[key] += value
+            if "queue_seconds" in values:
+                state.metrics["max_queue_seconds"] = max(state.metrics["max_queue_seconds"], values["queue_seconds"])
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Dict[str, Any]]:
+        """Counters per `provider:model`, with the average queue time and output tokens per second."""
+        with cls._lock:
+            snapshot = {}
+            for name, state in cls._models.items():
+                metrics = dict(state.metrics)
+                metrics["avg_queue_seconds"] = metrics["queue_seconds"] / metrics["requests"] if metrics["requests"] else 0.0
+                metrics["tokens_per_second"] = (
+                    metrics["output_tokens"] / metrics["generation_seconds"] if metrics["generation_seconds"] else 0.0
+                )
+                metrics["concurrency_limit"] = int(state.limiter.limit)
+                metrics["in_flight"] = state.limiter.in_flight
+                snapshot[name] = metrics
+            return snapshot
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._models.clear()
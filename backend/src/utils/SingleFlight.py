@@ -0,0 +1,76 @@
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.shared: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work: while a call for a key is running, other callers with the
+    same key wait for it and share its result (or its exception) instead of running it again.
+
+    Nothing is kept once the call finishes, so this only collapses bursts such as a dashboard
+    opened in many browsers at once; caching is left to QueryResultCache and TTLCache. Waiters get
+    a deep copy of the result, so no caller can change what another one sees.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.shared)
+
+        try:
+            result = function()
+        except BaseException as e:
+            call.error = e
+            self._release(key, call)
+            call.done.set()
+            raise
+
+        if self._release(key, call):
+            # Taken before the leader gets the result back, so its changes never reach the waiters.
+            call.shared = copy.deepcopy(result)
+        call.done.set()
+        return result
+
+    def _release(self, key: Hashable, call: _Call) -> int:
+        """Stops new callers from joining `call`; returns how many already did."""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            return call.waiters
+
+    def forget(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Makes later callers of the matching keys start a new call instead of joining the running one."""
+        with self._lock:
+            for key in [key for key in self._calls if predicate(key)]:
+                del self._calls[key]
+
+    def waiting(self, key: Hashable) -> int:
+        """Number of callers currently waiting for the call of `key`."""
+        with self._lock:
+            call = self._calls.get(key)
+            return call.waiters if call else 0
@@ -0,0 +1,44 @@
+import json
+import threading
+from typing import Any, AsyncIterator, Iterator, TypeVar
+
+from src.utils.Bulkhead import run_blocking
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def to_sse(event: str, data: Any) -> str:
+    """Formats one Server-Sent Event; values JSON cannot encode (dates, decimals) are sent as strings."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Drains a blocking iterator (LLM token streams, database cursors) without blocking the event loop.
+
+    When the consumer stops early, e.g. the client disconnected, the iterator is closed right away,
+    so a generator releases its connection, transaction and cursor instead of waiting for garbage
+    collection. Use it with `contextlib.aclosing` for that to happen when the consumer is closed.
+    """
+    # A `next` still running in its thread when the consumer stops must finish before `close`.
+    lock = threading.Lock()
+
+    def step() -> Any:
+        with lock:
+            return next(iterator, _DONE)
+
+    def close() -> None:
+        with lock:
+            iterator.close()
+
+    try:
+        while True:
+            item = await run_blocking(step)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            await run_blocking(close)